@@ -0,0 +1,153 @@
+"""
+Batch lookups for the memento client.
+
+"""
+
+import logging
+import sys
+import threading
+
+# Python 2.7 and 3.X support are different for urlparse and queue
+if sys.version_info[0] == 3:
+    from urllib.parse import urlparse
+    import queue
+else:
+    from urlparse import urlparse
+    import Queue as queue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REORDER_WINDOW = 64
+
+
+def host_key(uri):
+    """
+    :param uri: (str) The http uri.
+    :return: (tuple) The scheme and host of the uri, that connections are
+             pooled on.
+    """
+    parts = urlparse(uri)
+    return parts.scheme, parts.netloc.lower()
+
+
+def group_by_host(lookups, window=DEFAULT_REORDER_WINDOW, max_group=None):
+    """
+    Reorders lookups so that those of the same host run one after the other,
+    on warm connections, rather than interleaved with other hosts. Only the
+    next window lookups are reordered at a time: the group of the oldest
+    pending lookup is run first, with the pending lookups of its host, so
+    each lookup is held back by at most window - 1 groups.
+
+    eg: with a window of 4
+    a1 b1 a2 c1 a3 b2  ->  [a1 a2] [b1 b2] [c1] [a3]
+
+    :param lookups: (iterable) The (request_uri, accept_datetime) pairs.
+    :param window: (int) The number of lookups reordered at a time.
+    :param max_group: (int)[optional] The most lookups in a group.
+    :return: (generator) The groups, lists of lookups of the same host, in
+             input order.
+    """
+    lookups = enumerate(lookups)
+    pending = {}
+    size = 0
+    exhausted = False
+    while True:
+        while not exhausted and size < window:
+            try:
+                position, lookup = next(lookups)
+            except StopIteration:
+                exhausted = True
+                break
+            pending.setdefault(host_key(lookup[0]), []).append(
+                (position, lookup))
+            size += 1
+        if not pending:
+            return
+
+        host = min(pending, key=lambda h: pending[h][0][0])
+        group = pending.pop(host)
+        if max_group and len(group) > max_group:
+            pending[host] = group[max_group:]
+            group = group[:max_group]
+        size -= len(group)
+        yield [lookup for _, lookup in group]
+
+
+def run_lookups(client, lookups, timeout=None, workers=1, window=0,
+                on_result=None):
+    """
+    Runs get_memento_info for every (request_uri, accept_datetime) lookup.
+    With more than one worker, the lookups are run in threads, each with
+    its own client configured like the given client.
+
+    :param client: (MementoClient) The client.
+    :param lookups: (list) The unique (request_uri, accept_datetime) pairs.
+    :param timeout: (int) the timeout value for the HTTP connections.
+    :param workers: (int) The number of concurrent lookups.
+    :param window: (int) Group the lookups by host, reordering this many at
+                   a time (see group_by_host). Each group is run by one
+                   worker, on the connections of its client. The lookups
+                   are run in input order if 0.
+    :param on_result: (callable)[optional] Called with each lookup and its
+                      result as soon as the lookup completes, one call at a
+                      time, instead of keeping the results.
+    :return: (dict) A map of each lookup to its result, or to the exception
+             raised by the lookup. Empty with on_result.
+    """
+    results = {}
+    lock = threading.Lock()
+
+    def done(lookup, result):
+        if on_result is None:
+            results[lookup] = result
+            return
+        with lock:
+            on_result(lookup, result)
+
+    if window:
+        # groups no larger than a worker's share of the window, so that one
+        # busy host does not leave the other workers idle
+        groups = list(group_by_host(lookups, window,
+                                    max_group=max(1, window // workers)))
+    else:
+        groups = [[lookup] for lookup in lookups]
+
+    if workers <= 1:
+        for group in groups:
+            for lookup in group:
+                done(lookup, _lookup(client, lookup, timeout))
+        return results
+
+    pending = queue.Queue()
+    for group in groups:
+        pending.put(group)
+
+    def work():
+        worker = client.__class__(**client.worker_kwargs())
+        try:
+            while True:
+                try:
+                    group = pending.get_nowait()
+                except queue.Empty:
+                    break
+                for lookup in group:
+                    done(lookup, _lookup(worker, lookup, timeout))
+        finally:
+            worker.close()
+
+    threads = [threading.Thread(target=work)
+               for _ in range(min(workers, len(lookups)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _lookup(client, lookup, timeout):
+    try:
+        return client.get_memento_info(lookup[0], lookup[1], timeout=timeout)
+    except Exception as e:
+        logger.debug("Lookup of %s at %s failed: %r",
+                     lookup[0], lookup[1], e)
+        return e
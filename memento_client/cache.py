@@ -0,0 +1,150 @@
+"""
+Caches for the memento client.
+
+"""
+
+from collections import OrderedDict
+import threading
+import time
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_NEGATIVE_TTL = 300
+DEFAULT_NEGATIVE_MAX_TTL = 86400
+
+
+class MementoCache(object):
+    """
+    A thread safe, in memory cache with a time to live for its entries.
+    When full, the least recently used entry is evicted.
+    A single cache can be shared by many MementoClient objects.
+
+    Cached values are shared between everyone reading them, and should not
+    be modified.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        """
+        :param max_size: (int) The maximum number of entries held.
+        :param ttl: (int) The default number of seconds an entry is valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key):
+        """
+        Returns the cached value of a key.
+        :param key: (hashable) The key.
+        :return: The value, or None if the key is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                self.misses += 1
+                return
+            # move to the most recently used end
+            del self._entries[key]
+            self._entries[key] = entry
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Caches a value.
+        :param key: (hashable) The key.
+        :param value: The value to cache, must not be None.
+        :param ttl: (int)[optional] The number of seconds the value is valid,
+                    the ttl of the cache by default.
+        """
+        if ttl is None:
+            ttl = self.ttl
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + ttl, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Removes a key from the cache.
+        :param key: (hashable) The key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+class NegativeCache(MementoCache):
+    """
+    A cache for lookups that found nothing archived, kept apart from the
+    results, with a shorter time to live.
+
+    Every time the same key is found empty again after its entry expired,
+    it is kept backoff times longer, up to max_ttl, so that uris that are
+    never archived are re-checked less and less often. Deleting a key, eg:
+    once a memento is found, starts it over.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_NEGATIVE_TTL,
+                 max_ttl=DEFAULT_NEGATIVE_MAX_TTL, backoff=2.0):
+        """
+        :param max_size: (int) The maximum number of entries held.
+        :param ttl: (int) The seconds a key is valid the first time.
+        :param max_ttl: (int) The most seconds a key is valid.
+        :param backoff: (float) The growth of the ttl every time a key is
+                        set again.
+        """
+        super(NegativeCache, self).__init__(max_size, ttl)
+        self.max_ttl = max_ttl
+        self.backoff = backoff
+        # the number of times each key was set in a row, kept after the
+        # entries expire.
+        self._streaks = OrderedDict()
+
+    def set(self, key, value, ttl=None):
+        """
+        Caches a value, for longer every time the key is set again.
+        :param key: (hashable) The key.
+        :param value: The value to cache, must not be None.
+        :param ttl: (int)[optional] The number of seconds the value is valid,
+                    by default from the ttl, backoff and max_ttl.
+        """
+        with self._lock:
+            streak = self._streaks.pop(key, 0)
+            self._streaks[key] = streak + 1
+            while len(self._streaks) > self.max_size:
+                self._streaks.popitem(last=False)
+        if ttl is None:
+            ttl = min(self.ttl * self.backoff ** streak, self.max_ttl)
+        super(NegativeCache, self).set(key, value, ttl)
+
+    def delete(self, key):
+        super(NegativeCache, self).delete(key)
+        with self._lock:
+            self._streaks.pop(key, None)
+
+    def clear(self):
+        super(NegativeCache, self).clear()
+        with self._lock:
+            self._streaks.clear()
@@ -0,0 +1,144 @@
+"""
+URI canonicalization for the cache and duplicate lookup keys of the memento
+client.
+
+"""
+
+import re
+import sys
+
+# Python 2.7 and 3.X support are different for urlparse
+if sys.version_info[0] == 3:
+    from urllib.parse import urlsplit
+else:
+    from urlparse import urlsplit
+
+# query parameters that only track the visitor, and never change the page.
+# Not left out of standard SURT keys, so only when asked for.
+TRACKING_PARAMS = frozenset([
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "utm_id", "gclid", "dclid", "fbclid", "msclkid", "mc_cid", "mc_eid",
+    "_ga", "yclid", "igshid"])
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# the session id query parameters left out of standard SURT keys
+SESSION_PARAM = re.compile(
+    r"^(?:(?:jsessionid|phpsessid|sid)=[0-9a-z]{32}"
+    r"|aspsessionid[a-z]{8}=[a-z]{24}|cfid=.+|cftoken=.+)$", re.I)
+
+
+class Canonicalizer(object):
+    """
+    Turns URIs into SURT (Sort-friendly URI Reordering Transform) keys, so
+    that URIs of the same resource share one key. eg:
+    >>> surt = Canonicalizer()
+    >>> surt("https://www.BBC.com/News/?b=2&a=1")
+    'com,bbc)/news?a=1&b=2'
+    >>> surt("http://bbc.com")
+    'com,bbc)/'
+
+    By default the keys are those of the CDX indexes of pywb and the Wayback
+    Machine, as made by the surt package, but for percent-encoding, which
+    is left as given. Tracking query parameters can be left out as well:
+    >>> surt = Canonicalizer(strip_params=TRACKING_PARAMS)
+    >>> surt("https://bbc.com/?utm_source=x")
+    'com,bbc)/'
+
+    The keys are only used to look up and deduplicate, the URIs themselves
+    are always requested as they are given.
+    """
+
+    def __init__(self,
+                 strip_scheme=True,
+                 strip_www=True,
+                 strip_trailing_slash=True,
+                 sort_query=True,
+                 lowercase=True,
+                 strip_session_ids=True,
+                 strip_params=None):
+        """
+        :param strip_scheme: (bool) http and https URIs share a key.
+        :param strip_www: (bool) www., www1. etc. hosts share the key of
+                          the host without them.
+        :param strip_trailing_slash: (bool) /path/ and /path share a key.
+        :param sort_query: (bool) The order of query parameters is ignored.
+        :param lowercase: (bool) The path and query are lowercased, as well
+                          as the host.
+        :param strip_session_ids: (bool) The session id query parameters,
+                                  eg: jsessionid, are ignored.
+        :param strip_params: (set)[optional] More query parameters to
+                             ignore, eg: TRACKING_PARAMS. Matched case
+                             insensitively.
+        """
+        self.strip_scheme = strip_scheme
+        self.strip_www = strip_www
+        self.strip_trailing_slash = strip_trailing_slash
+        self.sort_query = sort_query
+        self.lowercase = lowercase
+        self.strip_session_ids = strip_session_ids
+        self.strip_params = frozenset(p.lower() for p in strip_params or ())
+
+    def __call__(self, uri):
+        return self.surt(uri)
+
+    def surt(self, uri):
+        """
+        :param uri: (str) An http(s) uri.
+        :return: (str) The SURT key of the uri, eg: com,bbc)/news?a=1
+        """
+        parts = urlsplit(uri.strip())
+        scheme = parts.scheme.lower()
+
+        host = (parts.hostname or "").strip(".")
+        if self.strip_www and host.startswith("www"):
+            prefix, _, rest = host.partition(".")
+            if rest and (prefix == "www" or prefix[3:].isdigit()):
+                host = rest
+        surt = ",".join(reversed(host.split(".")))
+
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        if port and str(port) != DEFAULT_PORTS.get(scheme):
+            surt += ":%d" % port
+
+        path = parts.path or "/"
+        query = parts.query
+        if self.lowercase:
+            path = path.lower()
+            query = query.lower()
+        if self.strip_trailing_slash and len(path) > 1:
+            path = path.rstrip("/") or "/"
+        surt += ")" + path
+
+        # the parameters are kept as given, "a" and "a=" differ
+        params = query.split("&") if query else []
+        if self.strip_session_ids:
+            params = [param for param in params
+                      if not SESSION_PARAM.match(param)]
+        if self.strip_params:
+            params = [param for param in params
+                      if param.partition("=")[0].lower()
+                      not in self.strip_params]
+        if self.sort_query:
+            params.sort(key=lambda param: tuple(param.split("=", 1)))
+        if params:
+            surt += "?" + "&".join(params)
+
+        if not self.strip_scheme:
+            surt = scheme + "://(" + surt
+        return surt
+
+
+def surt(uri):
+    """
+    Returns the SURT key of a uri, with the default Canonicalizer.
+    :param uri: (str) An http(s) uri.
+    :return: (str) The SURT key, eg: com,bbc)/news
+    """
+    return _DEFAULT.surt(uri)
+
+
+_DEFAULT = Canonicalizer()
@@ -0,0 +1,360 @@
+"""
+Records the HTTP requests and responses of the memento client to a
+cassette file, and replays them without any network, for deterministic
+offline runs and benchmarks.
+
+    $ python -m memento_client.loadtest --record run.cassette
+    $ python -m memento_client.loadtest --replay run.cassette --speed 1
+
+"""
+
+import base64
+import gzip
+import json
+import logging
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Python 2.7 and 3.X support are different for urlparse
+if sys.version_info[0] == 3:
+    from urllib.parse import urljoin
+else:
+    from urlparse import urljoin
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+ReplayRequest = namedtuple("ReplayRequest", ["method", "url", "headers"])
+
+
+def interaction_key(method, uri, headers=None):
+    """
+    :return: (tuple) The key an interaction is replayed on: the method, the
+             uri, and the request headers set by the client, eg:
+             Accept-Datetime.
+    """
+    return (method.upper(), uri,
+            tuple(sorted((name.lower(), value)
+                         for name, value in (headers or {}).items())))
+
+
+class Cassette(object):
+    """
+    The HTTP interactions of one or more clients, in the order they were
+    made, saved as gzipped JSON lines.
+
+    Recording:
+    >>> cassette = Cassette("run.cassette", record=True)
+    >>> mc = MementoClient(cassette=cassette)
+    >>> mc.get_memento_info("http://www.cnn.com/", dt)
+    >>> cassette.save()
+
+    Replaying, with no network:
+    >>> mc = MementoClient(cassette=Cassette("run.cassette", speed=1.0))
+
+    A request is answered with the interactions recorded for the same
+    method, uri and request headers, in turn, starting over once all have
+    been replayed. Requests that were not recorded fail with a
+    ConnectionError, as they would offline. Thread safe.
+    """
+
+    def __init__(self, path=None, record=False, speed=0.0, meta=None):
+        """
+        :param path: (str)[optional] The cassette file, loaded if not
+                     recording.
+        :param record: (bool) Record the interactions, instead of replaying
+                       them.
+        :param speed: (float) How fast the interactions are replayed: 1.0
+                      takes the time of the recording, 2.0 half of it, and
+                      0 does not wait at all.
+        :param meta: (dict)[optional] Details of the run saved along with
+                     the interactions, eg: the uris looked up.
+        """
+        self.path = path
+        self.record = record
+        self.speed = speed
+        self.meta = meta or {}
+        self.interactions = []
+        self._replays = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        if path and not record:
+            self.load(path)
+
+    def __len__(self):
+        return len(self.interactions)
+
+    def add(self, interaction):
+        """
+        Adds an interaction.
+        :param interaction: (dict) {"method": str, "uri": str, "headers":
+                            dict, and either "status_code": int, "reason":
+                            str, "url": str, "response_headers": dict,
+                            "body": base64 str, or "error": the name of the
+                            requests exception raised, and "elapsed": float}
+        """
+        key = interaction_key(interaction["method"], interaction["uri"],
+                              interaction["headers"])
+        with self._lock:
+            self.interactions.append(interaction)
+            self._replays.setdefault(key, []).append(interaction)
+
+    def find(self, method, uri, headers=None):
+        """
+        :return: (dict) The next recorded interaction of the request, or None
+                 if none was recorded.
+        """
+        key = interaction_key(method, uri, headers)
+        with self._lock:
+            replays = self._replays.get(key)
+            if not replays:
+                return
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return replays[position % len(replays)]
+
+    def rewind(self):
+        """
+        Replays every request from its first interaction again.
+        """
+        with self._lock:
+            self._positions.clear()
+
+    def wrap(self, session):
+        """
+        :param session: A session or transport of the client.
+        :return: A RecordingSession of the session when recording, else a
+                 ReplaySession.
+        """
+        if self.record:
+            return RecordingSession(self, session)
+        return ReplaySession(self, session)
+
+    def load(self, path):
+        """
+        Adds the interactions of a cassette file.
+        :param path: (str) The file.
+        """
+        with gzip.open(path, "rb") as f:
+            header = json.loads(f.readline().decode("utf-8"))
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError("%s is not a version %d cassette." %
+                                 (path, CASSETTE_VERSION))
+            self.meta = header.get("meta", {})
+            for line in f:
+                self.add(json.loads(line.decode("utf-8")))
+        logger.debug("Loaded %d interactions from %s", len(self), path)
+
+    def save(self, path=None):
+        """
+        Writes the interactions to a cassette file.
+        :param path: (str)[optional] The file, the path of the cassette by
+                     default.
+        """
+        path = path or self.path
+        with self._lock:
+            interactions = list(self.interactions)
+        with gzip.open(path, "wb") as f:
+            f.write((json.dumps({"version": CASSETTE_VERSION,
+                                 "meta": self.meta}) + "\n").encode("utf-8"))
+            for interaction in interactions:
+                f.write((json.dumps(interaction, sort_keys=True) + "\n")
+                        .encode("utf-8"))
+        logger.debug("Saved %d interactions to %s", len(interactions), path)
+
+
+class ReplayResponse(object):
+    """
+    A recorded response, with the attributes of a requests response that
+    the memento client uses.
+    """
+
+    def __init__(self, interaction, history=None):
+        self.status_code = interaction["status_code"]
+        self.reason = interaction.get("reason")
+        self.url = interaction.get("url") or interaction["uri"]
+        self.headers = CaseInsensitiveDict(interaction["response_headers"])
+        self.request = ReplayRequest(interaction["method"], interaction["uri"],
+                                     interaction["headers"])
+        self.elapsed = timedelta(seconds=interaction.get("elapsed") or 0)
+        self.history = history or []
+        self.content = base64.b64decode(interaction.get("body") or "")
+        self.encoding = get_encoding_from_headers(self.headers)
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", "replace")
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return "<ReplayResponse [%d]>" % self.status_code
+
+
+def _hops(response):
+    return list(getattr(response, "history", None) or []) + [response]
+
+
+class RecordingSession(object):
+    """
+    Sends the requests of the client with its session or transport, and
+    records each request, and each redirect followed, to a cassette.
+    """
+
+    def __init__(self, cassette, session):
+        self.cassette = cassette
+        self.session = session
+
+    @property
+    def thread_safe(self):
+        return getattr(self.session, "thread_safe", False)
+
+    def head(self, uri, headers=None, allow_redirects=False, timeout=None):
+        return self.request("HEAD", uri, headers=headers,
+                            allow_redirects=allow_redirects, timeout=timeout)
+
+    def get(self, uri, headers=None, allow_redirects=True, timeout=None,
+            stream=False):
+        return self.request("GET", uri, headers=headers,
+                            allow_redirects=allow_redirects, timeout=timeout,
+                            stream=stream)
+
+    def request(self, method, uri, headers=None, allow_redirects=True,
+                timeout=None, stream=False):
+        start = time.time()
+        send = getattr(self.session, method.lower())
+        kwargs = {"headers": headers, "allow_redirects": allow_redirects,
+                  "timeout": timeout}
+        if stream:
+            kwargs["stream"] = True
+        try:
+            response = send(uri, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.cassette.add({"method": method, "uri": uri,
+                               "headers": dict(headers or {}),
+                               "error": e.__class__.__name__,
+                               "elapsed": time.time() - start})
+            raise
+
+        # the redirects are keyed on the uris they are replayed with
+        hop_uri = uri
+        for hop in _hops(response):
+            elapsed = getattr(hop, "elapsed", None)
+            self.cassette.add({
+                "method": method,
+                "uri": hop_uri,
+                "headers": dict(headers or {}),
+                "status_code": hop.status_code,
+                "reason": getattr(hop, "reason", None),
+                "url": hop.url,
+                "response_headers": dict((name, hop.headers.get(name))
+                                         for name in hop.headers),
+                "body": base64.b64encode(hop.content).decode("ascii")
+                if method != "HEAD" and hop is response else "",
+                "elapsed": elapsed.total_seconds() if elapsed else 0})
+            location = hop.headers.get("Location")
+            if location:
+                hop_uri = urljoin(hop_uri, location)
+        return response
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ReplaySession(object):
+    """
+    Answers the requests of the client from a cassette, without any
+    network, following the recorded redirects. Each response takes the time
+    it took when recorded, divided by the speed of the cassette.
+    """
+
+    thread_safe = True
+
+    def __init__(self, cassette, session=None, max_redirects=30):
+        """
+        :param cassette: (Cassette) The cassette.
+        :param session: [optional] The session replaced, closed with this
+                        one.
+        :param max_redirects: (int) the maximum number of redirects followed.
+        """
+        self.cassette = cassette
+        self.session = session
+        self.max_redirects = max_redirects
+
+    def head(self, uri, headers=None, allow_redirects=False, timeout=None):
+        return self.request("HEAD", uri, headers=headers,
+                            allow_redirects=allow_redirects, timeout=timeout)
+
+    def get(self, uri, headers=None, allow_redirects=True, timeout=None,
+            stream=False):
+        return self.request("GET", uri, headers=headers,
+                            allow_redirects=allow_redirects, timeout=timeout)
+
+    def request(self, method, uri, headers=None, allow_redirects=True,
+                timeout=None, stream=False):
+        history = []
+        while True:
+            response = self._replay(method, uri, headers, timeout)
+            location = response.headers.get("Location")
+            if not allow_redirects or not location \
+                    or not 299 < response.status_code < 400:
+                break
+            if len(history) >= self.max_redirects:
+                raise requests.exceptions.TooManyRedirects(
+                    "Exceeded %d redirects." % self.max_redirects,
+                    response=response)
+            history.append(response)
+            uri = urljoin(uri, location)
+
+        response.history = history
+        return response
+
+    def _replay(self, method, uri, headers, timeout):
+        interaction = self.cassette.find(method, uri, headers)
+        if interaction is None:
+            raise requests.exceptions.ConnectionError(
+                "No recorded response for %s %s" % (method, uri))
+
+        if self.cassette.speed:
+            delay = interaction.get("elapsed", 0) / self.cassette.speed
+            if isinstance(timeout, (int, float)) and delay > timeout:
+                time.sleep(timeout)
+                raise requests.exceptions.ReadTimeout(
+                    "Replaying %s %s timed out." % (method, uri))
+            time.sleep(delay)
+
+        if "error" in interaction:
+            error = getattr(requests.exceptions, interaction["error"],
+                            requests.exceptions.ConnectionError)
+            raise error("Recorded %s for %s %s" %
+                        (interaction["error"], method, uri))
+        return ReplayResponse(interaction)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
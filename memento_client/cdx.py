@@ -0,0 +1,367 @@
+"""
+A local resolution backend for the memento client, that answers lookups from
+sorted CDX and CDXJ index files.
+
+"""
+
+import calendar
+import json
+import logging
+import mmap
+import os
+from datetime import datetime
+
+from .canonical import Canonicalizer
+from .timemap import TimeMap, to_datetime, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+# pads a shorter timestamp to the start of the period it gives, eg: 2010 to
+# 20100101000000
+TIMESTAMP_PAD = "00000101000000"
+
+# the fields of the classic space separated CDX formats
+CDX_ORIGINAL_FIELD = 2
+CDX_STATUS_FIELD = 4
+
+
+def to_archive_timestamp(dt):
+    """
+    :param dt: (datetime|int) The datetime, or seconds since the epoch.
+    :return: (str) The 14 digit archive timestamp, eg: 20100424190000
+    """
+    if not isinstance(dt, datetime):
+        dt = to_datetime(to_timestamp(dt))
+    return dt.strftime("%Y%m%d%H%M%S")
+
+
+def from_archive_timestamp(timestamp):
+    """
+    :param timestamp: (str) An archive timestamp of up to 14 digits.
+    :return: (int) The seconds since the epoch.
+    """
+    ts = timestamp + TIMESTAMP_PAD[len(timestamp):]
+    return calendar.timegm((int(ts[0:4]), int(ts[4:6]), int(ts[6:8]),
+                            int(ts[8:10]), int(ts[10:12]), int(ts[12:14])))
+
+
+class CDXRecord(object):
+    """
+    A line of a CDX or CDXJ index.
+    """
+
+    __slots__ = ("surt", "timestamp", "original_uri", "status_code")
+
+    def __init__(self, surt, timestamp, original_uri, status_code):
+        self.surt = surt
+        self.timestamp = timestamp
+        self.original_uri = original_uri
+        self.status_code = status_code
+
+    @classmethod
+    def parse(cls, line):
+        """
+        Parses a CDXJ line, eg:
+        com,example)/ 20100424190000 {"url": "http://example.com/", ...}
+        or a CDX line, eg:
+        com,example)/ 20100424190000 http://example.com/ text/html 200 ...
+        :param line: (bytes) The line, without the line break.
+        :return: (CDXRecord) The record.
+        """
+        surt, timestamp, rest = line.decode("utf-8").split(" ", 2)
+        if rest.startswith("{"):
+            fields = json.loads(rest)
+            original_uri = fields.get("url")
+            status = fields.get("status")
+        else:
+            fields = rest.split(" ")
+            original_uri = fields[CDX_ORIGINAL_FIELD - 2]
+            status = fields[CDX_STATUS_FIELD - 2] \
+                if len(fields) > CDX_STATUS_FIELD - 2 else None
+        status_code = int(status) if status and status.isdigit() else None
+        return cls(surt, from_archive_timestamp(timestamp), original_uri,
+                   status_code)
+
+
+class CDXFile(object):
+    """
+    A memory mapped, sorted CDX or CDXJ file, searched in place by binary
+    search over its lines, so that lookups do not depend on its size and
+    only the pages read are loaded.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: (str) The path of the file, sorted bytewise as by
+                     `LC_ALL=C sort`.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            self._map = b""
+        self.size = len(self._map)
+
+    def close(self):
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+    def _line_end(self, start):
+        end = self._map.find(b"\n", start)
+        return self.size if end < 0 else end
+
+    def bisect(self, key, lo=0, hi=None):
+        """
+        Returns the offset of the first line that is not less than key.
+        :param key: (bytes) The key, eg: b"com,example)/ 20100424190000"
+        :param lo: (int) The offset of the first line to search.
+        :param hi: (int)[optional] The offset of the line after the last
+                   line to search, the end of the file by default.
+        :return: (int) The offset, hi if every line is less than key.
+        """
+        if hi is None:
+            hi = self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._line_end(mid - 1) + 1 if mid else 0
+            if start >= hi:
+                hi = mid
+                continue
+            end = self._line_end(start)
+            # only as much of the line as the key is compared
+            if self._map[start:min(end, start + len(key))] < key:
+                lo = end + 1
+            else:
+                hi = mid
+        return min(lo, self.size)
+
+    def span(self, prefix):
+        """
+        :param prefix: (bytes) The prefix, eg: b"com,example)/ "
+        :return: (tuple) The offsets of the first line starting with prefix,
+                 and of the line after the last one. Equal if there are none.
+        """
+        lo = self.bisect(prefix)
+        # the first key after the prefix, as the prefix ends with a space
+        return lo, self.bisect(prefix[:-1] + b"!", lo)
+
+    def forward(self, offset, prefix):
+        """
+        Yields the records from offset on, while their lines start with
+        prefix.
+        :param offset: (int) The offset of a line.
+        :param prefix: (bytes) The prefix.
+        :return: (generator) The (offset, CDXRecord) of each line.
+        """
+        while offset < self.size:
+            end = self._line_end(offset)
+            line = self._map[offset:end]
+            if not line.startswith(prefix):
+                return
+            yield offset, CDXRecord.parse(line)
+            offset = end + 1
+
+    def backward(self, offset, prefix):
+        """
+        Yields the records before offset, last first, while their lines
+        start with prefix.
+        :param offset: (int) The offset of a line.
+        :param prefix: (bytes) The prefix.
+        :return: (generator) The (offset, CDXRecord) of each line.
+        """
+        while offset > 0:
+            end = offset
+            if self._map[offset - 1:offset] == b"\n":
+                end -= 1
+            start = self._map.rfind(b"\n", 0, end) + 1
+            line = self._map[start:end]
+            if not line.startswith(prefix):
+                return
+            yield start, CDXRecord.parse(line)
+            offset = start
+
+
+class CDXIndex(object):
+    """
+    Resolves mementos from local CDX or CDXJ indexes of an archive,
+    without any request. The files are memory mapped and binary searched
+    by SURT key and timestamp, so a lookup reads a few pages of even a
+    multi-GB index.
+
+    >>> index = CDXIndex(["/data/collection/index.cdxj"],
+    ...                  "http://localhost:8080/collection/")
+    >>> mc = MementoClient(index=index)
+
+    The URI-Ms are the replay uri followed by the timestamp and the original
+    uri, as in pywb and the Wayback Machine, eg:
+    http://localhost:8080/collection/20100424190000/http://example.com/
+
+    The SURT keys of the index must be made the same way as the keys of the
+    canonicalizer. By default, they are those of pywb and the Wayback
+    Machine.
+    """
+
+    def __init__(self, paths, replay_uri, canonicalizer=None):
+        """
+        :param paths: (str|list) The paths of the sorted index files. Their
+                      mementos are merged.
+        :param replay_uri: (str) The base uri the mementos are replayed
+                           from, eg: http://localhost:8080/collection/
+        :param canonicalizer: (Canonicalizer)[optional] Makes the SURT keys
+                              of the uris.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        self.replay_uri = replay_uri
+        self.canonicalizer = canonicalizer or Canonicalizer()
+        self.files = [CDXFile(path) for path in paths]
+        logger.debug("Mapped %d CDX files, %d bytes.", len(self.files),
+                     sum(f.size for f in self.files))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    @classmethod
+    def from_directory(cls, path, replay_uri, canonicalizer=None):
+        """
+        Opens every .cdx and .cdxj file of a directory.
+        :param path: (str) The directory.
+        :param replay_uri: (str) The base uri the mementos are replayed from.
+        :param canonicalizer: (Canonicalizer)[optional] Makes the SURT keys.
+        :return: (CDXIndex) The index.
+        """
+        paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if name.endswith((".cdx", ".cdxj")))
+        return cls(paths, replay_uri, canonicalizer)
+
+    def _prefix(self, uri):
+        return (self.canonicalizer.surt(uri) + " ").encode("utf-8")
+
+    def memento_uri(self, record):
+        """
+        :param record: (CDXRecord) A record of the index.
+        :return: (str) The URI-M of the record.
+        """
+        return "%s%s/%s" % (self.replay_uri,
+                            to_archive_timestamp(record.timestamp),
+                            record.original_uri)
+
+    def records(self, uri, start=None, end=None):
+        """
+        Returns the records of a uri, in chronological order.
+        :param uri: (str) The original uri.
+        :param start: (datetime)[optional] The earliest datetime.
+        :param end: (datetime)[optional] The latest datetime.
+        :return: (list) The CDXRecords.
+        """
+        prefix = self._prefix(uri)
+        first = prefix
+        if start is not None:
+            first += to_archive_timestamp(start).encode("ascii")
+        until = to_timestamp(end) if end is not None else None
+
+        records = []
+        for f in self.files:
+            for _, record in f.forward(f.bisect(first), prefix):
+                if until is not None and record.timestamp > until:
+                    break
+                records.append(record)
+        if len(self.files) > 1:
+            records.sort(key=lambda record: record.timestamp)
+        return records
+
+    def get_timemap(self, uri, start=None, end=None):
+        """
+        Returns the mementos of a uri.
+        :param uri: (str) The original uri.
+        :param start: (datetime)[optional] The earliest datetime.
+        :param end: (datetime)[optional] The latest datetime.
+        :return: (TimeMap) The mementos, empty if there are none.
+        """
+        timemap = TimeMap(uri, timegate_uri=self.replay_uri + uri)
+        for record in self.records(uri, start, end):
+            timemap.add(self.memento_uri(record), record.timestamp)
+        return timemap
+
+    def get_memento_info(self, uri, accept_datetime=None):
+        """
+        Returns the closest memento of a uri to a datetime, with the first,
+        last, previous and next mementos, in the form of
+        MementoClient.get_memento_info.
+        :param uri: (str) The original uri.
+        :param accept_datetime: (datetime)[optional] The datetime, the most
+                                recent memento by default.
+        :return: (dict) The mementos. Only the "original_uri" and
+                 "timegate_uri" keys if there are none.
+        """
+        memento_info = {"original_uri": uri,
+                        "timegate_uri": self.replay_uri + uri}
+        prefix = self._prefix(uri)
+        key = None
+        if accept_datetime is not None:
+            key = prefix + to_archive_timestamp(accept_datetime).encode("ascii")
+
+        first = last = None
+        # the records of the two distinct timestamps before and the two from
+        # the datetime in every file, which always hold the closest memento
+        # and its previous and next mementos
+        neighbours = {}
+        for f in self.files:
+            lo, hi = f.span(prefix)
+            if lo == hi:
+                continue
+            offset = f.bisect(key, lo, hi) if key else hi
+            for walk in (f.backward(offset, prefix),
+                         f.forward(offset, prefix)):
+                seen = set()
+                for _, record in walk:
+                    seen.add(record.timestamp)
+                    if len(seen) > 2:
+                        break
+                    neighbours.setdefault(record.timestamp, record)
+            for _, record in f.forward(lo, prefix):
+                if first is None or record.timestamp < first.timestamp:
+                    first = record
+                break
+            for _, record in f.backward(hi, prefix):
+                if last is None or record.timestamp > last.timestamp:
+                    last = record
+                break
+        if first is None:
+            return memento_info
+
+        if key:
+            timestamp = to_timestamp(accept_datetime)
+        else:
+            timestamp = last.timestamp
+        records = [neighbours[ts] for ts in sorted(neighbours)]
+
+        # the earlier of two equally close mementos, as in TimeMap.closest
+        i = min(range(len(records)), key=lambda i: (
+            abs(records[i].timestamp - timestamp), records[i].timestamp))
+        closest = records[i]
+
+        mementos = {"closest": {
+            "uri": [self.memento_uri(closest)],
+            "datetime": to_datetime(closest.timestamp),
+            "http_status_code": closest.status_code}}
+        for rel, record in (("first", first), ("last", last),
+                            ("prev", records[i - 1] if i else None),
+                            ("next", records[i + 1]
+                             if i + 1 < len(records) else None)):
+            if record is not None:
+                mementos[rel] = {"uri": [self.memento_uri(record)],
+                                 "datetime": to_datetime(record.timestamp)}
+        memento_info["mementos"] = mementos
+        return memento_info
@@ -0,0 +1,139 @@
+"""
+Columnar (NumPy / Arrow) results for the memento client.
+
+Requires numpy, and pyarrow for Arrow tables:
+    pip install memento_client[arrow]
+"""
+
+from array import array
+
+import numpy
+
+from .timemap import TIMESTAMP_TYPECODE, to_timestamp
+
+# the integer value of numpy's NaT, so that missing datetimes need no mask
+NAT = numpy.iinfo(numpy.int64).min
+
+RELS = ["closest", "first", "prev", "next", "last"]
+
+STRING_COLUMNS = ["request_uri", "original_uri", "timegate_uri", "error"] + \
+    [rel + "_uri" for rel in RELS]
+DATETIME_COLUMNS = [rel + "_datetime" for rel in RELS]
+
+
+class MementoInfoColumns(object):
+    """
+    Flattens get_memento_info results into columns, a row at a time, so
+    that a batch keeps no result once its row is set. Each lookup still
+    builds its own result, so this is a more convenient form for analysis
+    rather than a faster lookup. Datetimes are kept as seconds
+    since the epoch in packed arrays, which NumPy views as datetime64[s];
+    the string columns are copied into object arrays.
+    """
+
+    def __init__(self, size):
+        """
+        :param size: (int) The number of rows.
+        """
+        self.size = size
+        self.strings = dict((name, [None] * size) for name in STRING_COLUMNS)
+        self.datetimes = dict(
+            (name, array(TIMESTAMP_TYPECODE, [NAT]) * size)
+            for name in DATETIME_COLUMNS)
+        # 0 when there is no closest memento
+        self.status_codes = array("h", [0]) * size
+
+    def set(self, row, request_uri, memento_info):
+        """
+        Sets a row from a get_memento_info result.
+        :param row: (int) The row.
+        :param request_uri: (str) The requested uri.
+        :param memento_info: (dict|Exception) The result of get_memento_info,
+                             or the exception it raised.
+        """
+        self.strings["request_uri"][row] = request_uri
+
+        if isinstance(memento_info, Exception):
+            self.strings["error"][row] = repr(memento_info)
+            return
+
+        self.strings["original_uri"][row] = memento_info.get("original_uri")
+        self.strings["timegate_uri"][row] = memento_info.get("timegate_uri")
+
+        mementos = memento_info.get("mementos") or {}
+        for rel in RELS:
+            memento = mementos.get(rel)
+            if not memento:
+                continue
+            self.strings[rel + "_uri"][row] = memento.get("uri")[0]
+            if memento.get("datetime"):
+                self.datetimes[rel + "_datetime"][row] = \
+                    to_timestamp(memento.get("datetime"))
+
+        if mementos.get("closest"):
+            self.status_codes[row] = \
+                mementos["closest"].get("http_status_code") or 0
+
+    def to_numpy(self):
+        """
+        :return: (dict) A map of the column names to NumPy arrays.
+        """
+        columns = dict((name, numpy.array(values, dtype=object))
+                       for name, values in self.strings.items())
+        for name, values in self.datetimes.items():
+            columns[name] = _datetime64(values)
+        columns["closest_http_status_code"] = \
+            numpy.frombuffer(self.status_codes, dtype=numpy.int16)
+        return columns
+
+    def to_arrow(self):
+        """
+        :return: (pyarrow.Table) The columns as an Arrow table.
+        """
+        import pyarrow
+
+        columns = self.to_numpy()
+        names = STRING_COLUMNS + DATETIME_COLUMNS + ["closest_http_status_code"]
+        arrays = []
+        for name in names:
+            if name in self.datetimes:
+                arrays.append(pyarrow.array(columns[name], from_pandas=True))
+            elif name in self.strings:
+                arrays.append(pyarrow.array(self.strings[name],
+                                            type=pyarrow.string()))
+            else:
+                arrays.append(pyarrow.array(columns[name]))
+        return pyarrow.Table.from_arrays(arrays, names=names)
+
+
+def _datetime64(timestamps):
+    return numpy.frombuffer(timestamps, dtype=numpy.int64).\
+        view("datetime64[s]")
+
+
+def timemap_to_numpy(timemap):
+    """
+    Returns the mementos of a TimeMap as NumPy arrays. The datetime column
+    is a view on the packed timestamps of the TimeMap, not a copy, so no
+    mementos can be added to the TimeMap while the view is in use.
+    :param timemap: (TimeMap) The TimeMap.
+    :return: (dict) {"uri": array of str, "datetime": array of datetime64[s]}
+    """
+    return {"uri": numpy.array([timemap.uri(i) for i in range(len(timemap))],
+                               dtype=object),
+            "datetime": _datetime64(timemap.timestamps)}
+
+
+def timemap_to_arrow(timemap):
+    """
+    Returns the mementos of a TimeMap as an Arrow table.
+    :param timemap: (TimeMap) The TimeMap.
+    :return: (pyarrow.Table) A table with uri and datetime columns.
+    """
+    import pyarrow
+
+    columns = timemap_to_numpy(timemap)
+    return pyarrow.Table.from_arrays(
+        [pyarrow.array(columns["uri"], type=pyarrow.string()),
+         pyarrow.array(columns["datetime"])],
+        names=["uri", "datetime"])
@@ -0,0 +1,303 @@
+"""
+A parallel Memento compliance scanner for archives, with a machine readable
+report that the archive router can be seeded from.
+
+    $ python -m memento_client.compliance --output report.json
+
+"""
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from .dnscache import mount
+from .memento_client import MementoClient, MementoClientException, \
+    MementoResponse
+
+# Python 2.7 and 3.X support are different for urlparse and queue
+if sys.version_info[0] == 3:
+    from urllib.parse import urljoin
+    import queue
+else:
+    from urlparse import urljoin
+    import Queue as queue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROBE_URIS = ("http://www.cnn.com/",)
+DEFAULT_PROBE_DATETIME = datetime(2010, 4, 24, 19)
+DEFAULT_SAMPLES = 3
+DEFAULT_WORKERS = 10
+
+# the compliance of a TimeGate, from best to worst
+COMPLIANT = "compliant"
+PARTIAL = "partial"
+NON_COMPLIANT = "non_compliant"
+NO_DATA = "no_data"
+UNREACHABLE = "unreachable"
+
+# the memento rels sampled from the Link header of a TimeGate
+SAMPLE_RELS = ("first", "last", "prev", "next")
+
+
+class ComplianceScanner(object):
+    """
+    Checks, concurrently, the TimeGates of many archives, and a sample of
+    the mementos they redirect to, with MementoClient.is_timegate and
+    MementoClient.is_memento, and classifies each TimeGate as:
+        compliant       every TimeGate and memento response is compliant
+        partial         some are
+        non_compliant   none are
+        no_data         the TimeGate has no mementos of the probe uris
+        unreachable     the TimeGate could not be reached at all
+
+    A TimeGate answering a probe with a 4xx, eg: a 404 for a uri it has no
+    mementos of, but with a Vary: accept-datetime header, has no data for
+    that probe rather than failing it: the probe is not counted.
+
+    >>> scanner = ComplianceScanner(workers=20)
+    >>> report = scanner.scan(utils.get_archive_list())
+
+    The entry of each TimeGate holds the statistics of ArchiveRouter, so
+    that a router can be seeded from a report:
+    >>> router.load_stats(report["timegates"])
+    """
+
+    def __init__(self, probe_uris=DEFAULT_PROBE_URIS,
+                 accept_datetime=DEFAULT_PROBE_DATETIME,
+                 samples=DEFAULT_SAMPLES,
+                 workers=DEFAULT_WORKERS,
+                 timeout=None,
+                 session_factory=None):
+        """
+        :param probe_uris: (list) The URI-Rs each TimeGate is asked for.
+        :param accept_datetime: (datetime) The accept datetime of the probes.
+        :param samples: (int) The most mementos checked per probe.
+        :param workers: (int) The number of TimeGates checked at once.
+        :param timeout: (int) the timeout value for the HTTP connections.
+        :param session_factory: (callable)[optional] Creates the session of
+                                each worker.
+        """
+        self.probe_uris = list(probe_uris)
+        self.accept_datetime = MementoClient.convert_to_http_datetime(
+            accept_datetime)
+        self.samples = samples
+        self.workers = workers
+        self.timeout = timeout
+        self.session_factory = session_factory or \
+            (lambda: mount(requests.Session()))
+
+    def scan(self, archives):
+        """
+        Checks the TimeGates of archives.
+        :param archives: (dict|list) The output of utils.get_archive_list,
+                         or a list of TimeGate base uris.
+        :return: (dict) The report: {"generated": str, "accept_datetime":
+                 str, "probe_uris": list, "timegates": {timegate_uri: entry}}
+                 with the entries of check_timegate, and the archive "id",
+                 "name" and "memento_status" of the registry if given.
+        """
+        if isinstance(archives, dict):
+            archives = [dict(archive, id=archive_id)
+                        for archive_id, archive in sorted(archives.items())]
+        else:
+            archives = [{"timegate_uri": uri} for uri in archives]
+
+        pending = queue.Queue()
+        for archive in archives:
+            pending.put(archive)
+        entries = {}
+
+        def work():
+            session = self.session_factory()
+            try:
+                while True:
+                    try:
+                        archive = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    entry = self.check_timegate(archive["timegate_uri"],
+                                                session)
+                    for key in ("id", "name", "memento_status"):
+                        if key in archive:
+                            entry[key] = archive[key]
+                    entries[archive["timegate_uri"]] = entry
+            finally:
+                session.close()
+
+        threads = [threading.Thread(target=work)
+                   for _ in range(max(1, min(self.workers, len(archives))))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {"generated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "accept_datetime": self.accept_datetime,
+                "probe_uris": self.probe_uris,
+                "timegates": entries}
+
+    def check_timegate(self, timegate_uri, session):
+        """
+        Checks a TimeGate with every probe uri, and the mementos it
+        redirects to.
+        :param timegate_uri: (str) The TimeGate base uri.
+        :param session: (obj) the requests session object.
+        :return: (dict) {"compliance": str, "probes": list, and the
+                 ArchiveRouter statistics "requests": int, "errors": int,
+                 "latency": float, "error_rate": float}. latency is the
+                 mean of the TimeGate responses, None if there were none.
+                 The "compliant" of a probe the TimeGate has no data for
+                 is None.
+        """
+        probes = []
+        for probe_uri in self.probe_uris:
+            uri = timegate_uri + probe_uri
+            probe, response = self._probe("timegate", uri, session)
+            probes.append(probe)
+            if response is None:
+                continue
+            if 400 <= response.status_code < 500 and \
+                    "accept-datetime" in response.vary:
+                probe["compliant"] = None
+                continue
+            try:
+                probe["compliant"] = MementoClient.is_timegate(
+                    uri, accept_datetime=self.accept_datetime,
+                    response=response)
+            except MementoClientException:
+                probe["compliant"] = False
+
+            for memento_uri in self._sample(uri, response):
+                probe, response = self._probe("memento", memento_uri,
+                                              session)
+                if response is not None:
+                    probe["compliant"] = MementoClient.is_memento(
+                        memento_uri, response=response)
+                probes.append(probe)
+
+        timegate_probes = [p for p in probes if p["type"] == "timegate"]
+        latencies = [p["latency"] for p in timegate_probes
+                     if p["status_code"] is not None]
+        errors = sum(1 for p in timegate_probes if p["error"])
+        return {"compliance": self.classify(probes),
+                "probes": probes,
+                "requests": len(timegate_probes),
+                "errors": errors,
+                "latency": sum(latencies) / len(latencies)
+                if latencies else None,
+                "error_rate": float(errors) / len(timegate_probes)
+                if timegate_probes else 0.0}
+
+    @staticmethod
+    def classify(probes):
+        """
+        :param probes: (list) The probes of a TimeGate.
+        :return: (str) Its compliance.
+        """
+        timegate_probes = [p for p in probes if p["type"] == "timegate"]
+        if all(p["status_code"] is None for p in timegate_probes):
+            return UNREACHABLE
+        probes = [p for p in probes if p["compliant"] is not None]
+        if not probes:
+            return NO_DATA
+        if all(p["compliant"] for p in probes):
+            return COMPLIANT
+        if any(p["compliant"] for p in probes):
+            return PARTIAL
+        return NON_COMPLIANT
+
+    def _probe(self, probe_type, uri, session):
+        """
+        Makes a HEAD request, without following redirects.
+        :return: (tuple) The probe dict, and the MementoResponse or None if
+                 the request failed.
+        """
+        probe = {"type": probe_type,
+                 "uri": uri,
+                 "status_code": None,
+                 "latency": None,
+                 "compliant": False,
+                 "error": None}
+        start = time.time()
+        try:
+            response = MementoClient.request_head(
+                uri, accept_datetime=self.accept_datetime, session=session,
+                timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.debug("Probe of %s failed: %r", uri, e)
+            probe["latency"] = time.time() - start
+            probe["error"] = e.__class__.__name__
+            return probe, None
+
+        probe["latency"] = time.time() - start
+        probe["status_code"] = response.status_code
+        if response.status_code >= 500:
+            probe["error"] = "HTTP %d" % response.status_code
+        return probe, MementoResponse.wrap(response)
+
+    def _sample(self, uri, response):
+        """
+        :return: (list) The mementos to check from a TimeGate response: the
+                 one redirected to, and the first, last, prev and next links.
+        """
+        uris = []
+        location = response.headers.get("Location")
+        if location:
+            uris.append(urljoin(uri, location))
+
+        mementos = response.rels(SAMPLE_RELS)
+        for rel in SAMPLE_RELS:
+            if rel in mementos:
+                memento_uri = urljoin(uri, mementos[rel]["uri"])
+                if memento_uri not in uris:
+                    uris.append(memento_uri)
+        return uris[:self.samples]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Checks the Memento compliance of the TimeGates of the "
+                    "archive registry, or of the given TimeGates.")
+    parser.add_argument("timegate_uris", nargs="*")
+    parser.add_argument("--registry",
+                        help="the archive registry xml uri")
+    parser.add_argument("--probe-uri", action="append", dest="probe_uris")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--timeout", type=float)
+    parser.add_argument("--output", "-o",
+                        help="the report file, stdout by default")
+    args = parser.parse_args(argv)
+
+    archives = args.timegate_uris
+    if not archives:
+        from . import utils
+
+        if args.registry:
+            archives = utils.get_archive_list(args.registry)
+        else:
+            archives = utils.get_archive_list()
+
+    scanner = ComplianceScanner(
+        probe_uris=args.probe_uris or DEFAULT_PROBE_URIS,
+        samples=args.samples, workers=args.workers, timeout=args.timeout)
+    report = scanner.scan(archives)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+    return report
+
+
+if __name__ == "__main__":
+    main()
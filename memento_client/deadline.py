@@ -0,0 +1,46 @@
+"""
+Deadlines for the lookups of the memento client.
+
+"""
+
+import time
+
+
+class Deadline(object):
+    """
+    A time budget shared by all the requests of one lookup. Each request is
+    given the smaller of its own timeout and the time left, so the lookup
+    as a whole ends by the deadline.
+    >>> deadline = Deadline(2.0)
+    >>> deadline.timeout(9)
+    2.0
+    """
+
+    def __init__(self, seconds, clock=time.time):
+        """
+        :param seconds: (float) The seconds the lookup may take.
+        :param clock: (callable) Returns the current time in seconds.
+        """
+        self.seconds = seconds
+        self.clock = clock
+        self.expires = clock() + seconds
+
+    def remaining(self):
+        """
+        :return: (float) The seconds left, 0 once the deadline has passed.
+        """
+        return max(0.0, self.expires - self.clock())
+
+    def expired(self):
+        return self.clock() >= self.expires
+
+    def timeout(self, timeout=None):
+        """
+        :param timeout: (float)[optional] The timeout of the request.
+        :return: (float) The timeout for the request, at most the seconds
+                 left.
+        """
+        remaining = self.remaining()
+        if timeout:
+            return min(timeout, remaining)
+        return remaining
@@ -0,0 +1,216 @@
+"""
+An in-process DNS cache, and the requests transport adapter that uses it,
+for the memento client.
+
+"""
+
+import logging
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DNS_TTL = 300
+
+
+class DNSCache(object):
+    """
+    Caches the addresses of host names for ttl seconds, so that a host is
+    resolved once, rather than on every new connection. Thread safe.
+    """
+
+    def __init__(self, ttl=DEFAULT_DNS_TTL):
+        """
+        :param ttl: (int) The seconds an address is kept.
+        """
+        self.ttl = ttl
+        self._addresses = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port=80):
+        """
+        :param host: (str) The host name.
+        :param port: (int) The port, to pick an address that serves it.
+        :return: (str) The first IP address of the host.
+        :raises socket.gaierror: if the host does not resolve.
+        """
+        return self.addresses(host, port)[0]
+
+    def addresses(self, host, port=80):
+        """
+        :param host: (str) The host name.
+        :param port: (int) The port, to pick the addresses that serve it.
+        :return: (list) The IP addresses of the host, in the order of
+                 getaddrinfo, but for those preferred.
+        :raises socket.gaierror: if the host does not resolve.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._addresses.get(host)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+        # resolved outside the lock, as resolving can take seconds
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        addresses = []
+        for info in infos:
+            if info[4][0] not in addresses:
+                addresses.append(info[4][0])
+        with self._lock:
+            self._addresses[host] = (now + self.ttl, addresses)
+        logger.debug("Resolved %s to %s", host, addresses)
+        return addresses
+
+    def prefer(self, host, address):
+        """
+        Moves an address of a host first, eg: after failing to connect to the
+        addresses before it.
+        :param host: (str) The host name.
+        :param address: (str) The IP address.
+        """
+        with self._lock:
+            entry = self._addresses.get(host)
+            if entry is not None and address in entry[1]:
+                addresses = [address] + [a for a in entry[1] if a != address]
+                self._addresses[host] = (entry[0], addresses)
+
+    def invalidate(self, host):
+        """
+        Forgets the address of a host, eg: after failing to connect to it.
+        :param host: (str) The host name.
+        """
+        with self._lock:
+            self._addresses.pop(host, None)
+
+    def clear(self):
+        with self._lock:
+            self._addresses.clear()
+
+    def __contains__(self, host):
+        with self._lock:
+            entry = self._addresses.get(host)
+            return entry is not None and entry[0] > time.time()
+
+
+# the cache shared by every client of the process
+DNS_CACHE = DNSCache()
+
+
+class CachedDNSConnectionMixin(object):
+    """
+    Connects to the addresses of the host from the DNS cache, each in turn
+    until one accepts, like socket.create_connection does. Only the address
+    connected to changes, the host name is still used for the Host header,
+    SNI and certificate validation.
+    """
+
+    dns_cache = DNS_CACHE
+
+    def _new_conn(self):
+        # urllib3 1.26 and 2.x connect to _dns_host, and use host everywhere
+        # else. Older versions have no _dns_host, and connect without the
+        # cache.
+        name = getattr(self, "_dns_host", None)
+        if name is None:
+            return super(CachedDNSConnectionMixin, self)._new_conn()
+
+        addresses = self.dns_cache.addresses(name, self.port)
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    conn = super(CachedDNSConnectionMixin, self)._new_conn()
+                except Exception:
+                    if i == len(addresses) - 1:
+                        self.dns_cache.invalidate(name)
+                        raise
+                    logger.debug("Could not connect to %s at %s", name,
+                                 address)
+                    continue
+                if i:
+                    self.dns_cache.prefer(name, address)
+                return conn
+        finally:
+            self._dns_host = name
+
+
+class CachedDNSHTTPConnection(CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedDNSHTTPSConnection(CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+class CachedDNSPoolMixin(object):
+
+    def warm(self, connections=1, timeout=None):
+        """
+        Opens connections to the host of the pool, so that they are ready
+        in the pool for the next requests.
+        :param connections: (int) The number of connections to open, at
+                            most the size of the pool.
+        :param timeout: (int) the timeout value for the connections.
+        """
+        conns = [self._get_conn() for _ in range(min(connections,
+                                                     self.pool.maxsize))]
+        try:
+            for conn in conns:
+                if conn.sock is None:
+                    if timeout is not None:
+                        conn.timeout = timeout
+                    conn.connect()
+        finally:
+            for conn in conns:
+                self._put_conn(conn)
+
+
+class CachedDNSHTTPConnectionPool(CachedDNSPoolMixin, HTTPConnectionPool):
+    ConnectionCls = CachedDNSHTTPConnection
+
+
+class CachedDNSHTTPSConnectionPool(CachedDNSPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = CachedDNSHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """
+    A requests transport adapter whose connections resolve hosts with the
+    DNS cache, and that can open connections ahead of the first request.
+    >>> session = requests.Session()
+    >>> session.mount("http://", CachedDNSAdapter())
+    >>> session.mount("https://", CachedDNSAdapter())
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(CachedDNSAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CachedDNSHTTPConnectionPool,
+            "https": CachedDNSHTTPSConnectionPool}
+
+    def warm(self, uri, connections=1, timeout=None):
+        """
+        Resolves the host of a uri and opens pooled connections to it.
+        :param uri: (str) A uri on the host.
+        :param connections: (int) The number of connections to open.
+        :param timeout: (int) the timeout value for the connections.
+        """
+        pool = self.poolmanager.connection_from_url(uri)
+        pool.warm(connections, timeout=timeout)
+
+
+def mount(session):
+    """
+    Mounts the CachedDNSAdapter on a requests session, for http and https.
+    :param session: (requests.Session) The session.
+    :return: (requests.Session) The session.
+    """
+    adapter = CachedDNSAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
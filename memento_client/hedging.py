@@ -0,0 +1,212 @@
+"""
+Hedged TimeGate requests, to cut the tail latency of lookups.
+
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+# Python 2.7 and 3.X support are different for queue
+if sys.version_info[0] == 3:
+    import queue
+else:
+    import Queue as queue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_MAX_EXTRA = 0.1
+DEFAULT_INITIAL_DELAY = 1.0
+# the fewest primary latencies the delay is taken from, before that the
+# initial delay is used
+MIN_SAMPLES = 20
+
+
+def _close(response):
+    close = getattr(response, "close", None)
+    if close is not None:
+        close()
+
+
+class Hedger(object):
+    """
+    Sends the TimeGate request of a lookup to a secondary TimeGate, eg: a
+    mirror, when the primary TimeGate has not answered within a delay, and
+    takes whichever answer comes first. A server error response (5xx) is a
+    failure, like an exception: once hedged, it is only returned when both
+    requests fail.
+
+    The delay is fixed, or by default the observed 95th percentile latency
+    of the primary, so that only the slowest 5% of the requests are hedged.
+    The extra load is capped: at most max_extra hedged requests are sent per
+    lookup, eg: 0.1 for at most 10% more requests, allowing short bursts.
+
+    Requests cannot be aborted once sent, so the slower request is not
+    waited for, and is left to finish in the background, where its response
+    is closed. Both requests are in flight at once, so the client sends them
+    with a thread safe transport.
+
+    >>> hedger = Hedger("http://timetravel.mirror.example.org/timegate/")
+    >>> mc = MementoClient(hedger=hedger)
+    """
+
+    def __init__(self, timegate_uri, delay=None,
+                 percentile=DEFAULT_HEDGE_PERCENTILE,
+                 max_extra=DEFAULT_MAX_EXTRA,
+                 burst=5,
+                 initial_delay=DEFAULT_INITIAL_DELAY,
+                 window=1000):
+        """
+        :param timegate_uri: (str) The secondary TimeGate base uri.
+        :param delay: (float)[optional] The seconds to wait for the primary
+                      before hedging. By default the observed percentile.
+        :param percentile: (float) The percentile of the primary latency to
+                           wait for.
+        :param max_extra: (float) The hedged requests allowed per lookup.
+        :param burst: (int) The hedged requests that can be sent at once,
+                      when the budget has built up.
+        :param initial_delay: (float) The delay until enough primary
+                              latencies are known.
+        :param window: (int) The number of recent primary latencies kept.
+        """
+        self.timegate_uri = timegate_uri
+        self.fixed_delay = delay
+        self.percentile = percentile
+        self.max_extra = max_extra
+        self.burst = burst
+        self.initial_delay = initial_delay
+        self.lookups = 0
+        self.hedged = 0
+        self.secondary_wins = 0
+        self._latencies = deque(maxlen=window)
+        self._tokens = 1.0
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """
+        :return: (float) The seconds to wait for the primary.
+        """
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        with self._lock:
+            if len(self._latencies) < MIN_SAMPLES:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+        rank = int(len(latencies) * self.percentile / 100.0)
+        return latencies[min(rank, len(latencies) - 1)]
+
+    def record(self, latency):
+        """
+        Records the latency of a primary request.
+        :param latency: (float) The seconds the request took.
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def run(self, primary, secondary):
+        """
+        Runs primary(), and secondary() too if primary is slower than the
+        delay and the budget allows it.
+        :param primary: (callable) Makes the primary request.
+        :param secondary: (callable) Makes the secondary request.
+        :return: (tuple) The response, and True if it is the secondary's.
+                 When hedged, the first response that is not a server error,
+                 or if both fail, a server error response, the primary's
+                 first.
+        :raises: the error of the primary, or of both when hedged.
+        """
+        with self._lock:
+            self.lookups += 1
+            self._tokens = min(self.burst, self._tokens + self.max_extra)
+
+        results = queue.Queue()
+        race = {"over": False}
+        self._start(primary, results, False, race)
+        try:
+            return self._result(results.get(timeout=self.delay()))
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            hedge = self._tokens >= 1.0
+            if hedge:
+                self._tokens -= 1.0
+                self.hedged += 1
+        if not hedge:
+            return self._result(results.get())
+
+        logger.debug("Hedging to %s", self.timegate_uri)
+        self._start(secondary, results, True, race)
+        failed = []
+        while len(failed) < 2:
+            result = results.get()
+            if not self._failed(result):
+                self._end(race, results)
+                for response, _, _ in failed:
+                    _close(response)
+                if result[1]:
+                    with self._lock:
+                        self.secondary_wins += 1
+                return self._result(result)
+            failed.append(result)
+
+        # both failed: a server error response rather than an exception
+        failed.sort(key=lambda result: (result[2] is not None, result[1]))
+        _close(failed[1][0])
+        return self._result(failed[0])
+
+    @staticmethod
+    def _failed(result):
+        response, _, error = result
+        return error is not None or \
+            getattr(response, "status_code", 0) >= 500
+
+    @staticmethod
+    def _result(result):
+        response, is_secondary, error = result
+        if error is not None:
+            raise error
+        return response, is_secondary
+
+    def _end(self, race, results):
+        # the responses of the loser are closed, whether it has answered yet
+        # or answers later
+        with self._lock:
+            race["over"] = True
+            while True:
+                try:
+                    _close(results.get_nowait()[0])
+                except queue.Empty:
+                    break
+
+    def _start(self, call, results, is_secondary, race):
+        def attempt():
+            start = time.time()
+            try:
+                result = (call(), is_secondary, None)
+            except Exception as e:
+                result = (None, is_secondary, e)
+            with self._lock:
+                if race["over"]:
+                    _close(result[0])
+                else:
+                    results.put(result)
+            if not is_secondary:
+                self.record(time.time() - start)
+
+        thread = threading.Thread(target=attempt)
+        thread.daemon = True
+        thread.start()
+
+    def stats(self):
+        """
+        :return: (dict) The lookups, the hedged requests, the hedged requests
+                 answered first, and the current delay.
+        """
+        return {"lookups": self.lookups,
+                "hedged": self.hedged,
+                "secondary_wins": self.secondary_wins,
+                "delay": self.delay()}
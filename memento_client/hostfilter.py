@@ -0,0 +1,244 @@
+"""
+A compact pre-filter of the hosts that have captures, so that lookups for
+hosts no archive has captured need no request.
+
+"""
+
+import argparse
+import hashlib
+import logging
+import math
+import mmap
+import struct
+import sys
+import threading
+
+from .canonical import Canonicalizer
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MCHOSTS1"
+# the magic, the number of bits, the number of hashes and of hosts added
+HEADER = struct.Struct("<8sQIQ")
+DEFAULT_ERROR_RATE = 0.01
+
+
+class HostFilter(object):
+    """
+    A Bloom filter of the hosts that have captures, by the host part of
+    their SURT key, eg: "com,example" for http://www.example.com/page.
+
+    A host that was added is always found, while a host that was not is
+    found at most at the error rate, so a host missing from the filter
+    surely has no captures, and its lookups can be answered at once:
+    >>> hosts = HostFilter.from_cdx(["/data/index.cdxj"])
+    >>> "http://example.com/" in hosts
+    True
+
+    The lookups of the client are only answered from the filter if it is
+    authoritative, that is it was made from the captures of every archive
+    the TimeGate answers from. A filter of the CDX of one archive is not,
+    when the TimeGate aggregates others.
+
+    The filter can be saved, and is memory mapped when loaded, so that even
+    filters of hundreds of millions of hosts are ready at once:
+    >>> hosts.save("/data/hosts.bloom")
+    >>> hosts = HostFilter.load("/data/hosts.bloom", authoritative=True)
+    >>> mc = MementoClient(host_filter=hosts)
+    """
+
+    def __init__(self, capacity, error_rate=DEFAULT_ERROR_RATE,
+                 canonicalizer=None, authoritative=False):
+        """
+        :param capacity: (int) The number of hosts the filter is sized for.
+                         The error rate grows beyond it.
+        :param error_rate: (float) The rate of the hosts that were not added
+                           that are found.
+        :param canonicalizer: (Canonicalizer)[optional] Makes the SURT keys,
+                              it must be the one the CDX keys were made with.
+        :param authoritative: (bool) The hosts are those of every archive the
+                              TimeGate answers from, so that the lookups of
+                              other hosts are answered without a request.
+        """
+        capacity = max(1, capacity)
+        num_bits = int(math.ceil(-capacity * math.log(error_rate) /
+                                 math.log(2) ** 2))
+        num_hashes = max(1, int(round(num_bits / float(capacity) *
+                                      math.log(2))))
+        self._init(num_bits, num_hashes, bytearray((num_bits + 7) // 8),
+                   0, 0, canonicalizer, authoritative)
+
+    def _init(self, num_bits, num_hashes, bits, offset, count, canonicalizer,
+              authoritative):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.count = count
+        self.canonicalizer = canonicalizer or Canonicalizer()
+        self.authoritative = authoritative
+        self._bits = bits
+        self._offset = offset
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+        :return: (int) The number of hosts added, with duplicates.
+        """
+        return self.count
+
+    def __contains__(self, uri):
+        return self.contains_host(self.host_key(uri))
+
+    def host_key(self, uri):
+        """
+        :param uri: (str) An http(s) uri.
+        :return: (str) The host part of its SURT key, eg: com,example
+        """
+        return self.canonicalizer.surt(uri).partition(")")[0]
+
+    def _positions(self, host):
+        digest = hashlib.md5(host.encode("utf-8")).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def contains_host(self, host):
+        """
+        :param host: (str) The host part of a SURT key, eg: com,example
+        :return: (bool) False if the host was surely never added.
+        """
+        bits = self._bits
+        offset = self._offset
+        for position in self._positions(host):
+            if not bits[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, uri):
+        """
+        Adds the host of a uri.
+        :param uri: (str) An http(s) uri.
+        """
+        self.add_host(self.host_key(uri))
+
+    def add_host(self, host):
+        """
+        :param host: (str) The host part of a SURT key, eg: com,example
+        """
+        positions = list(self._positions(host))
+        with self._lock:
+            for position in positions:
+                self._bits[self._offset + (position >> 3)] |= \
+                    1 << (position & 7)
+            self.count += 1
+
+    @classmethod
+    def from_cdx(cls, paths, error_rate=DEFAULT_ERROR_RATE, capacity=None,
+                 canonicalizer=None, authoritative=False):
+        """
+        Creates a filter of the hosts of CDX or CDXJ files.
+        :param paths: (list) The paths of the files.
+        :param error_rate: (float) The error rate.
+        :param capacity: (int)[optional] The number of hosts to size the
+                         filter for. By default the distinct hosts are
+                         counted first, which holds them in memory.
+        :param canonicalizer: (Canonicalizer)[optional] The canonicalizer
+                              the CDX keys were made with.
+        :param authoritative: (bool) The files hold the captures of every
+                              archive the TimeGate answers from.
+        :return: (HostFilter) The filter.
+        """
+        if capacity is None:
+            hosts = set(_iter_cdx_hosts(paths))
+            host_filter = cls(len(hosts), error_rate, canonicalizer,
+                              authoritative)
+        else:
+            hosts = _iter_cdx_hosts(paths)
+            host_filter = cls(capacity, error_rate, canonicalizer,
+                              authoritative)
+        for host in hosts:
+            host_filter.add_host(host)
+        logger.debug("Added %d hosts to a filter of %d bits.",
+                     host_filter.count, host_filter.num_bits)
+        return host_filter
+
+    def save(self, path):
+        """
+        Writes the filter to a file.
+        :param path: (str) The path of the file.
+        """
+        with self._lock:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, self.num_bits, self.num_hashes,
+                                    self.count))
+                f.write(self._bits[self._offset:])
+
+    @classmethod
+    def load(cls, path, canonicalizer=None, authoritative=False):
+        """
+        Memory maps a filter written by save. Hosts added to it afterwards
+        are only kept in memory, until it is saved again.
+        :param path: (str) The path of the file.
+        :param canonicalizer: (Canonicalizer)[optional] The canonicalizer
+                              the filter was made with.
+        :param authoritative: (bool) The filter holds the hosts of every
+                              archive the TimeGate answers from.
+        :return: (HostFilter) The filter.
+        """
+        with open(path, "rb") as f:
+            magic, num_bits, num_hashes, count = HEADER.unpack(
+                f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError("%s is not a host filter." % path)
+            # indexing an mmap gives characters, not numbers, in Python 2.7
+            if sys.version_info[0] == 3:
+                bits = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            else:
+                f.seek(0)
+                bits = bytearray(f.read())
+        if len(bits) < HEADER.size + (num_bits + 7) // 8:
+            raise ValueError("%s is truncated." % path)
+
+        host_filter = cls.__new__(cls)
+        host_filter._init(num_bits, num_hashes, bits, HEADER.size, count,
+                          canonicalizer, authoritative)
+        return host_filter
+
+
+def _iter_cdx_hosts(paths):
+    """
+    Yields the host of every line of CDX or CDXJ files, once per run of
+    lines of the same host.
+    """
+    for path in paths:
+        previous = None
+        with open(path, "rb") as f:
+            for line in f:
+                # header and metadata lines
+                if line.startswith((b" ", b"!")):
+                    continue
+                host = line.partition(b")")[0]
+                if host != previous:
+                    previous = host
+                    yield host.decode("utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Creates a filter of the hosts of CDX or CDXJ files.")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--output", "-o", required=True)
+    parser.add_argument("--error-rate", type=float,
+                        default=DEFAULT_ERROR_RATE)
+    parser.add_argument("--capacity", type=int,
+                        help="the number of hosts, counted by default")
+    args = parser.parse_args(argv)
+
+    host_filter = HostFilter.from_cdx(args.paths, args.error_rate,
+                                      args.capacity)
+    host_filter.save(args.output)
+    print("%d hosts, %d bytes" % (len(host_filter),
+                                  (host_filter.num_bits + 7) // 8))
+
+
+if __name__ == "__main__":
+    main()
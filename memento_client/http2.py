@@ -0,0 +1,150 @@
+"""
+An HTTP/2 transport for the memento client, built on httpx.
+
+Requires httpx with HTTP/2 support:
+    $ pip install memento_client[http2]
+
+"""
+
+from datetime import timedelta
+
+import httpx
+import requests
+
+DEFAULT_MAX_CONNECTIONS = 20
+
+
+class HTTP2Response(object):
+    """
+    Wraps an httpx response with the attributes of a requests response
+    that the memento client uses.
+    """
+
+    def __init__(self, response, history=None):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.request = response.request
+        self.http_version = response.http_version
+        self.history = history if history is not None else \
+            [HTTP2Response(res, []) for res in response.history]
+
+    @property
+    def elapsed(self):
+        # only known once a streamed response is read
+        try:
+            return self._response.elapsed
+        except RuntimeError:
+            return timedelta(0)
+
+    @property
+    def encoding(self):
+        return self._response.encoding
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    @property
+    def text(self):
+        self._response.read()
+        return self._response.text
+
+    def iter_content(self, chunk_size=1):
+        try:
+            for chunk in self._response.iter_bytes(chunk_size):
+                yield chunk
+        finally:
+            self._response.close()
+
+    def close(self):
+        self._response.close()
+
+    def __repr__(self):
+        return "<HTTP2Response [%d] %s>" % (self.status_code,
+                                            self.http_version)
+
+
+class HTTP2Session(object):
+    """
+    A session with the head, get and close methods of a requests session,
+    that sends requests over HTTP/2. Concurrent requests to a host share
+    one multiplexed connection, rather than a connection each, so that
+    many threads can share a session.
+
+    HTTP/2 is negotiated with TLS ALPN, so https servers without HTTP/2,
+    and all http servers, are answered with HTTP/1.1.
+
+    Errors are raised as the matching requests exceptions.
+    """
+
+    thread_safe = True
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_redirects=30, verify=True):
+        """
+        :param max_connections: (int) The maximum number of connections in
+                                the pool, for all hosts.
+        :param max_redirects: (int) the maximum number of redirects followed.
+        :param verify: (bool) Toggle TLS certificate verification.
+        """
+        self.client = httpx.Client(
+            http2=True,
+            verify=verify,
+            max_redirects=max_redirects,
+            limits=httpx.Limits(max_connections=max_connections))
+
+    def head(self, uri, headers=None, allow_redirects=False, timeout=None):
+        return self.request("HEAD", uri, headers=headers,
+                            allow_redirects=allow_redirects, timeout=timeout)
+
+    def get(self, uri, headers=None, allow_redirects=True, timeout=None,
+            stream=False):
+        return self.request("GET", uri, headers=headers,
+                            allow_redirects=allow_redirects, timeout=timeout,
+                            stream=stream)
+
+    def request(self, method, uri, headers=None, allow_redirects=True,
+                timeout=None, stream=False):
+        """
+        Sends a request.
+        :param method: (str) The HTTP method.
+        :param uri: (str) The uri.
+        :param headers: (dict)[optional] The request headers.
+        :param allow_redirects: (bool) Toggle to follow redirects.
+        :param timeout: (int) the timeout for the connection and the reads.
+        :param stream: (bool) Do not read the body before returning, the
+                       body is read with iter_content.
+        :return: (HTTP2Response) The response.
+        """
+        try:
+            request = self.client.build_request(method, uri, headers=headers,
+                                                timeout=timeout)
+            response = self.client.send(request, stream=stream,
+                                        follow_redirects=allow_redirects)
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(e)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(e)
+        except httpx.TooManyRedirects as e:
+            raise requests.exceptions.TooManyRedirects(e)
+        except (httpx.ConnectError, httpx.NetworkError,
+                httpx.RemoteProtocolError) as e:
+            raise requests.exceptions.ConnectionError(e)
+        except httpx.UnsupportedProtocol as e:
+            raise requests.exceptions.InvalidSchema(e)
+        except (httpx.InvalidURL, httpx.LocalProtocolError) as e:
+            raise requests.exceptions.InvalidURL(e)
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(e)
+        return HTTP2Response(response)
+
+    def close(self):
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,140 @@
+"""
+An incremental parser for link-format TimeMaps and Link headers.
+
+"""
+
+import codecs
+import re
+
+# the text of one link up to the comma that ends it, skipping the commas
+# inside the <uri> and inside quoted parameter values.
+LINK_END = re.compile(r'(?:<[^>]*>|"(?:[^"\\]|\\.)*"|[^<",])*,')
+LINK_URI = re.compile(r'\s*<([^>]*)>\s*')
+LINK_PARAM = re.compile(
+    r';\s*([^\s=;,]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^\s;,"]*)\s*')
+
+
+class LinkParser(object):
+    """
+    A push parser for link-format, that is fed the body of a TimeMap in
+    chunks, as they arrive, and returns each link as soon as it is
+    complete. Only the link being parsed is kept in memory, so memory use
+    is bounded by the size of the largest single link, not of the TimeMap.
+
+    The links are returned as (uri, params) pairs, with the params in the
+    form of parse_link_header: {"rel": ["", ""], "datetime": [""]...}
+
+    >>> parser = LinkParser()
+    >>> parser.feed(b'<http://a.example.org/>; rel="orig')
+    []
+    >>> parser.feed(b'inal", <http://b.example.org/>; rel="timegate"')
+    [('http://a.example.org/', {'rel': ['original']})]
+    >>> parser.close()
+    [('http://b.example.org/', {'rel': ['timegate']})]
+    """
+
+    def __init__(self, encoding="utf-8"):
+        """
+        :param encoding: (str) The encoding of byte chunks.
+        """
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """
+        Parses a chunk of the link-format body.
+        :param chunk: (bytes|str) The next chunk.
+        :return: (list) The (uri, params) of the links completed by the
+                 chunk.
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        self._buffer += chunk
+
+        links = []
+        pos = 0
+        while True:
+            match = LINK_END.match(self._buffer, pos)
+            if not match:
+                break
+            links.append(parse_link(self._buffer[pos:match.end() - 1]))
+            pos = match.end()
+        self._buffer = self._buffer[pos:]
+        return links
+
+    def close(self):
+        """
+        Parses the rest of the body, once all the chunks have been fed.
+        :return: (list) The (uri, params) of the last link, if any.
+        """
+        self._buffer += self._decoder.decode(b"", final=True)
+        text, self._buffer = self._buffer, ""
+        if not text.strip():
+            return []
+        return [parse_link(text)]
+
+
+def parse_link(text):
+    """
+    Parses the text of a single link, eg:
+    <http://a.example.org/>; rel="memento"; datetime="..."
+    :param text: (str) The link.
+    :return: (tuple) (uri, {"rel": ["", ""], "datetime": [""]...})
+    """
+    match = LINK_URI.match(text)
+    if not match:
+        raise ValueError("Parsing Link Header: Expected <uri> in %s" %
+                         text.strip())
+
+    uri = match.group(1)
+    params = {}
+    pos = match.end()
+    while pos < len(text):
+        match = LINK_PARAM.match(text, pos)
+        if not match:
+            raise ValueError("Parsing Link Header: Invalid parameters in %s" %
+                             text.strip())
+        name, value = match.group(1), match.group(2)
+        if value.startswith('"'):
+            value = value[1:-1]
+        values = params.setdefault(name, [])
+        if name == "rel":
+            # rel types are case insensitive and space separated
+            values.extend(rel.lower() for rel in value.split())
+        elif value not in values:
+            values.append(value)
+        pos = match.end()
+    return uri, params
+
+
+def iter_links(chunks, encoding="utf-8"):
+    """
+    Parses link-format from an iterable of chunks, eg:
+    response.iter_content(chunk_size=65536)
+    :param chunks: (iterable) The chunks of bytes or str.
+    :param encoding: (str) The encoding of byte chunks.
+    :return: (generator) The (uri, params) of each link.
+    """
+    parser = LinkParser(encoding)
+    for chunk in chunks:
+        for link in parser.feed(chunk):
+            yield link
+    for link in parser.close():
+        yield link
+
+
+def find_link(header, uri):
+    """
+    Parses only the link of a uri in a Link header, without parsing the
+    rest of the header.
+    :param header: (str) The Link header.
+    :param uri: (str) The uri of the link.
+    :return: (dict) The params of the link, in the form of parse_link, or
+             None if the header has no link for the uri.
+    """
+    start = header.find("<%s>" % uri) if header else -1
+    if start < 0:
+        return
+    match = LINK_END.match(header, start)
+    end = match.end() - 1 if match else len(header)
+    return parse_link(header[start:end])[1]
@@ -0,0 +1,284 @@
+"""
+A load driver for the memento client, that measures throughput and latency
+percentiles of lookups against an archive, by default a local simulator.
+
+    $ python -m memento_client.loadtest --mode sync --requests 2000 \\
+        --concurrency 50 --latency 0.2 --link-padding 1000
+
+The client has no async API, so the sync and batch APIs are measured, and
+either can be run over HTTP/2 with --http2.
+
+A run can be recorded to a cassette, and replayed later without any
+network, at the recorded timing or any speed:
+
+    $ python -m memento_client.loadtest --record run.cassette
+    $ python -m memento_client.loadtest --replay run.cassette --speed 1
+"""
+
+import argparse
+import math
+import sys
+import threading
+import time
+from datetime import datetime
+
+from .cassette import Cassette
+from .memento_client import MementoClient
+from .simulator import add_arguments, from_arguments, start_simulator
+
+# Python 2.7 and 3.X support are different for queue
+if sys.version_info[0] == 3:
+    import queue
+else:
+    import Queue as queue
+
+MODES = ("sync", "batch", "timemap", "closest")
+
+
+def percentile(values, pct):
+    """
+    :param values: (list) The sorted values.
+    :param pct: (float) The percentile, between 0 and 100.
+    :return: (float) The nearest rank percentile, or None if there are no
+             values.
+    """
+    if not values:
+        return None
+    rank = int(math.ceil(pct / 100.0 * len(values))) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+class LoadResult(object):
+    """
+    The measurements of a load test run.
+    """
+
+    def __init__(self, mode, latencies, errors, elapsed):
+        """
+        :param mode: (str) The API measured.
+        :param latencies: (list) The seconds of each call.
+        :param errors: (int) The number of failed calls.
+        :param elapsed: (float) The seconds of the whole run.
+        """
+        self.mode = mode
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def count(self):
+        return len(self.latencies)
+
+    @property
+    def throughput(self):
+        """
+        :return: (float) The calls per second.
+        """
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def p50(self):
+        return percentile(self.latencies, 50)
+
+    @property
+    def p99(self):
+        return percentile(self.latencies, 99)
+
+    def as_dict(self):
+        return {"mode": self.mode,
+                "count": self.count,
+                "errors": self.errors,
+                "elapsed": self.elapsed,
+                "throughput": self.throughput,
+                "p50": self.p50,
+                "p99": self.p99}
+
+    def __str__(self):
+        if not self.count:
+            return "%s: no calls" % self.mode
+        return ("%s: %d calls, %d errors in %.2fs, %.1f/s,"
+                " p50 %.1fms, p99 %.1fms") % (
+            self.mode, self.count, self.errors, self.elapsed,
+            self.throughput, self.p50 * 1000, self.p99 * 1000)
+
+
+def run_load(call, items, concurrency=1, mode="call"):
+    """
+    Calls call(worker, item) for every item from concurrent threads, and
+    measures the latency of each call.
+    :param call: (callable) Makes one call. An exception counts as an error.
+    :param items: (list) The arguments of the calls.
+    :param concurrency: (int) The number of threads.
+    :param mode: (str) The name of the run.
+    :return: (LoadResult) The measurements.
+    """
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                break
+            start = time.time()
+            try:
+                call(item)
+                failed = False
+            except Exception:
+                failed = True
+            latency = time.time() - start
+            with lock:
+                latencies.append(latency)
+                errors[0] += failed
+
+    start = time.time()
+    threads = [threading.Thread(target=work)
+               for _ in range(max(1, min(concurrency, len(items))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return LoadResult(mode, latencies, errors[0], time.time() - start)
+
+
+def run_client_load(client, uris, mode="sync", concurrency=1, batch_size=100,
+                    accept_datetime=None, timeout=None):
+    """
+    Measures an API of the client.
+    :param client: (MementoClient) The client. Concurrent sync calls use a
+                   client each, configured like this one.
+    :param uris: (list) The URI-Rs to look up.
+    :param mode: (str) "sync" for get_memento_info, "batch" for
+                 get_memento_info_batch, "timemap" for get_timemap, or
+                 "closest" for resolve_closest.
+    :param concurrency: (int) The number of concurrent calls. In batch
+                        mode, the workers of each batch.
+    :param batch_size: (int) The uris per batch in batch mode.
+    :param accept_datetime: (datetime)[optional] The accept datetime.
+    :param timeout: (int) the timeout value for the HTTP connections.
+    :return: (LoadResult) The measurements. In batch mode, the latencies
+             are of whole batches.
+    """
+    if mode not in MODES:
+        raise ValueError("mode must be one of %s." % ", ".join(MODES))
+    accept_datetime = accept_datetime or datetime(2010, 4, 24, 19)
+
+    if mode == "batch":
+        def call(batch):
+            results = client.get_memento_info_batch(
+                batch, accept_datetime, timeout=timeout, workers=concurrency)
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        batches = [uris[i:i + batch_size]
+                   for i in range(0, len(uris), batch_size)]
+        return run_load(call, batches, concurrency=1, mode=mode)
+
+    local = threading.local()
+
+    def worker():
+        if concurrency <= 1:
+            return client
+        if not hasattr(local, "client"):
+            local.client = client.__class__(**client.worker_kwargs())
+        return local.client
+
+    if mode == "timemap":
+        def call(uri):
+            worker().get_timemap(uri, timeout=timeout)
+    elif mode == "closest":
+        def call(uri):
+            worker().resolve_closest(uri, accept_datetime, timeout=timeout)
+    else:
+        def call(uri):
+            worker().get_memento_info(uri, accept_datetime, timeout=timeout)
+    return run_load(call, uris, concurrency=concurrency, mode=mode)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load tests the memento client against a local archive "
+                    "simulator, or a given archive.")
+    parser.add_argument("--mode", choices=MODES, default="sync")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--unique", type=int, default=0,
+                        help="the number of distinct URI-Rs, all by default")
+    parser.add_argument("--http2", action="store_true")
+    parser.add_argument("--transport", choices=("pool", "requests"),
+                        help="the transport of the HEAD requests")
+    parser.add_argument("--check-native-timegate", action="store_true")
+    parser.add_argument("--timegate-uri",
+                        help="test this TimeGate instead of a simulator")
+    parser.add_argument("--record", metavar="CASSETTE",
+                        help="record the run to a cassette file")
+    parser.add_argument("--replay", metavar="CASSETTE",
+                        help="replay the run of a cassette file, without "
+                             "any network")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="the replay speed, 1 for the recorded timing, "
+                             "0 for no waiting")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        cassette = Cassette(args.replay, speed=args.speed)
+        kwargs = dict(cassette.meta["client"], cassette=cassette)
+        if args.transport:
+            kwargs["transport"] = args.transport
+        result = run_client_load(MementoClient(**kwargs),
+                                 cassette.meta["uris"],
+                                 mode=args.mode,
+                                 concurrency=args.concurrency,
+                                 batch_size=args.batch_size)
+        print(result)
+        return result
+
+    server = None
+    if args.timegate_uri:
+        timegate_uri = args.timegate_uri
+        timemap_uri = None
+        base = "http://www.example.org/"
+    else:
+        server = start_simulator(from_arguments(args))
+        base = server.base_uri + "origin/"
+        timegate_uri = server.base_uri + "timegate/"
+        timemap_uri = server.base_uri + "timemap/link/"
+
+    unique = args.unique or args.requests
+    uris = [base + "page/%d" % (i % unique) for i in range(args.requests)]
+    kwargs = {"timegate_uri": timegate_uri, "http2": args.http2,
+              "check_native_timegate": args.check_native_timegate,
+              "transport": args.transport}
+    if timemap_uri:
+        kwargs["timemap_uri"] = timemap_uri
+    cassette = None
+    if args.record:
+        cassette = Cassette(args.record, record=True,
+                            meta={"client": dict(kwargs), "uris": uris})
+
+    try:
+        result = run_client_load(MementoClient(cassette=cassette, **kwargs),
+                                 uris,
+                                 mode=args.mode,
+                                 concurrency=args.concurrency,
+                                 batch_size=args.batch_size)
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+        if cassette is not None:
+            cassette.save()
+    print(result)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,23 @@ A Memento Client library.
 """
 
 import requests
+from collections import deque, namedtuple
 from datetime import datetime
 import sys
 import logging
 import os
+import time
+
+from .batch import run_lookups, DEFAULT_REORDER_WINDOW
+from .cache import MementoCache
+from .deadline import Deadline
+from .dnscache import CachedDNSAdapter, mount
+from .linkformat import find_link, iter_links
+from .prefetch import Prefetcher, DEFAULT_PREFETCH_WORKERS
+from .timemap import TimeMap, Thinner, to_datetime, to_timestamp
+from .trace import start_trace, NULL_TRACE
+from .transport import PoolTransport
+from .wayback import DEFAULT_REGISTRY, build_memento_uri, build_timegate_uri
 
 
 # Python 2.7 and 3.X support are different for urlparse
@@ -16,12 +29,18 @@ if sys.version_info[0] == 3:
 else:
     from urlparse import urlparse, urljoin
 
+logger = logging.getLogger(__name__)
+
+# only the loggers of the package are configured, not the root logger
 if os.environ.get('DEBUG_MEMENTO_CLIENT') == '1':
-    logging.basicConfig(level=logging.DEBUG)
+    logging.getLogger("memento_client").setLevel(logging.DEBUG)
+    logging.getLogger("memento_client").addHandler(logging.StreamHandler())
 
 DEFAULT_TIMEGATE_BASE_URI = "http://timetravel.mementoweb.org/timegate/"
+DEFAULT_TIMEMAP_BASE_URI = "http://timetravel.mementoweb.org/timemap/link/"
 HTTP_DT_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
 MAX_REDIRECTS = 30
+TIMEMAP_CHUNK_SIZE = 65536
 
 
 class MementoClientException(Exception):
@@ -34,6 +53,109 @@ class MementoClientException(Exception):
         self.data = data
 
 
+class MementoDeadlineExceeded(MementoClientException):
+    """
+    Raised when a lookup does not finish by its deadline. The data holds
+    what was found before the deadline, under "memento_info".
+    """
+
+
+class ClosestMemento(namedtuple("ClosestMemento", ["uri", "datetime",
+                                                   "original_uri",
+                                                   "timegate_uri"])):
+    """
+    The closest memento found by MementoClient.resolve_closest.
+    uri is the URI-M, datetime its memento datetime, or None if the
+    TimeGate did not give it.
+    """
+
+    __slots__ = ()
+
+
+class MementoResponse(object):
+    """
+    A response, with its Link, Vary and Memento-Datetime headers parsed the
+    first time they are used, and kept, so that the checks of a lookup
+    share one parse of each response. The responses of its history are
+    wrapped too. Everything else is read from the wrapped response.
+    >>> response = MementoResponse.wrap(session.head(uri))
+    >>> MementoClient.is_memento(uri, response=response)
+    """
+
+    def __init__(self, response):
+        """
+        :param response: (request's response obj) The response to wrap.
+        """
+        self.response = response
+        self._parsed = {}
+
+    @classmethod
+    def wrap(cls, response):
+        """
+        :param response: (request's response obj) A response, or None.
+        :return: (MementoResponse) The response wrapped, unless it is None
+                 or already wrapped.
+        """
+        if response is None or isinstance(response, cls):
+            return response
+        return cls(response)
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+    def __bool__(self):
+        return bool(self.response)
+
+    __nonzero__ = __bool__
+
+    def _memoize(self, name, parse):
+        if name not in self._parsed:
+            self._parsed[name] = parse()
+        return self._parsed[name]
+
+    @property
+    def links(self):
+        """
+        :return: (dict) The Link header, as parsed by parse_link_header, or
+                 None if there is none.
+        """
+        return self._memoize("links", lambda: MementoClient.parse_link_header(
+            self.response.headers.get("Link")))
+
+    @property
+    def vary(self):
+        """
+        :return: (frozenset) The lower cased header names of Vary.
+        """
+        return self._memoize("vary", lambda: frozenset(
+            name.strip().lower() for name in
+            self.response.headers.get("Vary", "").split(",")
+            if name.strip()))
+
+    @property
+    def memento_datetime(self):
+        """
+        :return: (datetime) The Memento-Datetime, or None.
+        """
+        return self._memoize(
+            "memento_datetime", lambda: MementoClient.convert_to_datetime(
+                self.response.headers.get("Memento-Datetime")))
+
+    @property
+    def history(self):
+        return self._memoize("history", lambda: [
+            MementoResponse.wrap(res) for res in
+            getattr(self.response, "history", None) or []])
+
+    def rels(self, rel_types):
+        """
+        :param rel_types: (list) The rel types to find.
+        :return: (dict) {rel: {"uri": "", "datetime": }} of the Link header,
+                 in the form of get_uri_dt_for_rel, but never None.
+        """
+        return MementoClient.get_uri_dt_for_rel(self.links, rel_types) or {}
+
+
 class MementoClient(object):
     """
     A memento client.
@@ -43,7 +165,21 @@ class MementoClient(object):
                  timegate_uri=DEFAULT_TIMEGATE_BASE_URI,
                  check_native_timegate=True,
                  max_redirects=MAX_REDIRECTS,
-                 session=None):
+                 session=None,
+                 timemap_uri=DEFAULT_TIMEMAP_BASE_URI,
+                 cache=None,
+                 prefetch=0,
+                 prefetch_workers=DEFAULT_PREFETCH_WORKERS,
+                 router=None,
+                 canonicalizer=None,
+                 http2=False,
+                 hedger=None,
+                 negative_cache=None,
+                 index=None,
+                 host_filter=None,
+                 direct=None,
+                 transport=None,
+                 cassette=None):
         """
         A Memento Client that makes it straightforward to access the Web of the
          past as it is to access the current Web.
@@ -82,27 +218,163 @@ class MementoClient(object):
                             Must start with http(s):// and end with a /.
         :param max_redirects: (int) the maximum number of redirects allowed
                               for all HTTP requests to be made.
+        :param timemap_uri: (str) A valid HTTP base uri for link-format
+                            TimeMaps. Must start with http(s):// and end
+                            with a /.
+        :param cache: (MementoCache)[optional] A cache for the results of
+                      get_memento_info. The cache can be shared by many
+                      clients.
+        :param prefetch: (int) When set, the prev and next mementos of every
+                         lookup are resolved into the cache in the
+                         background, with at most this many lookups
+                         pending. A cache is created if none is given.
+        :param prefetch_workers: (int) The number of background threads
+                                 used for prefetching.
+        :param router: (ArchiveRouter)[optional] Routes each lookup to the
+                       TimeGate expected to answer fastest, instead of
+                       timegate_uri. The router can be shared by many
+                       clients.
+        :param canonicalizer: (Canonicalizer)[optional] Keys the cache,
+                              prefetching and batch deduplication on the
+                              canonical (SURT) form of the uris, so that eg:
+                              http://bbc.com and https://www.bbc.com/ are
+                              looked up once. The uris are still requested
+                              as given.
+        :param http2: (bool) Send the requests over HTTP/2, so that
+                      concurrent lookups to a host share a multiplexed
+                      connection. Falls back to HTTP/1.1 for servers without
+                      HTTP/2. Requires httpx[http2]. Ignored if a session is
+                      set.
+        :param hedger: (Hedger)[optional] Sends the TimeGate request to a
+                       secondary TimeGate as well, when the TimeGate is slow
+                       to answer. The hedger can be shared by many clients.
+                       Unless the transport is thread safe, eg: the pool
+                       transport, the hedged requests are sent with a pool
+                       transport of their own.
+        :param negative_cache: (NegativeCache)[optional] A cache for the
+                               uris the TimeGate has no mementos for, at any
+                               datetime. It can be shared by many clients.
+        :param index: (CDXIndex)[optional] Resolves the lookups and TimeMaps
+                      from local CDX or CDXJ indexes instead of the TimeGate
+                      and TimeMap uris, without any request.
+        :param host_filter: (HostFilter)[optional] The hosts that have
+                            captures. If it is authoritative, lookups of
+                            original uris of other hosts find no mementos
+                            without any request. The hosts of the mementos
+                            found are added to it.
+        :param direct: (str|bool)[optional] Look up the closest memento with
+                       a single request to a URI-M built from the Wayback
+                       template of an archive, which the archive redirects
+                       to its nearest capture, instead of asking the
+                       TimeGate. An archive id or template of the
+                       WaybackRegistry, or True for the archive of
+                       timegate_uri.
+        :param transport: (str|obj)[optional] What sends the HEAD requests
+                          of the lookups, and follows their redirects:
+                          "pool" for a PoolTransport, built directly on
+                          urllib3, "requests" for the requests session of the
+                          client, or an object with the head and close
+                          methods of a requests session. "pool" by default,
+                          and "requests" if a session is set or with http2.
+                          TimeMaps are always fetched with the session.
+        :param cassette: (Cassette)[optional] Records the requests and
+                         responses of the client to the cassette, or, if it
+                         is replaying, answers them from the cassette without
+                         any network. It can be shared by many clients.
         :return: A MementoClient obj.
         """
+        # what close relies on, set before anything can fail
+        self.session = None
+        self.sessionSetOutside = False
+        self.transport = None
+        self.transportSetOutside = False
+        self.hedgeTransport = None
+        self.prefetcher = None
+
         self.timegate_uri = timegate_uri
+        self.timemap_uri = timemap_uri
         self.check_native_timegate = check_native_timegate
         self.native_redirect_count = 0
         self.max_redirects = max_redirects
-        self.sessionSetOutside = False
+        self.cache = cache
+        self.router = router
+        self.canonicalizer = canonicalizer
+        self.http2 = http2
+        self.hedger = hedger
+        self.negative_cache = negative_cache
+        self.index = index
+        self.host_filter = host_filter
+        self.direct = direct
+        self.direct_template = None
+        self.cassette = cassette
+        if direct:
+            self.direct_template = DEFAULT_REGISTRY.template(
+                timegate_uri if direct is True else direct)
 
         if session:
             self.session = session
             self.sessionSetOutside = True
         else:
-            self.session = requests.Session()
+            self.session = self.create_session()
+
+        self.transportSetOutside = transport not in (None, "pool", "requests")
+        if self.transportSetOutside:
+            self.transport = transport
+        else:
+            self.transport = self.create_transport(transport)
+
+        if cassette is not None:
+            session = self.session
+            self.session = cassette.wrap(session)
+            self.transport = self.session if self.transport is session \
+                else cassette.wrap(self.transport)
+
+        # a hedged primary and its hedge are in flight at once, and the
+        # slower one finishes in the background, so they cannot share a
+        # requests session with the next lookup
+        if hedger is not None:
+            if getattr(self.transport, "thread_safe", False):
+                self.hedgeTransport = self.transport
+            else:
+                self.hedgeTransport = PoolTransport(
+                    max_redirects=self.max_redirects)
+                if cassette is not None:
+                    self.hedgeTransport = cassette.wrap(self.hedgeTransport)
+
+        if prefetch:
+            if self.cache is None:
+                self.cache = MementoCache()
+            self.prefetcher = Prefetcher(self.__class__,
+                                         self.worker_kwargs(),
+                                         budget=prefetch,
+                                         workers=prefetch_workers,
+                                         key=self.uri_key)
+
+    def close(self):
+        """
+        Closes the session and transport of the client, unless they were set
+        from outside, and stops prefetching.
+        """
+        if self.session is not None and not self.sessionSetOutside:
+            self.session.close()
+
+        if self.transport is not None and not self.transportSetOutside \
+                and self.transport is not self.session:
+            self.transport.close()
+
+        if self.hedgeTransport is not None \
+                and self.hedgeTransport is not self.transport:
+            self.hedgeTransport.close()
+
+        if self.prefetcher:
+            self.prefetcher.close()
 
     def __exit__(self, exc_type, exc_value, traceback):
         """
             Closes session connection if used in a with statement.
         """
 
-        if not self.sessionSetOutside:
-            self.session.close()
+        self.close()
 
     def __enter__(self):
         """
@@ -110,7 +382,7 @@ class MementoClient(object):
         """
 
         if not self.session:
-            self.session = requests.Session()
+            self.session = self.create_session()
 
         return self
 
@@ -119,12 +391,210 @@ class MementoClient(object):
             Closes session connection when called by garbage collector.
         """
 
-        if not self.sessionSetOutside:
-            self.session.close()
+        self.close()
+
+    def worker_kwargs(self):
+        """
+        Returns the arguments to create a client configured like this one,
+        for use in another thread. The cache is shared, the session is only
+        if it is thread safe, eg: over HTTP/2, and the transport only if it
+        was set from outside. Either is closed by its owner alone.
+        :return: (dict) The MementoClient arguments.
+        """
+        session = self.session
+        if self.cassette is not None:
+            session = session.session
+        transport = self.transport
+        if not self.transportSetOutside:
+            transport = "requests" if transport is self.session else "pool"
+        elif self.cassette is not None:
+            transport = transport.session
+        kwargs = {"timegate_uri": self.timegate_uri,
+                "check_native_timegate": self.check_native_timegate,
+                "max_redirects": self.max_redirects,
+                "timemap_uri": self.timemap_uri,
+                "cache": self.cache,
+                "router": self.router,
+                "canonicalizer": self.canonicalizer,
+                "http2": self.http2,
+                "hedger": self.hedger,
+                "negative_cache": self.negative_cache,
+                "index": self.index,
+                "host_filter": self.host_filter,
+                "direct": self.direct,
+                "transport": transport,
+                "cassette": self.cassette}
+        if getattr(session, "thread_safe", False):
+            kwargs["session"] = session
+        return kwargs
+
+    def create_session(self):
+        """
+        Creates the session of the client, when none is set from outside.
+        :return: A requests session using the DNS cache, or with http2 an
+                 HTTP2Session.
+        """
+        if self.http2:
+            from .http2 import HTTP2Session
+            return HTTP2Session(max_redirects=self.max_redirects)
+        return mount(requests.Session())
+
+    def create_transport(self, transport=None):
+        """
+        Creates the transport of the HEAD requests, when none is set from
+        outside.
+        :param transport: (str)[optional] "pool" or "requests".
+        :return: A PoolTransport, or the session of the client.
+        """
+        if transport is None:
+            transport = "requests" if self.sessionSetOutside or self.http2 \
+                else "pool"
+        if transport == "requests":
+            return self.session
+        return PoolTransport(max_redirects=self.max_redirects)
+
+    def uri_key(self, uri):
+        """
+        Returns the key of a uri for caching and deduplication.
+        :param uri: (str) The http uri.
+        :return: (str) The canonical form of the uri, or the uri itself if
+                 the client has no canonicalizer.
+        """
+        if self.canonicalizer is None:
+            return uri
+        return self.canonicalizer(uri)
+
+    def warm_up(self, uris=None, connections=1, timeout=None):
+        """
+        Resolves the hosts of the TimeGate, the TimeMap base and the given
+        archives, and opens connections to them, so that the first lookups
+        do not pay for DNS resolution and TLS handshakes.
+        The connections are opened in the transport of the lookups. Hosts are
+        resolved with an in-process DNS cache, that the transports and
+        sessions created by the client use for all their connections. With
+        other transports, eg: set from outside or over HTTP/2, a HEAD request
+        is made to each host instead.
+
+        eg:
+        >>> mc = MementoClient()
+        >>> mc.warm_up(["http://web.archive.org/", "https://archive.today/"])
+
+        :param uris: (list)[optional] Uris on the archive hosts to connect
+                     to, in addition to timegate_uri and timemap_uri.
+        :param connections: (int) The number of connections to open to each
+                            host.
+        :param timeout: (int) the timeout value for the HTTP connections.
+        :return: (dict) A map of each host uri to None, or to the exception
+                 raised while warming it up.
+        """
+        hosts = []
+        for uri in [self.timegate_uri, self.timemap_uri] + list(uris or []):
+            parts = urlparse(uri)
+            host = "%s://%s/" % (parts.scheme, parts.netloc)
+            if host not in hosts:
+                hosts.append(host)
+
+        errors = {}
+        for host in hosts:
+            try:
+                get_adapter = getattr(self.transport, "get_adapter", None)
+                adapter = get_adapter(host) if get_adapter else None
+                if isinstance(self.transport, PoolTransport):
+                    self.transport.warm(host, connections, timeout=timeout)
+                elif isinstance(adapter, CachedDNSAdapter):
+                    adapter.warm(host, connections, timeout=timeout)
+                else:
+                    self.transport.head(host, timeout=timeout or 9)
+                errors[host] = None
+            except Exception as e:
+                logger.warning("Warming up %s failed: %s", host, e)
+                errors[host] = e
+        return errors
+
+    def get_memento_info_batch(self, request_uris,
+                               accept_datetime=None,
+                               timeout=None,
+                               workers=1,
+                               columns=None,
+                               reorder_window=DEFAULT_REORDER_WINDOW):
+        """
+        Runs get_memento_info for a list of uris. Duplicate lookups, with
+        the same uri key (see uri_key) and accept datetime, are only made
+        once.
+
+        :param request_uris: (list) The input http uris.
+        :param accept_datetime: (datetime|list) The accept datetime for all
+                                the uris, or a list with one accept datetime
+                                per uri. The current datetime is used if none
+                                is provided.
+        :param timeout: (int) the timeout value for the HTTP connection.
+        :param workers: (int) The number of lookups to run concurrently.
+        :param columns: (str)[optional] "numpy" or "arrow", to return the
+                        results as columns instead of a list of dicts.
+                        Each result is flattened into the columns as its
+                        lookup completes, and not kept.
+                        Requires numpy (and pyarrow).
+        :param reorder_window: (int) The lookups are grouped by host, to
+                               reuse warm connections, reordering this many
+                               at a time. 0 runs them in the order of
+                               request_uris. The results are in the order of
+                               request_uris either way.
+        :return: (list) The results of get_memento_info, in the order of
+                 request_uris. A failed lookup holds the exception raised.
+                 With columns, a dict of NumPy arrays or an Arrow table with
+                 one row per uri.
+        """
+
+        if not accept_datetime:
+            accept_datetime = datetime.now()
+        if isinstance(accept_datetime, datetime):
+            accept_datetimes = [accept_datetime] * len(request_uris)
+        else:
+            accept_datetimes = list(accept_datetime)
+            if len(accept_datetimes) != len(request_uris):
+                raise ValueError("Expecting one accept_datetime per uri.")
+
+        lookups = list(zip(request_uris, accept_datetimes))
+        # the first lookup of each key is made on behalf of the others
+        unique = {}
+        unique_lookups = []
+        keys = []
+        for uri, dt in lookups:
+            key = (self.uri_key(uri), dt)
+            if key not in unique:
+                unique[key] = (uri, dt)
+                unique_lookups.append((uri, dt))
+            keys.append(key)
+        if not columns:
+            results = run_lookups(self, unique_lookups,
+                                  timeout=timeout, workers=workers,
+                                  window=reorder_window)
+            return [results[unique[key]] for key in keys]
+
+        from .columnar import MementoInfoColumns
+
+        # each result is written to the rows of its key as it completes,
+        # and dropped, rather than kept until the batch is done
+        rows = {}
+        for row, key in enumerate(keys):
+            rows.setdefault(unique[key], []).append(row)
+        table = MementoInfoColumns(len(lookups))
+
+        def on_result(lookup, result):
+            for row in rows.pop(lookup):
+                table.set(row, lookups[row][0], result)
+
+        run_lookups(self, unique_lookups, timeout=timeout, workers=workers,
+                    window=reorder_window, on_result=on_result)
+        if columns == "arrow":
+            return table.to_arrow()
+        return table.to_numpy()
 
     def get_memento_info(self, request_uri,
                          accept_datetime=None,
                          timeout=None,
+                         deadline=None,
+                         partial=False,
                          **kwargs):
         """
         Given an original uri and an accept datetime, this method queries the
@@ -139,10 +609,146 @@ class MementoClient(object):
                                 datetime. The current datetime is used if none
                                 is provided.
         :param timeout: (int) the timeout value for the HTTP connection.
+        :param deadline: (float)[optional] The seconds the whole lookup may
+                         take, over all its requests and redirects. Once
+                         spent, MementoDeadlineExceeded is raised.
+        :param partial: (bool) With a deadline, return what was found
+                        before the deadline instead of raising, eg: the
+                        original and TimeGate uris without the mementos.
+                        Partial results have "partial": True.
         :return: (dict) A map of uri and datetime for the
                  closest/prev/next/first/last mementos.
         """
 
+        trace = start_trace(request_uri, accept_datetime)
+        if deadline is not None:
+            deadline = Deadline(deadline)
+        progress = {"original_uri": request_uri}
+        try:
+            memento_info = self.__get_memento_info(request_uri,
+                                                   accept_datetime,
+                                                   timeout, trace, deadline,
+                                                   progress, **kwargs)
+        except MementoDeadlineExceeded as e:
+            trace.set("deadline_exceeded", True)
+            e.data["memento_info"] = progress
+            if not partial:
+                trace.emit(error=e)
+                raise
+            progress["partial"] = True
+            memento_info = progress
+        except Exception as e:
+            trace.emit(error=e)
+            raise
+        trace.emit(result=memento_info)
+        return memento_info
+
+    def resolve_closest(self, request_uri, accept_datetime=None,
+                        timeout=None, **kwargs):
+        """
+        Finds only the uri of the closest memento, with a single request to
+        the TimeGate, whose redirect is not followed. Unlike
+        get_memento_info, the request uri is taken to be the original uri,
+        no native TimeGate is looked for, the memento is not checked, and
+        of the Link header only the link of the memento is parsed. The
+        negative cache, host filter, router and hedger of the client are
+        used as in get_memento_info. The cache is only read: the result
+        lacks the other mementos of a get_memento_info result, so it is not
+        stored.
+
+        eg:
+        >>> mc.resolve_closest("http://www.cnn.com/", dt).uri
+        'http://web.archive.org/web/20100424190114/http://www.cnn.com/'
+
+        :param request_uri: (str) The original uri.
+        :param accept_datetime: (datetime) The accept datetime, the current
+                                datetime by default.
+        :param timeout: (int) the timeout value for the HTTP connection.
+        :return: (ClosestMemento) The closest memento, or None if there is
+                 none, eg: the TimeGate redirected to the original uri.
+        """
+        if not accept_datetime:
+            accept_datetime = datetime.now()
+
+        if self.index is not None or self.direct_template:
+            return self.__closest_memento(self.get_memento_info(
+                request_uri, accept_datetime, timeout=timeout))
+
+        http_acc_dt = MementoClient.convert_to_http_datetime(accept_datetime)
+        memento_info, _, negative_key = self.__find_known(
+            request_uri, http_acc_dt, NULL_TRACE)
+        if memento_info is not None:
+            return self.__closest_memento(memento_info)
+
+        timegate_base_uri = self.timegate_uri
+        if self.router:
+            timegate_base_uri = self.router.choose()
+        timegate_uri = timegate_base_uri + request_uri
+        response = kwargs.get("tg_response")
+        if not response:
+            response, timegate_uri = self.__request_timegate(
+                timegate_uri, timegate_base_uri, request_uri, True,
+                http_acc_dt, timeout, None, NULL_TRACE, {},
+                follow_redirects=False)
+
+        status_code = response.status_code
+        if status_code == 404:
+            if negative_key:
+                self.negative_cache.set(negative_key,
+                                        {"original_uri": request_uri,
+                                         "timegate_uri": timegate_uri})
+            return
+        if 299 < status_code < 400 and response.headers.get("Location"):
+            uri_m = urljoin(timegate_uri, response.headers.get("Location"))
+        elif status_code == 200 and "Memento-Datetime" in response.headers:
+            # 200 style negotiation, the TimeGate is the memento
+            uri_m = response.headers.get("Content-Location") or timegate_uri
+            uri_m = urljoin(timegate_uri, uri_m)
+        else:
+            raise MementoClientException(
+                ("The TimeGate (%s) returned with HTTP status %s and did not "
+                 "redirect to a Memento.") % (timegate_uri, str(status_code)),
+                {"timegate_uri": timegate_uri,
+                 "request_uri": request_uri,
+                 "status_code": str(status_code)})
+
+        link = find_link(response.headers.get("Link"), uri_m)
+        # redirected to the original resource, there is no memento
+        if link is not None and "original" in link.get("rel", []):
+            return
+        dt_m = response.headers.get("Memento-Datetime")
+        if not dt_m and link and link.get("datetime"):
+            dt_m = link["datetime"][0]
+
+        if negative_key:
+            self.negative_cache.delete(negative_key)
+        if self.host_filter is not None:
+            self.host_filter.add(request_uri)
+        return ClosestMemento(uri_m,
+                              to_datetime(to_timestamp(dt_m)) if dt_m
+                              else None,
+                              request_uri, timegate_uri)
+
+    @staticmethod
+    def __closest_memento(memento_info):
+        """
+        :return: (ClosestMemento) The closest memento of a memento info, or
+                 None if it has none.
+        """
+        closest = memento_info.get("mementos", {}).get("closest")
+        if not closest:
+            return
+        return ClosestMemento(closest["uri"][0], closest.get("datetime"),
+                              memento_info["original_uri"],
+                              memento_info["timegate_uri"])
+
+    def __get_memento_info(self, request_uri, accept_datetime, timeout,
+                           trace, deadline, progress, **kwargs):
+        """
+        The lookup of get_memento_info, recording its requests in the trace,
+        and what it found so far in progress.
+        """
+
         req_uri_response = kwargs.get("req_uri_response")  # for reading the headers of the req uri to find uri_r
         org_response = kwargs.get("org_response")  # for checking native tg uri in uri_r
         tg_response = kwargs.get("tg_response")
@@ -150,10 +756,6 @@ class MementoClient(object):
         if not accept_datetime:
             accept_datetime = datetime.now()
 
-        logging.debug("getting URI-R {0} at accept-datetime {1}!!!".
-                      format(request_uri, str(accept_datetime)))
-        logging.debug("Starting with URI-G stem: " + self.timegate_uri)
-
         assert request_uri and accept_datetime
         # if not request_uri or not accept_datetime:
         #     raise MementoClientException(
@@ -169,40 +771,74 @@ class MementoClient(object):
                             "datetime.")
 
         http_acc_dt = MementoClient.convert_to_http_datetime(accept_datetime)
+        trace.set("accept_datetime", http_acc_dt)
+
+        if self.index is not None:
+            trace.set("index", True)
+            return self.index.get_memento_info(request_uri, accept_datetime)
+
+        memento_info, cache_key, negative_key = self.__find_known(
+            request_uri, http_acc_dt, trace)
+        if memento_info is not None:
+            return memento_info
+
+        if self.direct_template:
+            memento_info = self.__get_direct_memento_info(
+                request_uri, accept_datetime, timeout, trace, deadline,
+                progress, tg_response)
+            if "mementos" not in memento_info:
+                status_code = memento_info.pop("status_code")
+                if negative_key and status_code == 404:
+                    self.negative_cache.set(negative_key, memento_info)
+                return memento_info
+            return self.__store_memento_info(request_uri, memento_info,
+                                             cache_key, negative_key)
 
         # finding the actual original_uri in case the input uri is a memento
-        original_uri = self.get_original_uri(request_uri, response=req_uri_response)
-        logging.debug("original uri: " + original_uri)
+        original_uri = self.get_original_uri(request_uri,
+                                             timeout=timeout,
+                                             response=req_uri_response,
+                                             trace=trace,
+                                             deadline=deadline)
+        trace.set("original_uri", original_uri)
+        progress["original_uri"] = original_uri
+
+        timegate_base_uri = self.timegate_uri
+        if self.router:
+            timegate_base_uri = self.router.choose()
+        # the TimeGate to fall back on if the deadline passes while looking
+        # for a native TimeGate
+        progress["timegate_uri"] = timegate_base_uri + original_uri
 
         native_tg = None
         if self.check_native_timegate:
             native_tg = self.get_native_timegate_uri(
-                original_uri, accept_datetime=accept_datetime, response=org_response)
-            logging.debug("Found native URI-G:  " + str(native_tg))
+                original_uri, accept_datetime=accept_datetime,
+                timeout=timeout, response=org_response, trace=trace,
+                deadline=deadline)
+            trace.set("native_timegate_uri", native_tg)
 
         timegate_uri = native_tg if native_tg \
-            else self.timegate_uri + original_uri
-
-        logging.debug("Using URI-G: " + timegate_uri)
+            else timegate_base_uri + original_uri
+        trace.set("timegate_uri", timegate_uri)
+        progress["timegate_uri"] = timegate_uri
 
         if not tg_response:
-            response = MementoClient.request_head(timegate_uri,
-                                                  accept_datetime=http_acc_dt,
-                                                  follow_redirects=True,
-                                                  session=self.session,
-                                                  timeout=timeout)
+            response, timegate_uri = self.__request_timegate(
+                timegate_uri, timegate_base_uri, original_uri,
+                not native_tg, http_acc_dt, timeout, deadline, trace,
+                progress)
         else:
             response = tg_response
 
-        logging.debug("request method:  " + str(response.request.method))
-        logging.debug("request URI:  " + str(response.request.url))
-        logging.debug("request headers: " + str(response.request.headers))
-        logging.debug("response status code: " + str(response.status_code))
-        logging.debug("response headers:  " + str(response.headers))
+        # the headers of each response are parsed once, for all the checks
+        response = MementoResponse.wrap(response)
+        trace.hop("timegate", response)
 
         uri_m = response.url
         dt_m = None
         link_header = None
+        links = None
         mem_status = response.status_code
 
         # checking if the timegate redirected. Its an error if not. 
@@ -221,18 +857,14 @@ class MementoClient(object):
                  "status_code": str(response.status_code)})
 
         # getting the memento datetime from the memento response headers
-        if self.is_memento(uri_m, response=response, session=self.session):
-            dt_m = self.convert_to_datetime(
-                response.headers.get("Memento-Datetime"))
-            # link_header = response.headers.get("Link")
+        if self.is_memento(uri_m, response=response, session=self.transport):
+            dt_m = response.memento_datetime
 
         # getting the next, prev, etc from the timegate reponse headers
         # so that these headers not locked in any one archive
         # when using the aggr.
         for res in response.history:
-            if self.is_timegate(timegate_uri, response=res, session=self.session):
-                logging.debug("found URI-M from timegate response: %s" % uri_m)
-                logging.debug("timegate uri: %s" % res.url)
+            if self.is_timegate(timegate_uri, response=res, session=self.transport):
 
                 # sometimes we get relative URI-Ms, which have no scheme
                 if not urlparse(uri_m).scheme:
@@ -240,7 +872,7 @@ class MementoClient(object):
                         + urlparse(timegate_uri).netloc + uri_m
 
                 link_header = res.headers.get("link")
-                logging.debug("link header:  " + str(link_header))
+                links = res.links
 
                 if not link_header:
                     raise MementoClientException(
@@ -257,14 +889,439 @@ class MementoClient(object):
         memento_info["timegate_uri"] = timegate_uri
 
         if not uri_m or not link_header:
+            if negative_key and mem_status == 404:
+                self.negative_cache.set(negative_key, memento_info)
             return memento_info
 
         memento_info.update(
             self.__prepare_memento_response(uri_m=uri_m, dt_m=dt_m,
                                             link_header=link_header,
-                                            status_code=mem_status))
+                                            status_code=mem_status,
+                                            links=links))
+        return self.__store_memento_info(request_uri, memento_info,
+                                         cache_key, negative_key)
+
+    def __find_known(self, request_uri, http_acc_dt, trace):
+        """
+        Answers a lookup without any request, from the cache, the negative
+        cache or the host filter.
+        :return: (tuple) The memento info, or None if a request is needed,
+                 and the cache and negative cache keys of the lookup.
+        """
+        # direct lookups are answered by the archive of the template
+        archive = self.direct_template or self.timegate_uri
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ("memento_info", self.uri_key(request_uri),
+                         http_acc_dt, archive)
+            memento_info = self.cache.get(cache_key)
+            if memento_info is not None:
+                trace.set("cache", True)
+                return memento_info, cache_key, None
+
+        # whether a uri has no mementos does not depend on the datetime
+        negative_key = None
+        if self.negative_cache is not None:
+            negative_key = ("no_mementos", self.uri_key(request_uri),
+                            archive)
+            memento_info = self.negative_cache.get(negative_key)
+            if memento_info is not None:
+                trace.set("negative_cache", True)
+                return memento_info, cache_key, negative_key
+
+        # the request uri is taken to be the original uri, as finding out
+        # if it is a memento takes a request
+        if self.host_filter is not None and self.host_filter.authoritative \
+                and request_uri not in self.host_filter:
+            trace.set("host_filter", True)
+            if self.direct_template:
+                timegate_uri = build_timegate_uri(self.direct_template,
+                                                  request_uri)
+            else:
+                timegate_uri = self.timegate_uri + request_uri
+            return ({"original_uri": request_uri,
+                     "timegate_uri": timegate_uri}, cache_key, negative_key)
+
+        return None, cache_key, negative_key
+
+    def __request_timegate(self, timegate_uri, timegate_base_uri,
+                           original_uri, routed, http_acc_dt, timeout,
+                           deadline, trace, progress, follow_redirects=True):
+        """
+        Sends the HEAD request of a lookup to the TimeGate, hedged if the
+        client has a hedger, and records its latency with the router.
+        :param routed: (bool) The TimeGate is the one of the router, or of
+                       the client, and not a native TimeGate.
+        :return: (tuple) The response, and the uri of the TimeGate that
+                 answered it.
+        """
+        def head(uri, transport=self.transport):
+            return MementoClient.request_head(
+                uri,
+                accept_datetime=http_acc_dt,
+                follow_redirects=follow_redirects,
+                session=transport,
+                timeout=timeout,
+                deadline=deadline,
+                max_redirects=self.max_redirects)
+
+        start = time.time()
+        hedged = False
+        try:
+            if self.hedger and routed:
+                hedge_uri = self.hedger.timegate_uri + original_uri
+                response, hedged = self.hedger.run(
+                    lambda: head(timegate_uri, self.hedgeTransport),
+                    lambda: head(hedge_uri, self.hedgeTransport))
+                if hedged:
+                    timegate_uri = hedge_uri
+                    trace.set("timegate_uri", timegate_uri)
+                    progress["timegate_uri"] = timegate_uri
+            else:
+                response = head(timegate_uri)
+        except requests.exceptions.RequestException:
+            if self.router and routed:
+                self.router.record(timegate_base_uri,
+                                   time.time() - start, error=True)
+            raise
+        except MementoDeadlineExceeded:
+            # not an error of the TimeGate, but it took at least this long
+            if self.router and routed:
+                self.router.record(timegate_base_uri,
+                                   time.time() - start)
+            raise
+        if self.router and routed:
+            # a hedged primary took at least this long
+            self.router.record(timegate_base_uri, time.time() - start,
+                               error=not hedged and
+                               response.status_code >= 500)
+        return response, timegate_uri
+
+    def __get_direct_memento_info(self, request_uri, accept_datetime,
+                                  timeout, trace, deadline, progress,
+                                  response=None):
+        """
+        Finds the closest memento with a request to the URI-M of the Wayback
+        template at the accept datetime, following the redirect of the
+        archive to its nearest capture. The request uri is taken to be the
+        original uri.
+        :return: (dict) The memento info, with the "status_code" of the
+                 archive if there is no memento.
+        """
+        timegate_uri = build_timegate_uri(self.direct_template, request_uri)
+        trace.set("timegate_uri", timegate_uri)
+        progress["timegate_uri"] = timegate_uri
+        memento_info = {"original_uri": request_uri,
+                        "timegate_uri": timegate_uri}
+
+        if not response:
+            uri = build_memento_uri(self.direct_template, request_uri,
+                                    accept_datetime)
+            response = MementoClient.request_head(
+                uri,
+                follow_redirects=True,
+                session=self.transport,
+                timeout=timeout,
+                deadline=deadline,
+                max_redirects=self.max_redirects)
+        response = MementoResponse.wrap(response)
+        trace.hop("memento", response)
+
+        dt_m = response.memento_datetime
+        if response.status_code >= 400 and response.status_code != 404:
+            raise MementoClientException(
+                "The archive (%s) returned with HTTP status %s." %
+                (response.url, str(response.status_code)),
+                {"timegate_uri": timegate_uri,
+                 "request_uri": request_uri,
+                 "memento_uri": response.url,
+                 "status_code": str(response.status_code)})
+        if not dt_m or response.status_code == 404:
+            memento_info["status_code"] = response.status_code
+            return memento_info
+
+        original = response.rels(["original"])
+        if original.get("original"):
+            memento_info["original_uri"] = original["original"]["uri"]
+
+        memento_info.update(
+            self.__prepare_memento_response(
+                uri_m=response.url, dt_m=dt_m,
+                link_header=response.headers.get("Link"),
+                status_code=response.status_code, links=response.links))
         return memento_info
 
+    def __store_memento_info(self, request_uri, memento_info, cache_key,
+                             negative_key):
+        """
+        Caches the mementos found by a lookup, and prefetches its
+        neighbours.
+        :return: (dict) The memento info.
+        """
+        if cache_key:
+            self.cache.set(cache_key, memento_info)
+        if negative_key:
+            self.negative_cache.delete(negative_key)
+        if self.host_filter is not None:
+            self.host_filter.add(memento_info["original_uri"])
+
+        if self.prefetcher:
+            for rel in ["prev", "next"]:
+                neighbour = memento_info["mementos"].get(rel)
+                if neighbour and neighbour.get("datetime"):
+                    self.prefetcher.submit(request_uri,
+                                           neighbour.get("datetime"))
+        return memento_info
+
+    def get_timemap(self, request_uri, timeout=None, **kwargs):
+        """
+        Retrieves the link-format TimeMap of an original uri from the
+        preferred TimeMap base uri and returns it as a compact TimeMap, with
+        the mementos in chronological order. The pages of a paged TimeMap
+        are followed.
+
+        :param request_uri: (str) The http uri of the original resource.
+        :param timeout: (int) the timeout value for the HTTP connection.
+        :return: (TimeMap) The mementos of the original resource. The
+                 TimeMap is empty if the archive has no mementos.
+        """
+
+        if self.index is not None:
+            return self.index.get_timemap(request_uri)
+
+        tm_response = kwargs.get("tm_response")
+        timemap_uri = self.timemap_uri + request_uri
+
+        if not tm_response:
+            tm_response = self.session.get(timemap_uri, timeout=timeout or 9,
+                                           stream=True)
+
+        timemap = TimeMap(request_uri, timemap_uri=timemap_uri)
+        self.__merge_timemap_response(timemap, tm_response, timeout=timeout)
+        logger.debug("Retrieved %d mementos from URI-T %s",
+                     len(timemap), timemap_uri)
+        return timemap
+
+    def sync_timemap(self, timemap, timeout=None, **kwargs):
+        """
+        Brings a TimeMap returned by get_timemap up to date, by adding the
+        mementos that are newer than its last memento, in place.
+        The TimeMap is requested conditionally, using the validators of the
+        previous response, so an unchanged TimeMap costs a 304. For paged
+        TimeMaps only the pages that may hold newer mementos are retrieved.
+
+        :param timemap: (TimeMap) The TimeMap to update.
+        :param timeout: (int) the timeout value for the HTTP connection.
+        :return: (int) The number of mementos added.
+        """
+
+        if self.index is not None:
+            start = to_datetime(timemap.timestamp(-1)) if len(timemap) \
+                else None
+            return timemap.merge(
+                self.index.get_timemap(timemap.original_uri, start=start))
+
+        tm_response = kwargs.get("tm_response")
+
+        if not tm_response:
+            headers = {}
+            if timemap.etag:
+                headers["If-None-Match"] = timemap.etag
+            if timemap.last_modified:
+                headers["If-Modified-Since"] = timemap.last_modified
+            tm_response = self.session.get(timemap.timemap_uri,
+                                           headers=headers,
+                                           timeout=timeout or 9,
+                                           stream=True)
+
+        if tm_response.status_code == 304:
+            logger.debug("URI-T %s not modified.", timemap.timemap_uri)
+            tm_response.close()
+            return 0
+
+        since = timemap.timestamp(-1) if len(timemap) else None
+        added = self.__merge_timemap_response(timemap, tm_response,
+                                              since=since, timeout=timeout)
+        logger.debug("Added %d mementos from URI-T %s",
+                     added, timemap.timemap_uri)
+        return added
+
+    def get_mementos_between(self, request_uri, start=None, end=None,
+                             thin=None, timeout=None, **kwargs):
+        """
+        Returns the mementos of an original uri with a datetime between
+        start and end, both inclusive, in chronological order. The mementos
+        are taken from the TimeMap, and are returned as its pages arrive,
+        so they are in the order of the pages if a paged TimeMap lists its
+        pages out of order.
+        Pages of a paged TimeMap that are outside the range are not
+        retrieved.
+
+        eg:
+        >>> for uri_m, dt in mc.get_mementos_between(
+        ...         "http://www.cnn.com/", datetime(2008, 1, 1),
+        ...         datetime(2012, 12, 31), thin="month"):
+        ...     print(uri_m)
+
+        :param request_uri: (str) The http uri of the original resource.
+        :param start: (datetime)[optional] The earliest datetime.
+        :param end: (datetime)[optional] The latest datetime.
+        :param thin: (str)[optional] One of "day", "month" or "year", to
+                     return only the first memento of each period.
+        :param timeout: (int) the timeout value for the HTTP connection.
+        :return: (generator) The (uri, datetime) of each memento.
+        """
+
+        if start is not None and end is not None and start > end:
+            raise ValueError("start must not be after end.")
+
+        # validated here, rather than on the first next() of the generator
+        return self.__iter_mementos_between(request_uri, start, end,
+                                            Thinner(thin), timeout,
+                                            kwargs.get("tm_response"))
+
+    def __iter_mementos_between(self, request_uri, start, end, thinner,
+                                timeout, tm_response):
+        if self.index is not None:
+            timemap = self.index.get_timemap(request_uri, start, end)
+            for i in range(len(timemap)):
+                if thinner.keep(timemap.timestamp(i)):
+                    yield timemap[i]
+            return
+
+        timemap_uri = self.timemap_uri + request_uri
+
+        if not tm_response:
+            tm_response = self.session.get(timemap_uri, timeout=timeout or 9,
+                                           stream=True)
+
+        since = to_timestamp(start) if start is not None else None
+        until = to_timestamp(end) if end is not None else None
+
+        # the mementos of each page in the range are yielded as the page
+        # arrives, whatever the order of the pages, once even if they overlap
+        timemap = TimeMap(request_uri, timemap_uri=timemap_uri)
+        seen = set()
+        for page in self.__iter_timemap_pages(timemap, tm_response,
+                                              since=since, until=until,
+                                              timeout=timeout):
+            window = page.between(start, end)
+            for i in range(len(window)):
+                memento = (window.timestamp(i), window.uri(i))
+                if memento in seen:
+                    continue
+                seen.add(memento)
+                if thinner.keep(memento[0]):
+                    yield window[i]
+
+    def __merge_timemap_response(self, timemap, tm_response, since=None,
+                                 timeout=None):
+        """
+        Merges the mementos of a TimeMap response, and of the TimeMap pages
+        it links to, into a TimeMap.
+        :param timemap: (TimeMap) The TimeMap to merge into.
+        :param tm_response: the response object of the URI-T.
+        :param since: (int) the timestamp of the last known memento. Pages
+                      that end before it are not retrieved, and only the
+                      mementos from it on are merged. Every memento of
+                      every page is merged if None.
+        :param timeout: (int) the timeout value for the HTTP connection.
+        :return: (int) The number of mementos added.
+        """
+        added = 0
+        for page in self.__iter_timemap_pages(timemap, tm_response,
+                                              since=since, timeout=timeout):
+            added += timemap.merge(page, newer_only=since is not None)
+        return added
+
+    def __iter_timemap_pages(self, timemap, tm_response, since=None,
+                             until=None, timeout=None):
+        """
+        Reads a TimeMap response, and retrieves the TimeMap pages it links
+        to.
+        :param timemap: (TimeMap) The TimeMap the response is for. Its
+                        validators are updated from the response.
+        :param tm_response: the response object of the URI-T.
+        :param since: (int) Pages that end before this timestamp are not
+                      retrieved.
+        :param until: (int) Pages that start after this timestamp are not
+                      retrieved.
+        :param timeout: (int) the timeout value for the HTTP connection.
+        :return: (generator) A TimeMap for the response and for each page.
+                 The (streamed) responses are closed once read.
+        """
+
+        try:
+            if tm_response.status_code == 404:
+                return
+
+            if tm_response.status_code != 200:
+                raise MementoClientException(
+                    "The TimeMap (%s) returned with HTTP status %s." %
+                    (timemap.timemap_uri, str(tm_response.status_code)),
+                    {"timemap_uri": timemap.timemap_uri,
+                     "original_uri": timemap.original_uri,
+                     "status_code": str(tm_response.status_code)})
+
+            timemap.etag = tm_response.headers.get("ETag")
+            timemap.last_modified = tm_response.headers.get("Last-Modified")
+
+            page, pages = self.__read_timemap(tm_response,
+                                              timemap.original_uri)
+        finally:
+            tm_response.close()
+        timemap.timegate_uri = page.timegate_uri or timemap.timegate_uri
+        yield page
+
+        for page_uri, params in pages:
+            if page_uri == timemap.timemap_uri:
+                continue
+            if since is not None and params.get("until") and \
+                    to_timestamp(params.get("until")[0]) < since:
+                logger.debug("Skipping URI-T page %s", page_uri)
+                continue
+            if until is not None and \
+                    to_timestamp(params.get("from")[0]) > until:
+                logger.debug("Skipping URI-T page %s", page_uri)
+                continue
+
+            page_response = self.session.get(page_uri, timeout=timeout or 9,
+                                             stream=True)
+            try:
+                if page_response.status_code != 200:
+                    logger.warning("URI-T page %s returned with HTTP status"
+                                   " %s, skipping it", page_uri,
+                                   page_response.status_code)
+                    continue
+                page, _ = self.__read_timemap(page_response,
+                                              timemap.original_uri)
+            finally:
+                page_response.close()
+            yield page
+
+    @staticmethod
+    def __read_timemap(tm_response, original_uri):
+        """
+        Parses a link-format TimeMap response as its body arrives, without
+        holding the whole body in memory.
+        :param tm_response: the (streamed) response object of the URI-T.
+        :param original_uri: (str) The URI-R.
+        :return: (tuple) The TimeMap of the response, and a list of the
+                 (uri, params) of the TimeMap pages it links to.
+        """
+        timemap = TimeMap(original_uri)
+        pages = []
+        chunks = tm_response.iter_content(chunk_size=TIMEMAP_CHUNK_SIZE)
+        for uri, params in iter_links(chunks, tm_response.encoding or "utf-8"):
+            if timemap.add_link(uri, params):
+                continue
+            rels = params.get("rel", [])
+            if "timemap" in rels and "self" not in rels \
+                    and params.get("from"):
+                pages.append((uri, params))
+        return timemap, pages
+
     def get_native_timegate_uri(self,
                                 original_uri,
                                 accept_datetime,
@@ -283,6 +1340,8 @@ class MementoClient(object):
         """
 
         org_response = kwargs.get("response")
+        trace = kwargs.get("trace", NULL_TRACE)
+        deadline = kwargs.get("deadline")
 
         if not org_response:
             try:
@@ -290,17 +1349,18 @@ class MementoClient(object):
                     original_uri,
                     accept_datetime=MementoClient.convert_to_http_datetime(
                         accept_datetime),
-                    session=self.session,
-                    timeout=timeout
+                    session=self.transport,
+                    timeout=timeout,
+                    deadline=deadline
                     )
             except (requests.exceptions.ConnectTimeout,
                     requests.exceptions.ConnectionError) as e:
-                logging.warning("Could not connect to URI {},"
-                            " returning no native URI-G".format(original_uri))
+                logger.warning("Could not connect to URI %s,"
+                               " returning no native URI-G", original_uri)
                 return
 
-            logging.debug("Request headers sent to search for URI-G:  " +
-                          str(org_response.request.headers))
+        org_response = MementoResponse.wrap(org_response)
+        trace.hop("native_timegate", org_response)
 
         def follow():
             """
@@ -310,47 +1370,33 @@ class MementoClient(object):
             if not location.startswith("http") \
                     and not location.startswith("//"):
                 location = urljoin(org_response.url, location)
-            logging.debug("Following to new URI of " +
-                          location)
             return self.get_native_timegate_uri(
-                location, accept_datetime)
+                location, accept_datetime, timeout=timeout, trace=trace,
+                deadline=deadline)
 
-        if org_response.headers.get("Vary") and\
-                'accept-datetime' in org_response.headers.get('Vary').lower():
-            logging.debug("Vary header with Accept-Datetime found for URI-R: "
-                          + original_uri)
+        if 'accept-datetime' in org_response.vary:
+            # a TimeGate, not an original resource
             return
 
         if 'Memento-Datetime' in org_response.headers:
-            logging.debug("Memento-Datetime found in headers for URI-R: {0},"
-                          " so assuming it is a URI-M.".
-                          format(original_uri))
+            # a URI-M, not an original resource
             return
 
         if 299 < org_response.status_code < 400 \
                 and self.native_redirect_count < self.max_redirects:
-            logging.debug("Been redirected from URI-R: " + original_uri)
             self.native_redirect_count += 1
             return follow()
 
         if "Link" not in org_response.headers:
-            logging.debug("No URI-G found for URI-R: " + original_uri)
             return
 
-        logging.debug("Received raw Link header:  " +
-                      str(org_response.headers.get("Link")))
-
-        link_header = self.parse_link_header(org_response.headers.get("Link"))
-        logging.debug("Received Link header:  " + str(link_header))
-        tg = self.get_uri_dt_for_rel(link_header, ["timegate"])
+        tg = org_response.rels(["timegate"])
 
         tg_uri = None
 
         if "timegate" in tg:
             tg_uri = tg["timegate"].get("uri")
 
-        logging.debug("Search for native URI-G yielded:  " + str(tg_uri))
-
         return tg_uri
 
     def get_original_uri(self, request_uri, timeout=None, **kwargs):
@@ -365,6 +1411,8 @@ class MementoClient(object):
         """
 
         response = kwargs.get("response")
+        trace = kwargs.get("trace", NULL_TRACE)
+        deadline = kwargs.get("deadline")
 
         if not response:
             try:
@@ -372,21 +1420,23 @@ class MementoClient(object):
                     request_uri,
                     accept_datetime=None,
                     follow_redirects=True,
-                    session=self.session,
-                    timeout=timeout
+                    session=self.transport,
+                    timeout=timeout,
+                    deadline=deadline,
+                    max_redirects=self.max_redirects
                 )
             except (requests.exceptions.ConnectTimeout,
                     requests.exceptions.ConnectionError) as e:
-                logging.warning(
-                    "Could not connect to {},"
-                    " using it as original URI".format(request_uri))
+                logger.warning("Could not connect to %s,"
+                               " using it as original URI", request_uri)
 
-        if response.headers.get("Link"):
-            link_header = response.headers.get("Link")
-            links = self.parse_link_header(link_header)
-            org = self.get_uri_dt_for_rel(links, ["original"])
+        response = MementoResponse.wrap(response)
+        trace.hop("original", response)
+
+        # no response if the request uri could not be reached
+        if response is not None and response.headers.get("Link"):
+            org = response.rels(["original"])
             if org.get("original"):
-                logging.debug("Org URI from request uri headers: " + repr(org))
                 return org.get("original").get("uri")
 
         return request_uri
@@ -416,6 +1466,7 @@ class MementoClient(object):
                 session=session,
                 timeout=timeout
             )
+        response = MementoResponse.wrap(response)
 
         if response.status_code != 302 and response.status_code != 200:
             raise MementoClientException(
@@ -429,12 +1480,9 @@ class MementoClient(object):
                  "timegate_uri": uri,
                  "accept_datetime": accept_datetime})
 
-        links = MementoClient.parse_link_header(response.headers.get("Link"))
-        original_uri = MementoClient.get_uri_dt_for_rel(links, ["original"])
+        original_uri = response.rels(["original"])
 
-        if response.headers.get("Vary") \
-                and "accept-datetime" in response.headers.get("Vary").lower() \
-                and original_uri:
+        if "accept-datetime" in response.vary and original_uri:
             if response.status_code == 302 and not response.headers.get("Location"):
                 return False
             elif response.status_code == 302 and response.headers.get("Memento-Datetime"):
@@ -469,19 +1517,15 @@ class MementoClient(object):
                 session=session,
                 timeout=timeout
             )
+        response = MementoResponse.wrap(response)
 
         if 'Memento-Datetime' in response.headers:
             if response.status_code == 302 and \
-              "accept-datetime" in response.headers.get("Vary", "").lower():
+              "accept-datetime" in response.vary:
                 return False
 
             if 'Link' in response.headers:
-                links = MementoClient.parse_link_header(response.headers.get("Link"))
-                rels = MementoClient.get_uri_dt_for_rel(links, ["original"])
-                if 'original' in rels:
-                    logging.debug("Memento-Datetime found in headers for"
-                                  " URI-R: {0}, so assuming it is a URI-M.".
-                                  format(uri))
+                if 'original' in response.rels(["original"]):
                     return True
         return False
 
@@ -543,14 +1587,15 @@ class MementoClient(object):
         if not link:
             return
         state = 'start'
-        data = list(link.strip())
+        # a deque, as characters are taken from the front
+        data = deque(link.strip())
         links = {}
 
         while data:
             if state == 'start':
-                dat = data.pop(0)
+                dat = data.popleft()
                 while dat.isspace():
-                    dat = data.pop(0)
+                    dat = data.popleft()
 
                 if dat != "<":
                     raise ValueError("Parsing Link Header: Expected < in "
@@ -559,28 +1604,28 @@ class MementoClient(object):
                 state = "uri"
             elif state == "uri":
                 uri = []
-                dat = data.pop(0)
+                dat = data.popleft()
 
                 while dat != ";":
                     uri.append(dat)
                     try:
-                        dat = data.pop(0)
+                        dat = data.popleft()
                     except:
                         raise ValueError("Error! Invalid Link Header.")
 
                 uri = ''.join(uri)
                 uri = uri[:-1]
-                data.insert(0, ';')
+                data.appendleft(';')
 
                 # Not an error to have the same URI multiple times (I think!)
                 if uri not in links:
                     links[uri] = {}
                 state = "paramstart"
             elif state == 'paramstart':
-                dat = data.pop(0)
+                dat = data.popleft()
 
                 while data and dat.isspace():
-                    dat = data.pop(0)
+                    dat = data.popleft()
                 if dat == ";":
                     state = 'linkparam'
                 elif dat == ',':
@@ -589,15 +1634,15 @@ class MementoClient(object):
                     raise ValueError("Parsing Link Header: Expected ;"
                                      " in paramstart, got %s" % dat)
             elif state == 'linkparam':
-                dat = data.pop(0)
+                dat = data.popleft()
                 while dat.isspace():
-                    dat = data.pop(0)
+                    dat = data.popleft()
                 param_type = []
                 while not dat.isspace() and dat != "=":
                     param_type.append(dat)
-                    dat = data.pop(0)
+                    dat = data.popleft()
                 while dat.isspace():
-                    dat = data.pop(0)
+                    dat = data.popleft()
                 if dat != "=":
                     raise ValueError("Parsing Link Header: Expected = in"
                                      " linkparam, got %s" % dat)
@@ -607,29 +1652,29 @@ class MementoClient(object):
                 if pt not in links[uri]:
                     links[uri][pt] = []
             elif state == 'linkvalue':
-                dat = data.pop(0)
+                dat = data.popleft()
                 while dat.isspace():
-                    dat = data.pop(0)
+                    dat = data.popleft()
                 param_value = []
                 if dat == '"':
                     pd = dat
-                    dat = data.pop(0)
+                    dat = data.popleft()
                     while dat != '"' and pd != '\\':
                         param_value.append(dat)
                         pd = dat
                         try:
-                            dat = data.pop(0)
+                            dat = data.popleft()
                         except:
                             raise ValueError("Error, invalid link header.")
                 else:
                     while not dat.isspace() and dat not in (',', ';'):
                         param_value.append(dat)
                         if data:
-                            dat = data.pop(0)
+                            dat = data.popleft()
                         else:
                             break
                     if data:
-                        data.insert(0, dat)
+                        data.appendleft(dat)
                 state = 'paramstart'
                 pv = ''.join(param_value)
                 if pt == 'rel':
@@ -646,7 +1691,9 @@ class MementoClient(object):
                      accept_datetime=None,
                      follow_redirects=False,
                      session=None,
-                     timeout=None):
+                     timeout=None,
+                     deadline=None,
+                     max_redirects=MAX_REDIRECTS):
         """
         Makes HEAD requests.
         :param uri: (str) the uri for the request.
@@ -656,6 +1703,11 @@ class MementoClient(object):
         :param session: (obj)[optional] the request session object to avoid opening
                         new connections for every request.
         :param timeout: (int) the timeout for the HTTP requests.
+        :param deadline: (Deadline)[optional] The deadline of the lookup.
+                         Redirects are then followed one at a time, each
+                         with the time left as its timeout.
+        :param max_redirects: (int) the maximum number of redirects followed
+                              with a deadline.
         :return: the response object.
         """
 
@@ -672,28 +1724,74 @@ class MementoClient(object):
         if not timeout:
             timeout = 9
 
-        response = session.head(uri,
-                                headers=headers,
-                                allow_redirects=follow_redirects,
-                                timeout=timeout)
+        try:
+            if deadline is None:
+                response = session.head(uri,
+                                        headers=headers,
+                                        allow_redirects=follow_redirects,
+                                        timeout=timeout)
+            else:
+                response = MementoClient.__head_by_deadline(
+                    uri, headers, follow_redirects, session, timeout,
+                    deadline, max_redirects)
+        finally:
+            if sessionSet:
+                session.close()
 
-        if sessionSet:
-            session.close()
+        return response
 
+    @staticmethod
+    def __head_by_deadline(uri, headers, follow_redirects, session, timeout,
+                           deadline, max_redirects):
+        """
+        Makes a HEAD request, following its redirects one by one, so that
+        no request can outlast the deadline.
+        """
+        history = []
+        while True:
+            if deadline.expired():
+                raise MementoDeadlineExceeded(
+                    "The deadline was exceeded before requesting %s." % uri,
+                    {"uri": uri})
+            try:
+                response = session.head(uri,
+                                        headers=headers,
+                                        allow_redirects=False,
+                                        timeout=deadline.timeout(timeout))
+            except requests.exceptions.Timeout:
+                if deadline.expired():
+                    raise MementoDeadlineExceeded(
+                        "The deadline was exceeded requesting %s." % uri,
+                        {"uri": uri})
+                raise
+
+            location = response.headers.get("Location")
+            if not follow_redirects or not location \
+                    or not 299 < response.status_code < 400:
+                break
+            if len(history) >= max_redirects:
+                raise requests.exceptions.TooManyRedirects(
+                    "Exceeded %d redirects." % max_redirects)
+            history.append(response)
+            uri = urljoin(response.url, location)
+
+        response.history = history
         return response
 
     def __prepare_memento_response(self, uri_m=None, dt_m=None,
-                                   link_header=None, status_code=None):
+                                   link_header=None, status_code=None,
+                                   links=None):
         """
         Prepares the response for the get_memento_info function.
         :param uri_m: (str) the memento uri
         :param dt_m: (datetime) the memento datetime
-        :param links: (str) the link header from the memento/timegate response
+        :param link_header: (str) the link header from the memento/timegate
+                            response
         :param status_code: (int) the http status code of the memento.
+        :param links: (dict)[optional] the link header, already parsed.
         :return: (dict) a map of the mementos found.
         """
 
-        logging.debug("Preparing memento response.")
         if not uri_m and not dt_m and not link_header and not status_code:
             return
 
@@ -704,23 +1802,18 @@ class MementoClient(object):
         memento_info["mementos"]["closest"]["uri"] = [uri_m]
         memento_info["mementos"]["closest"]["http_status_code"] = status_code
 
-        links = self.parse_link_header(link_header)
+        if links is None:
+            links = self.parse_link_header(link_header)
         mementos = self.get_uri_dt_for_rel(links,
                                            ["prev", "next", "first", "last"])
 
-        logging.debug("DT_M provided: %s" % dt_m)
-
         memento_info["mementos"]["closest"]["datetime"] = dt_m
-        logging.debug(links)
-        logging.debug(uri_m)
         if links and not dt_m and uri_m in links:
             if "datetime" in links.get(uri_m):
                 dt_m = self.convert_to_datetime(links.get(uri_m).
                                                 get("datetime")[0])
-                logging.debug("No dt_m found, looking in the link headers: %s" % dt_m)
                 memento_info["mementos"]["closest"]["datetime"] = dt_m
         elif isinstance(dt_m, str):
-            logging.debug("dt_m is a string, converting to datetime: %s" % dt_m)
             dt_m = self.convert_to_datetime(dt_m)
             memento_info["mementos"]["closest"]["datetime"] = dt_m
 
@@ -733,5 +1826,4 @@ class MementoClient(object):
                 "datetime": self.convert_to_datetime(mementos.get(mem).
                                                      get("datetime")[0])
             }
-        logging.debug("The full response: " + repr(memento_info))
         return memento_info
@@ -0,0 +1,116 @@
+"""
+Background prefetching of neighbouring mementos for the memento client.
+
+"""
+
+import logging
+import sys
+import threading
+
+# Python 2.7 and 3.X support are different for queue
+if sys.version_info[0] == 3:
+    import queue
+else:
+    import Queue as queue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFETCH_WORKERS = 2
+
+
+class Prefetcher(object):
+    """
+    Resolves lookups in background threads, so that their results are in
+    the (shared) cache of the clients by the time they are asked for.
+
+    At most `budget` lookups are pending at any time, further lookups are
+    dropped rather than queued. Each worker thread has its own client, as
+    requests sessions are not thread safe.
+    """
+
+    def __init__(self, client_class, client_kwargs, budget,
+                 workers=DEFAULT_PREFETCH_WORKERS, key=None):
+        """
+        :param client_class: (class) The client class of the workers.
+        :param client_kwargs: (dict) The arguments for the worker clients.
+                              These should include the shared cache.
+        :param budget: (int) The maximum number of pending lookups.
+        :param workers: (int) The number of worker threads.
+        :param key: (callable)[optional] Maps a uri to the key used to
+                    detect pending duplicates, eg: MementoClient.uri_key
+        """
+        self.client_class = client_class
+        self.client_kwargs = client_kwargs
+        self.budget = budget
+        self.dropped = 0
+        self.key = key
+        # the budget is kept by the pending set, so that close can always
+        # add the stop markers without waiting
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+        for _ in range(workers):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, request_uri, accept_datetime):
+        """
+        Schedules a get_memento_info lookup, unless it is already pending
+        or the budget is used up.
+        :param request_uri: (str) The http uri.
+        :param accept_datetime: (datetime) The accept datetime.
+        :return: (bool) True if the lookup was scheduled.
+        """
+        key = (self.key(request_uri) if self.key else request_uri,
+               accept_datetime)
+        with self._lock:
+            if key in self._pending or self._stop.is_set():
+                return False
+            if len(self._pending) >= self.budget:
+                self.dropped += 1
+                return False
+            self._queue.put_nowait((key, request_uri, accept_datetime))
+            self._pending.add(key)
+        return True
+
+    def join(self):
+        """
+        Blocks until all the pending lookups are resolved.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Stops the worker threads, without waiting for them. The lookups
+        being resolved are finished, the others are dropped.
+        """
+        self._stop.set()
+        for _ in self._threads:
+            self._queue.put_nowait(None)
+        self._threads = []
+
+    def _work(self):
+        client = self.client_class(**self.client_kwargs)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                if hasattr(client, "close"):
+                    client.close()
+                break
+            key, request_uri, accept_datetime = item
+            try:
+                if not self._stop.is_set():
+                    client.get_memento_info(request_uri, accept_datetime)
+            except Exception as e:
+                logger.debug("Prefetching %s at %s failed: %r",
+                             request_uri, accept_datetime, e)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                self._queue.task_done()
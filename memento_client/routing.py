@@ -0,0 +1,134 @@
+"""
+Latency aware routing of lookups between archive TimeGates.
+
+"""
+
+import random
+import threading
+
+DEFAULT_EXPLORATION = 0.1
+DEFAULT_DECAY = 0.2
+# the lowest success rate used when estimating the cost of a TimeGate, so
+# that a TimeGate that only failed so far is not ruled out forever.
+MIN_SUCCESS_RATE = 0.05
+
+
+class ArchiveRouter(object):
+    """
+    Keeps rolling latency and error statistics per TimeGate, from the
+    requests made by the clients using it, and routes each lookup to the
+    TimeGate expected to answer fastest.
+
+    The expected cost of a TimeGate is its moving average latency divided
+    by its moving average success rate. TimeGates without statistics are
+    tried first, and with probability `exploration` a random TimeGate is
+    chosen, so that the statistics of the others stay current.
+
+    >>> router = ArchiveRouter(["http://web.archive.org/web/",
+    ...                         "http://arquivo.pt/wayback/"])
+    >>> mc = MementoClient(router=router)
+    """
+
+    def __init__(self, timegate_uris, exploration=DEFAULT_EXPLORATION,
+                 decay=DEFAULT_DECAY, seed=None):
+        """
+        :param timegate_uris: (list) The TimeGate base uris to route between.
+        :param exploration: (float) The probability of choosing a random
+                            TimeGate instead of the fastest.
+        :param decay: (float) The weight of the newest request in the moving
+                      averages.
+        :param seed: [optional] A seed for the random choices.
+        """
+        if not timegate_uris:
+            raise ValueError("Expecting at least one TimeGate uri.")
+
+        self.exploration = exploration
+        self.decay = decay
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = dict((uri, {"requests": 0,
+                                  "errors": 0,
+                                  "latency": None,
+                                  "error_rate": 0.0})
+                           for uri in timegate_uris)
+
+    @classmethod
+    def from_archive_list(cls, archive_registry_uri=None, **kwargs):
+        """
+        Creates a router over the TimeGates of the Memento compliant
+        archives in the archive registry. Requires lxml.
+        :param archive_registry_uri: (str)[optional] The registry xml uri.
+        :return: (ArchiveRouter) The router.
+        """
+        from . import utils
+
+        if archive_registry_uri:
+            archives = utils.get_archive_list(archive_registry_uri)
+        else:
+            archives = utils.get_archive_list()
+        return cls([archive["timegate_uri"] for archive in archives.values()
+                    if archive["memento_status"]], **kwargs)
+
+    def choose(self):
+        """
+        Chooses the TimeGate for the next lookup.
+        :return: (str) The TimeGate base uri.
+        """
+        with self._lock:
+            uris = sorted(self._stats)
+            if self._random.random() < self.exploration:
+                return self._random.choice(uris)
+
+            untried = [uri for uri in uris
+                       if self._stats[uri]["latency"] is None]
+            if untried:
+                return self._random.choice(untried)
+            return min(uris, key=self._cost)
+
+    def _cost(self, uri):
+        stats = self._stats[uri]
+        return stats["latency"] / max(1.0 - stats["error_rate"],
+                                      MIN_SUCCESS_RATE)
+
+    def record(self, timegate_uri, elapsed, error=False):
+        """
+        Records the outcome of a request to a TimeGate.
+        :param timegate_uri: (str) The TimeGate base uri.
+        :param elapsed: (float) The seconds the request took.
+        :param error: (bool) True if the request failed.
+        """
+        with self._lock:
+            stats = self._stats.get(timegate_uri)
+            if stats is None:
+                return
+            stats["requests"] += 1
+            if error:
+                stats["errors"] += 1
+            if stats["latency"] is None:
+                stats["latency"] = elapsed
+            else:
+                stats["latency"] += self.decay * (elapsed - stats["latency"])
+            stats["error_rate"] += self.decay * \
+                ((1.0 if error else 0.0) - stats["error_rate"])
+
+    def load_stats(self, stats):
+        """
+        Seeds the statistics, eg: from a previous run.
+        :param stats: (dict) The output of stats().
+        """
+        with self._lock:
+            for uri, values in stats.items():
+                if uri in self._stats:
+                    self._stats[uri].update(
+                        (key, values[key]) for key in self._stats[uri]
+                        if key in values)
+
+    def stats(self):
+        """
+        Returns the current statistics of every TimeGate.
+        :return: (dict) {timegate_uri: {"requests": int, "errors": int,
+                 "latency": float, "error_rate": float}}
+        """
+        with self._lock:
+            return dict((uri, dict(stats))
+                        for uri, stats in self._stats.items())
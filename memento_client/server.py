@@ -0,0 +1,253 @@
+"""
+A caching TimeGate and TimeMap proxy server built on the memento client.
+
+Many services can point their timegate_uri at one proxy, so that the
+lookups of all of them are answered from one shared cache, and only the
+misses are forwarded upstream.
+
+    $ python -m memento_client.server --port 8080
+
+    $ curl -I -H "Accept-Datetime: Sat, 24 Apr 2010 19:00:00 GMT" \\
+        http://localhost:8080/timegate/http://lanl.gov
+"""
+
+import argparse
+import logging
+import sys
+import threading
+from wsgiref.simple_server import make_server, WSGIServer
+
+import requests
+
+from .cache import MementoCache, NegativeCache, DEFAULT_CACHE_SIZE, \
+    DEFAULT_CACHE_TTL, DEFAULT_NEGATIVE_TTL
+from .canonical import Canonicalizer
+from .memento_client import MementoClient, MementoClientException
+
+# Python 2.7 and 3.X support are different for socketserver
+if sys.version_info[0] == 3:
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit
+else:
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+TIMEGATE_PATH = "/timegate/"
+TIMEMAP_PATH = "/timemap/link/"
+
+HTTP_STATUS = {200: "200 OK",
+               302: "302 Found",
+               400: "400 Bad Request",
+               404: "404 Not Found",
+               502: "502 Bad Gateway",
+               504: "504 Gateway Timeout"}
+
+
+class MementoProxy(object):
+    """
+    A WSGI application that exposes RFC 7089 TimeGate and TimeMap endpoints:
+        /timegate/<URI-R>
+        /timemap/link/<URI-R>
+    The TimeGate is answered with get_memento_info, and the TimeMap with
+    get_timemap, of MementoClient objects sharing one cache.
+    """
+
+    def __init__(self, cache=None, negative_cache=None, **client_kwargs):
+        """
+        :param cache: (MementoCache)[optional] The shared cache. A new
+                      MementoCache is used by default.
+        :param negative_cache: (NegativeCache)[optional] The shared cache of
+                               the uris with no mementos. They are not
+                               cached without one.
+        :param client_kwargs: the arguments for the MementoClient objects
+                              that forward the misses upstream, eg:
+                              timegate_uri.
+        """
+        self.cache = cache if cache is not None else MementoCache()
+        self.negative_cache = negative_cache
+        client_kwargs["cache"] = self.cache
+        client_kwargs["negative_cache"] = negative_cache
+        self.client_kwargs = client_kwargs
+        # requests sessions are not thread safe, so each thread of the
+        # server gets its own client.
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        """
+        :return: (MementoClient) The client of the current thread.
+        """
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = MementoClient(**self.client_kwargs)
+            self._local.client = client
+        return client
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        uri_r = None
+        if path.startswith(TIMEGATE_PATH):
+            uri_r = path[len(TIMEGATE_PATH):]
+        elif path.startswith(TIMEMAP_PATH):
+            uri_r = path[len(TIMEMAP_PATH):]
+
+        if not uri_r:
+            return self.respond(start_response, 404)
+
+        if environ.get("QUERY_STRING"):
+            uri_r += "?" + environ.get("QUERY_STRING")
+
+        try:
+            parts = urlsplit(uri_r)
+            valid = parts.scheme in ("http", "https") and parts.hostname
+        except ValueError:
+            valid = False
+        if not valid:
+            return self.respond(start_response, 400,
+                                body="Not an http(s) URI-R: %s" % uri_r)
+
+        try:
+            if path.startswith(TIMEGATE_PATH):
+                return self.on_timegate(environ, start_response, uri_r)
+            return self.on_timemap(environ, start_response, uri_r)
+        except requests.exceptions.Timeout as e:
+            return self.respond(start_response, 504, body=str(e))
+        # the request is checked before, so errors of parsing, eg: a malformed
+        # Link header, are those of the upstream responses
+        except (ValueError, TypeError, MementoClientException,
+                requests.exceptions.RequestException) as e:
+            logger.warning("Upstream error for URI-R %s: %s", uri_r, e)
+            return self.respond(start_response, 502, body=str(e))
+
+    def on_timegate(self, environ, start_response, uri_r):
+        """
+        Answers a TimeGate request with a 302 redirect to the closest
+        memento, or a 404 if there is none.
+        """
+        accept_datetime = environ.get("HTTP_ACCEPT_DATETIME")
+        if accept_datetime:
+            try:
+                accept_datetime = MementoClient.convert_to_datetime(
+                    accept_datetime.strip())
+            except (ValueError, TypeError) as e:
+                return self.respond(start_response, 400, body=str(e))
+            memento_info = self.client.get_memento_info(uri_r,
+                                                        accept_datetime)
+        else:
+            # the latest memento is asked for, so the answer is cached on
+            # one key, rather than on the datetime of each request. Finding
+            # none is left to the negative cache of the client.
+            cache_key = ("latest", self.client.uri_key(uri_r))
+            memento_info = self.cache.get(cache_key)
+            if memento_info is None:
+                memento_info = self.client.get_memento_info(uri_r)
+                if memento_info.get("mementos"):
+                    self.cache.set(cache_key, memento_info)
+        mementos = memento_info.get("mementos")
+
+        headers = [("Vary", "accept-datetime")]
+        links = ['<%s>; rel="original"' % memento_info.get("original_uri"),
+                 '<%s>; rel="timemap"; type="application/link-format"' %
+                 (self.base_uri(environ) + TIMEMAP_PATH + uri_r)]
+
+        if not mementos:
+            headers.append(("Link", ", ".join(links)))
+            return self.respond(start_response, 404, headers=headers)
+
+        for rel in ["first", "prev", "next", "last"]:
+            if mementos.get(rel):
+                link = '<%s>; rel="%s memento"' % (mementos[rel]["uri"][0],
+                                                   rel)
+                http_dt = MementoClient.convert_to_http_datetime(
+                    mementos[rel].get("datetime"))
+                if http_dt:
+                    link += '; datetime="%s"' % http_dt
+                links.append(link)
+
+        headers.append(("Link", ", ".join(links)))
+        headers.append(("Location", mementos["closest"]["uri"][0]))
+        return self.respond(start_response, 302, headers=headers)
+
+    def on_timemap(self, environ, start_response, uri_r):
+        """
+        Answers a TimeMap request with the link-format TimeMap.
+        """
+        cache_key = ("timemap", self.client.uri_key(uri_r))
+        body = self.cache.get(cache_key)
+        if body is None:
+            timemap = self.client.get_timemap(uri_r)
+            timemap.timemap_uri = self.base_uri(environ) + TIMEMAP_PATH + uri_r
+            if not len(timemap):
+                return self.respond(start_response, 404)
+            body = timemap.to_link_format()
+            self.cache.set(cache_key, body)
+
+        return self.respond(start_response, 200,
+                            headers=[("Content-Type",
+                                      "application/link-format")],
+                            body=body)
+
+    @staticmethod
+    def base_uri(environ):
+        """
+        :return: (str) The scheme and host the server was requested on.
+        """
+        return "%s://%s" % (environ.get("wsgi.url_scheme", "http"),
+                            environ.get("HTTP_HOST") or
+                            environ.get("SERVER_NAME"))
+
+    @staticmethod
+    def respond(start_response, status, headers=None, body=""):
+        body = body.encode("utf-8")
+        headers = list(headers or [])
+        headers.append(("Content-Length", str(len(body))))
+        start_response(HTTP_STATUS[status], headers)
+        return [body]
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="A caching Memento TimeGate and TimeMap proxy.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--timegate-uri",
+                        help="the upstream TimeGate base uri")
+    parser.add_argument("--timemap-uri",
+                        help="the upstream TimeMap base uri")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    parser.add_argument("--cache-ttl", type=int, default=DEFAULT_CACHE_TTL)
+    parser.add_argument("--negative-ttl", type=int,
+                        default=DEFAULT_NEGATIVE_TTL,
+                        help="the seconds the uris with no mementos are "
+                             "cached, 0 not to cache them")
+    parser.add_argument("--canonicalize", action="store_true",
+                        help="key the cache on the SURT form of the uris")
+    args = parser.parse_args(argv)
+
+    client_kwargs = {}
+    if args.timegate_uri:
+        client_kwargs["timegate_uri"] = args.timegate_uri
+    if args.timemap_uri:
+        client_kwargs["timemap_uri"] = args.timemap_uri
+    if args.canonicalize:
+        client_kwargs["canonicalizer"] = Canonicalizer()
+
+    negative_cache = None
+    if args.negative_ttl > 0:
+        negative_cache = NegativeCache(args.cache_size, args.negative_ttl)
+    app = MementoProxy(MementoCache(args.cache_size, args.cache_ttl),
+                       negative_cache, **client_kwargs)
+    server = make_server(args.host, args.port, app,
+                         server_class=ThreadingWSGIServer)
+    logger.info("Serving on http://%s:%d/", args.host, args.port)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
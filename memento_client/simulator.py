@@ -0,0 +1,360 @@
+"""
+A local archive simulator, for load testing the memento client against
+realistic archive behaviour: slow and variable responses, errors, redirect
+chains and very large Link headers.
+
+    $ python -m memento_client.simulator --port 8090 --latency 0.2
+
+The simulator serves, for any URI-R:
+    /origin/<path>                  an original resource
+    /timegate/<URI-R>               a TimeGate, redirecting to a memento
+    /timemap/link/<URI-R>           a link-format TimeMap
+    /memento/<14 digits>/<URI-R>    a memento, or a redirect to the closest
+                                    memento, as in Wayback archives
+    /redirect/<n>/<path>            n redirects, ending at /<path>
+Every URI-R has the same, evenly spaced, mementos.
+"""
+
+import argparse
+import logging
+import math
+import random
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+from .memento_client import HTTP_DT_FORMAT
+from .server import ThreadingWSGIServer
+from .timemap import ARCHIVE_DT_FORMAT, to_timestamp, to_datetime
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ("origin", "timegate", "timemap", "memento", "redirect")
+
+HTTP_STATUS = {200: "200 OK",
+               302: "302 Found",
+               400: "400 Bad Request",
+               404: "404 Not Found",
+               503: "503 Service Unavailable"}
+
+
+def constant(seconds):
+    """
+    :return: (callable) A latency distribution of always seconds.
+    """
+    return lambda rng: seconds
+
+
+def uniform(low, high):
+    """
+    :return: (callable) A latency distribution uniform between low and high
+             seconds.
+    """
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median, sigma=0.5):
+    """
+    A long tailed latency distribution, as seen from real archives.
+    :param median: (float) The median latency in seconds.
+    :param sigma: (float) The spread, the higher the longer the tail.
+    :return: (callable) The latency distribution.
+    """
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+class ArchiveSimulator(object):
+    """
+    A WSGI application simulating a Memento compliant archive.
+
+    Latency and errors are set for all endpoints, or per endpoint with a
+    dict keyed on ENDPOINTS, eg:
+    >>> app = ArchiveSimulator(latency={"timegate": lognormal(0.3),
+    ...                                 "memento": constant(0.05)},
+    ...                        error_rate={"timegate": 0.01})
+    """
+
+    def __init__(self,
+                 latency=None,
+                 error_rate=0.0,
+                 mementos=1000,
+                 first_memento=datetime(1996, 1, 1),
+                 memento_interval=timedelta(days=7),
+                 timegate_redirects=0,
+                 link_padding=0,
+                 native_timegate=False,
+                 seed=None,
+                 sleep=time.sleep):
+        """
+        :param latency: (callable|dict)[optional] A latency distribution,
+                        eg: lognormal(0.2), that is given a random.Random
+                        and returns seconds.
+        :param error_rate: (float|dict) The fraction of requests answered
+                           with a 503.
+        :param mementos: (int) The number of mementos of every URI-R.
+        :param first_memento: (datetime) The datetime of the first memento.
+        :param memento_interval: (timedelta) The time between mementos.
+        :param timegate_redirects: (int) The redirects the TimeGate sends
+                                   before redirecting to the memento.
+        :param link_padding: (int) Extra memento links in the Link header
+                             of the TimeGate, to simulate huge headers.
+        :param native_timegate: (bool) Original resources advertise the
+                                simulator TimeGate as their own.
+        :param seed: (int)[optional] The random seed, for repeatable runs.
+        :param sleep: (callable) Waits out the latency.
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timegate_redirects = timegate_redirects
+        self.link_padding = link_padding
+        self.native_timegate = native_timegate
+        self.sleep = sleep
+        self.requests = dict((endpoint, 0) for endpoint in ENDPOINTS)
+
+        start = to_timestamp(first_memento)
+        step = int(memento_interval.total_seconds())
+        self._timestamps = [start + i * step for i in range(mementos)]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if environ.get("QUERY_STRING"):
+            path += "?" + environ.get("QUERY_STRING")
+        endpoint, _, rest = path.lstrip("/").partition("/")
+        if endpoint == "timemap" and rest.startswith("link/"):
+            rest = rest[len("link/"):]
+        if endpoint not in ENDPOINTS:
+            return self.respond(start_response, 404)
+
+        with self._lock:
+            self.requests[endpoint] += 1
+            latency = self._pick(self.latency, endpoint)
+            latency = latency(self._random) if latency else 0
+            error = self._random.random() < \
+                (self._pick(self.error_rate, endpoint) or 0.0)
+        if latency > 0:
+            self.sleep(latency)
+        if error:
+            return self.respond(start_response, 503)
+
+        base = "%s://%s/" % (environ.get("wsgi.url_scheme", "http"),
+                             environ.get("HTTP_HOST") or
+                             environ.get("SERVER_NAME"))
+        return getattr(self, "on_" + endpoint)(environ, start_response,
+                                               base, rest)
+
+    @staticmethod
+    def _pick(setting, endpoint):
+        if isinstance(setting, dict):
+            return setting.get(endpoint)
+        return setting
+
+    def on_origin(self, environ, start_response, base, rest):
+        headers = []
+        if self.native_timegate:
+            uri_r = base + "origin/" + rest
+            headers.append(("Link", '<%s>; rel="timegate"' %
+                            (base + "timegate/" + uri_r)))
+        return self.respond(start_response, 200, headers=headers)
+
+    def on_redirect(self, environ, start_response, base, rest):
+        count, _, target = rest.partition("/")
+        try:
+            count = int(count)
+        except ValueError:
+            return self.respond(start_response, 400)
+        if count > 1:
+            location = base + "redirect/%d/%s" % (count - 1, target)
+        else:
+            location = base + target
+        return self.respond(start_response, 302,
+                            headers=[("Location", location)])
+
+    def on_timegate(self, environ, start_response, base, uri_r):
+        if not uri_r:
+            return self.respond(start_response, 404)
+        if uri_r.startswith("hop/"):
+            hops, _, uri_r = uri_r[len("hop/"):].partition("/")
+            hops = int(hops)
+        else:
+            hops = self.timegate_redirects
+        if hops > 0:
+            return self.respond(start_response, 302, headers=[
+                ("Location", base + "timegate/hop/%d/%s" % (hops - 1, uri_r))])
+
+        if not self._timestamps:
+            return self.respond(start_response, 404,
+                                headers=[("Vary", "accept-datetime")])
+        accept_datetime = environ.get("HTTP_ACCEPT_DATETIME")
+        try:
+            target = to_timestamp(accept_datetime.strip()) \
+                if accept_datetime else self._timestamps[-1]
+        except ValueError:
+            return self.respond(start_response, 400)
+
+        i = self.closest(target)
+        links = ['<%s>; rel="original"' % uri_r,
+                 '<%s>; rel="timemap"; type="application/link-format"' %
+                 (base + "timemap/link/" + uri_r)]
+        links.extend(self.neighbour_links(base, uri_r, i))
+        for j in range(min(self.link_padding, len(self._timestamps))):
+            links.append(self.memento_link(base, uri_r, j, "memento"))
+
+        return self.respond(start_response, 302, headers=[
+            ("Vary", "accept-datetime"),
+            ("Location", self.memento_uri(base, uri_r, i)),
+            ("Link", ", ".join(links))])
+
+    def on_memento(self, environ, start_response, base, rest):
+        dt, _, uri_r = rest.partition("/")
+        try:
+            timestamp = to_timestamp(datetime.strptime(dt, ARCHIVE_DT_FORMAT))
+        except ValueError:
+            return self.respond(start_response, 404)
+        if not uri_r or not self._timestamps:
+            return self.respond(start_response, 404)
+
+        i = self.closest(timestamp)
+        if self._timestamps[i] != timestamp:
+            return self.respond(start_response, 302, headers=[
+                ("Location", self.memento_uri(base, uri_r, i))])
+
+        links = ['<%s>; rel="original"' % uri_r,
+                 '<%s>; rel="timegate"' % (base + "timegate/" + uri_r)]
+        links.extend(self.neighbour_links(base, uri_r, i))
+        return self.respond(start_response, 200, headers=[
+            ("Memento-Datetime",
+             to_datetime(timestamp).strftime(HTTP_DT_FORMAT)),
+            ("Link", ", ".join(links))])
+
+    def on_timemap(self, environ, start_response, base, uri_r):
+        if not uri_r or not self._timestamps:
+            return self.respond(start_response, 404)
+        links = ['<%s>; rel="original"' % uri_r,
+                 '<%s>; rel="timegate"' % (base + "timegate/" + uri_r),
+                 '<%s>; rel="self"; type="application/link-format"' %
+                 (base + "timemap/link/" + uri_r)]
+        for i in range(len(self._timestamps)):
+            links.append(self.memento_link(base, uri_r, i, "memento"))
+        return self.respond(start_response, 200,
+                            headers=[("Content-Type",
+                                      "application/link-format")],
+                            body=",\n".join(links) + "\n")
+
+    def closest(self, timestamp):
+        """
+        :return: (int) The index of the memento closest to a timestamp.
+        """
+        i = bisect_left(self._timestamps, timestamp)
+        if i == len(self._timestamps) or (
+                i > 0 and timestamp - self._timestamps[i - 1] <=
+                self._timestamps[i] - timestamp):
+            i -= 1
+        return i
+
+    def neighbour_links(self, base, uri_r, i):
+        """
+        :return: (list) The links of the first, last, previous and next
+                 mementos of the memento at index i.
+        """
+        rels = [(0, "first memento"), (len(self._timestamps) - 1,
+                                       "last memento")]
+        if i > 0:
+            rels.append((i - 1, "prev memento"))
+        if i < len(self._timestamps) - 1:
+            rels.append((i + 1, "next memento"))
+        return [self.memento_link(base, uri_r, j, rel) for j, rel in rels]
+
+    def memento_uri(self, base, uri_r, i):
+        return base + "memento/%s/%s" % (
+            to_datetime(self._timestamps[i]).strftime(ARCHIVE_DT_FORMAT),
+            uri_r)
+
+    def memento_link(self, base, uri_r, i, rel):
+        return '<%s>; rel="%s"; datetime="%s"' % (
+            self.memento_uri(base, uri_r, i), rel,
+            to_datetime(self._timestamps[i]).strftime(HTTP_DT_FORMAT))
+
+    @staticmethod
+    def respond(start_response, status, headers=None, body=""):
+        body = body.encode("utf-8")
+        headers = list(headers or [])
+        headers.append(("Content-Length", str(len(body))))
+        start_response(HTTP_STATUS[status], headers)
+        return [body]
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_simulator(app, host="127.0.0.1", port=0):
+    """
+    Serves a simulator from a background thread.
+    :param app: (ArchiveSimulator) The simulator.
+    :param host: (str) The interface to listen on.
+    :param port: (int) The port, any free port by default.
+    :return: The server, with its base uri in server.base_uri. Stop it with
+             server.shutdown()
+    """
+    server = make_server(host, port, app, server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    server.base_uri = "http://%s:%d/" % (host, server.server_port)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def add_arguments(parser):
+    """
+    Adds the simulator options to an argument parser.
+    """
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="the median latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.5,
+                        help="the spread of the lognormal latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mementos", type=int, default=1000)
+    parser.add_argument("--timegate-redirects", type=int, default=0)
+    parser.add_argument("--link-padding", type=int, default=0,
+                        help="extra links in the TimeGate Link header")
+    parser.add_argument("--seed", type=int)
+
+
+def from_arguments(args):
+    """
+    :return: (ArchiveSimulator) The simulator of the parsed options.
+    """
+    return ArchiveSimulator(
+        latency=lognormal(args.latency, args.sigma) if args.latency else None,
+        error_rate=args.error_rate,
+        mementos=args.mementos,
+        timegate_redirects=args.timegate_redirects,
+        link_padding=args.link_padding,
+        seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="A local Memento archive simulator.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8090)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, from_arguments(args),
+                         server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    logger.info("Serving on http://%s:%d/", args.host, args.port)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
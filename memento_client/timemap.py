@@ -0,0 +1,467 @@
+"""
+A compact TimeMap container for the memento client.
+
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+import calendar
+import numbers
+
+# 'q' (signed 64 bit) is not available in the array module of Python 2.7
+try:
+    array("q")
+    TIMESTAMP_TYPECODE = "q"
+except ValueError:
+    TIMESTAMP_TYPECODE = "l"
+
+ARCHIVE_DT_FORMAT = "%Y%m%d%H%M%S"
+HTTP_DT_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+THIN_PERIODS = ("day", "month", "year")
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY = 86400
+_MONTHS = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+           "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
+
+
+def to_timestamp(dt):
+    """
+    Converts a datetime object, or a date string in the HTTP date format,
+    to seconds since the epoch.
+    eg: "Sun, 01 Apr 2010 12:00:00 GMT" -> 1270123200
+    :param dt: (datetime|str|int) The datetime to convert. Integers are
+               assumed to be timestamps already.
+    :return: (int) The seconds since the epoch.
+    """
+    if isinstance(dt, datetime):
+        return calendar.timegm(dt.timetuple())
+    if isinstance(dt, numbers.Integral):
+        return dt
+
+    # a hand rolled parser, as strptime is far too slow for large TimeMaps.
+    try:
+        _, day, month, year, hms, _ = dt.split()
+        hour, minute, second = hms.split(":")
+        return calendar.timegm((int(year), _MONTHS[month], int(day),
+                                int(hour), int(minute), int(second)))
+    except (KeyError, ValueError, AttributeError):
+        raise ValueError("Invalid HTTP datetime: %s" % dt)
+
+
+def to_datetime(timestamp):
+    """
+    Converts seconds since the epoch to a (naive, UTC) datetime object.
+    :param timestamp: (int) The seconds since the epoch.
+    :return: (datetime) The datetime object of the timestamp.
+    """
+    return _EPOCH + timedelta(seconds=timestamp)
+
+
+class Thinner(object):
+    """
+    Keeps only the first of a chronological run of timestamps in each day,
+    month or year. If the run is not in chronological order, eg: with the
+    pages of a TimeMap out of order, the first timestamp of each period to
+    arrive is kept.
+    """
+
+    def __init__(self, period=None):
+        """
+        :param period: (str) One of THIN_PERIODS, or None to keep all.
+        """
+        if period is not None and period not in THIN_PERIODS:
+            raise ValueError("period must be one of %s." %
+                             ", ".join(THIN_PERIODS))
+        self.period = period
+        self._day = None
+        self._key = None
+        self._keys = set()
+
+    def keep(self, timestamp):
+        """
+        :param timestamp: (int) The next timestamp, in chronological order.
+        :return: (bool) True if it is the first of its period.
+        """
+        if self.period is None:
+            return True
+        day = timestamp // _DAY
+        if day == self._day:
+            return False
+        self._day = day
+
+        if self.period == "day":
+            key = day
+        else:
+            dt = to_datetime(day * _DAY)
+            key = (dt.year, dt.month) if self.period == "month" else dt.year
+        if key == self._key or key in self._keys:
+            return False
+        self._key = key
+        self._keys.add(key)
+        return True
+
+
+class TimeMap(object):
+    """
+    A compact, chronologically sorted list of the mementos of one original
+    resource.
+
+    Memento datetimes are kept as seconds since the epoch in a packed
+    integer array. URI-Ms are kept as an index into a table of shared
+    templates, where a template is the part of the URI-M before and after
+    the 14 digit archive timestamp, eg:
+    ("http://web.archive.org/web/", "/http://www.cnn.com/")
+    URI-Ms that do not contain their own timestamp are kept as a template
+    of their own.
+
+    No per memento objects are held, they are only created when accessed:
+    >>> tm = TimeMap("http://www.cnn.com/")
+    >>> tm.add("http://web.archive.org/web/20000620180259/http://cnn.com/",
+    ...        datetime(2000, 6, 20, 18, 2, 59))
+    >>> tm[0]
+    ('http://web.archive.org/web/20000620180259/http://cnn.com/',
+     datetime.datetime(2000, 6, 20, 18, 2, 59))
+    """
+
+    def __init__(self, original_uri=None, timegate_uri=None,
+                 timemap_uri=None):
+        """
+        :param original_uri: (str) The URI-R of the TimeMap.
+        :param timegate_uri: (str) The URI-G of the original resource.
+        :param timemap_uri: (str) The URI-T the TimeMap was retrieved from.
+        """
+        self.original_uri = original_uri
+        self.timegate_uri = timegate_uri
+        self.timemap_uri = timemap_uri
+        # the validators of the last TimeMap response, for conditional
+        # requests when syncing
+        self.etag = None
+        self.last_modified = None
+
+        self._timestamps = array(TIMESTAMP_TYPECODE)
+        self._template_ids = array("i")
+        # a None suffix marks a template that is a complete URI-M
+        self._templates = []
+        self._template_index = {}
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def __iter__(self):
+        for i in range(len(self._timestamps)):
+            yield self._entry(i)
+
+    def __reversed__(self):
+        for i in range(len(self._timestamps) - 1, -1, -1):
+            yield self._entry(i)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._copy(self._timestamps[item], self._template_ids[item])
+        if item < 0:
+            item += len(self._timestamps)
+        if not 0 <= item < len(self._timestamps):
+            raise IndexError("TimeMap index out of range")
+        return self._entry(item)
+
+    def __repr__(self):
+        return "<TimeMap %s (%d mementos)>" % (self.original_uri, len(self))
+
+    def _entry(self, i):
+        return self.uri(i), to_datetime(self._timestamps[i])
+
+    def _copy(self, timestamps, template_ids):
+        """
+        Creates a new TimeMap over the given entries. The template table is
+        only ever appended to, so it is shared rather than copied.
+        """
+        tm = TimeMap(self.original_uri, self.timegate_uri, self.timemap_uri)
+        tm._timestamps = timestamps
+        tm._template_ids = template_ids
+        tm._templates = self._templates
+        tm._template_index = self._template_index
+        return tm
+
+    def _template_id(self, uri_m, timestamp):
+        archive_dt = to_datetime(timestamp).strftime(ARCHIVE_DT_FORMAT)
+        pos = uri_m.find(archive_dt)
+        if pos >= 0:
+            template = (uri_m[:pos], uri_m[pos + len(archive_dt):])
+        else:
+            template = (uri_m, None)
+
+        template_id = self._template_index.get(template)
+        if template_id is None:
+            template_id = len(self._templates)
+            self._templates.append(template)
+            self._template_index[template] = template_id
+        return template_id
+
+    def add(self, uri_m, memento_datetime):
+        """
+        Adds a memento, keeping the TimeMap in chronological order.
+        Adding in chronological order is the fast path.
+        :param uri_m: (str) The URI-M of the memento.
+        :param memento_datetime: (datetime|str) The memento datetime, either
+                                 as a datetime or in the HTTP date format.
+        """
+        timestamp = to_timestamp(memento_datetime)
+        template_id = self._template_id(uri_m, timestamp)
+
+        if not self._timestamps or timestamp >= self._timestamps[-1]:
+            self._timestamps.append(timestamp)
+            self._template_ids.append(template_id)
+        else:
+            i = bisect_right(self._timestamps, timestamp)
+            self._timestamps.insert(i, timestamp)
+            self._template_ids.insert(i, template_id)
+
+    def add_link(self, uri, params):
+        """
+        Adds a link of a link-format TimeMap. Mementos are added, and the
+        original, timegate and self links are kept.
+        :param uri: (str) The uri of the link.
+        :param params: (dict) The parameters of the link, in the form of
+                       parse_link_header: {"rel": [""], "datetime": [""]}
+        :return: (bool) True if the link was a memento.
+        """
+        rels = params.get("rel", [])
+        if "original" in rels and not self.original_uri:
+            self.original_uri = uri
+        if "timegate" in rels:
+            self.timegate_uri = uri
+        if "self" in rels:
+            self.timemap_uri = uri
+        if "memento" in rels and params.get("datetime"):
+            self.add(uri, params["datetime"][0])
+            return True
+        return False
+
+    def extend(self, mementos):
+        """
+        Adds mementos from an iterable of (uri_m, datetime) pairs.
+        :param mementos: (iterable) The (uri_m, datetime) pairs.
+        """
+        for uri_m, memento_datetime in mementos:
+            self.add(uri_m, memento_datetime)
+
+    def merge(self, other, newer_only=True):
+        """
+        Adds the mementos of another TimeMap that are newer than the last
+        memento of this TimeMap. Mementos already known are skipped.
+        :param other: (TimeMap) The TimeMap to merge.
+        :param newer_only: (bool) Only add the mementos from the last
+                           memento of this TimeMap on, as when syncing. If
+                           False, every memento not already known, by
+                           datetime and URI-M, is added, wherever it falls.
+        :return: (int) The number of mementos added.
+        """
+        if not self._timestamps and not self._templates:
+            # nothing to merge with, so the arrays are simply copied
+            self._timestamps.extend(other._timestamps)
+            self._template_ids.extend(other._template_ids)
+            self._templates.extend(other._templates)
+            self._template_index.update(other._template_index)
+            return len(other)
+
+        if not newer_only:
+            return self._merge_all(other)
+
+        start = 0
+        known = set()
+        if self._timestamps:
+            since = self._timestamps[-1]
+            start = bisect_left(other._timestamps, since)
+            known = set(self.uri(i) for i in
+                        range(bisect_left(self._timestamps, since), len(self)))
+
+        added = 0
+        for i in range(start, len(other)):
+            uri_m = other.uri(i)
+            if uri_m in known:
+                continue
+            self.add(uri_m, other._timestamps[i])
+            added += 1
+        return added
+
+    def _merge_all(self, other):
+        if not len(other):
+            return 0
+        # only the mementos in the datetime range of the other TimeMap can
+        # be duplicates
+        lo = bisect_left(self._timestamps, other._timestamps[0])
+        hi = bisect_right(self._timestamps, other._timestamps[-1])
+        known = set((self._timestamps[i], self.uri(i)) for i in range(lo, hi))
+
+        added = 0
+        for i in range(len(other)):
+            memento = (other._timestamps[i], other.uri(i))
+            if memento in known:
+                continue
+            known.add(memento)
+            self.add(memento[1], memento[0])
+            added += 1
+        return added
+
+    def uri(self, i):
+        """
+        Returns the URI-M of the memento at the given position.
+        :param i: (int) The position of the memento.
+        :return: (str) The URI-M.
+        """
+        prefix, suffix = self._templates[self._template_ids[i]]
+        if suffix is None:
+            return prefix
+        return prefix + to_datetime(self._timestamps[i]).\
+            strftime(ARCHIVE_DT_FORMAT) + suffix
+
+    def datetime(self, i):
+        """
+        Returns the memento datetime of the memento at the given position.
+        :param i: (int) The position of the memento.
+        :return: (datetime) The memento datetime.
+        """
+        return to_datetime(self._timestamps[i])
+
+    def timestamp(self, i):
+        """
+        Returns the memento datetime of the memento at the given position
+        as seconds since the epoch.
+        :param i: (int) The position of the memento.
+        :return: (int) The memento datetime as a timestamp.
+        """
+        return self._timestamps[i]
+
+    @property
+    def timestamps(self):
+        """
+        The packed memento datetimes, as seconds since the epoch. This is the
+        array itself, not a copy, and must not be modified.
+        :return: (array) The timestamps.
+        """
+        return self._timestamps
+
+    @property
+    def first(self):
+        """
+        :return: (tuple) The (uri_m, datetime) of the first memento, or None.
+        """
+        if self._timestamps:
+            return self._entry(0)
+
+    @property
+    def last(self):
+        """
+        :return: (tuple) The (uri_m, datetime) of the last memento, or None.
+        """
+        if self._timestamps:
+            return self._entry(len(self._timestamps) - 1)
+
+    def bisect(self, dt):
+        """
+        Returns the position of the first memento at or after the given
+        datetime, using a binary search over the packed timestamps.
+        :param dt: (datetime) The datetime to search for.
+        :return: (int) The position, len(self) if all mementos are earlier.
+        """
+        return bisect_left(self._timestamps, to_timestamp(dt))
+
+    def closest(self, dt):
+        """
+        Returns the memento closest in time to the given datetime.
+        :param dt: (datetime) The datetime to search for.
+        :return: (tuple) The (uri_m, datetime) of the closest memento, or
+                 None if the TimeMap is empty.
+        """
+        if not self._timestamps:
+            return
+        timestamp = to_timestamp(dt)
+        i = bisect_left(self._timestamps, timestamp)
+        if i == len(self._timestamps):
+            i -= 1
+        elif i > 0 and timestamp - self._timestamps[i - 1] <= \
+                self._timestamps[i] - timestamp:
+            i -= 1
+        return self._entry(i)
+
+    def between(self, start=None, end=None):
+        """
+        Returns the mementos with a datetime between start and end, both
+        inclusive, as a new TimeMap.
+        :param start: (datetime)[optional] The earliest datetime.
+        :param end: (datetime)[optional] The latest datetime.
+        :return: (TimeMap) The matching mementos.
+        """
+        lo = 0
+        hi = len(self._timestamps)
+        if start is not None:
+            lo = bisect_left(self._timestamps, to_timestamp(start))
+        if end is not None:
+            hi = bisect_right(self._timestamps, to_timestamp(end))
+        return self[lo:max(lo, hi)]
+
+    def thin(self, period):
+        """
+        Returns the first memento of each day, month or year, as a new
+        TimeMap.
+        :param period: (str) One of "day", "month" or "year".
+        :return: (TimeMap) The thinned mementos.
+        """
+        thinner = Thinner(period)
+        keep = [i for i, timestamp in enumerate(self._timestamps)
+                if thinner.keep(timestamp)]
+        return self._copy(
+            array(TIMESTAMP_TYPECODE, (self._timestamps[i] for i in keep)),
+            array("i", (self._template_ids[i] for i in keep)))
+
+    def to_link_format(self):
+        """
+        Serializes the TimeMap in the application/link-format of RFC 7089.
+        :return: (str) The link-format TimeMap.
+        """
+        links = []
+        if self.original_uri:
+            links.append('<%s>; rel="original"' % self.original_uri)
+        if self.timegate_uri:
+            links.append('<%s>; rel="timegate"' % self.timegate_uri)
+        if self.timemap_uri:
+            links.append('<%s>; rel="self"; type="application/link-format"'
+                         % self.timemap_uri)
+
+        last = len(self._timestamps) - 1
+        for i in range(len(self._timestamps)):
+            rel = "memento"
+            if i == 0:
+                rel = "first " + rel
+            if i == last:
+                rel = "last " + rel
+            links.append('<%s>; rel="%s"; datetime="%s"' % (
+                self.uri(i), rel,
+                to_datetime(self._timestamps[i]).strftime(HTTP_DT_FORMAT)))
+        return ",\n".join(links)
+
+    @classmethod
+    def from_links(cls, links, original_uri=None):
+        """
+        Creates a TimeMap from a parsed link-format TimeMap.
+        :param links: (dict) the output of MementoClient.parse_link_header.
+        :param original_uri: (str)[optional] The URI-R, if it is not in the
+                             links.
+        :return: (TimeMap) The TimeMap.
+        """
+        tm = cls(original_uri)
+        mementos = []
+        for uri, params in (links or {}).items():
+            if "memento" in params.get("rel", []) and params.get("datetime"):
+                mementos.append((to_timestamp(params["datetime"][0]), uri))
+            else:
+                tm.add_link(uri, params)
+
+        # sorting first keeps every add on the fast path
+        mementos.sort()
+        for timestamp, uri in mementos:
+            tm.add(uri, timestamp)
+        return tm
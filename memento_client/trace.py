@@ -0,0 +1,106 @@
+"""
+Structured tracing of lookups for the memento client.
+
+Each get_memento_info lookup produces a single event on the
+"memento_client.trace" logger, holding every request made (hop) during the
+lookup. Tracing is off unless that logger is enabled for DEBUG, eg:
+
+    logging.getLogger("memento_client.trace").setLevel(logging.DEBUG)
+
+When it is off, lookups use a trace that records and formats nothing.
+The event is passed to handlers as the `memento_trace` attribute of the
+log record, and is only rendered as text if a handler formats the record.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LookupTrace(object):
+    """
+    The trace of one lookup.
+    """
+
+    def __init__(self, request_uri, accept_datetime):
+        self.start = time.time()
+        self.event = {"request_uri": request_uri,
+                      "accept_datetime": accept_datetime,
+                      "hops": []}
+
+    def hop(self, stage, response):
+        """
+        Records a request, and the redirects followed for it.
+        :param stage: (str) What the request was for, eg: "timegate".
+        :param response: the response object of the request.
+        """
+        if response is None:
+            return
+        for res in list(getattr(response, "history", None) or []) + \
+                [response]:
+            request = getattr(res, "request", None)
+            elapsed = getattr(res, "elapsed", None)
+            self.event["hops"].append({
+                "stage": stage,
+                "method": getattr(request, "method", None),
+                "uri": getattr(res, "url", None),
+                "status_code": res.status_code,
+                "elapsed": elapsed.total_seconds() if elapsed else None,
+                "link": res.headers.get("Link"),
+                "location": res.headers.get("Location")})
+
+    def set(self, key, value):
+        """
+        Adds a detail to the event.
+        """
+        self.event[key] = value
+
+    def emit(self, result=None, error=None):
+        """
+        Logs the event of the lookup.
+        :param result: (dict)[optional] The result of the lookup.
+        :param error: (Exception)[optional] The error raised by the lookup.
+        """
+        self.event["duration"] = time.time() - self.start
+        self.event["result"] = result
+        self.event["error"] = error
+        logger.debug("%s", self, extra={"memento_trace": self.event})
+
+    def __str__(self):
+        hops = "; ".join("%s %s %s -> %s" % (hop["stage"], hop["method"],
+                                              hop["uri"], hop["status_code"])
+                         for hop in self.event["hops"])
+        return "lookup of %s at %s took %.3fs [%s]%s" % (
+            self.event["request_uri"], self.event["accept_datetime"],
+            self.event["duration"], hops,
+            " failed: %r" % self.event["error"] if self.event["error"]
+            else "")
+
+
+class NullTrace(object):
+    """
+    The trace used when tracing is off.
+    """
+
+    def hop(self, stage, response):
+        pass
+
+    def set(self, key, value):
+        pass
+
+    def emit(self, result=None, error=None):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+def start_trace(request_uri, accept_datetime):
+    """
+    Starts the trace of a lookup.
+    :return: A LookupTrace if tracing is on, else a NullTrace.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        return LookupTrace(request_uri, accept_datetime)
+    return NULL_TRACE
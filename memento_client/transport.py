@@ -0,0 +1,257 @@
+"""
+A lean HEAD transport for the memento client, built directly on the urllib3
+connection pools, without the requests session machinery.
+
+"""
+
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+import requests
+import urllib3
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, default_user_agent, \
+    get_auth_from_url, get_environ_proxies, getproxies, select_proxy
+from urllib3 import exceptions
+
+from .dnscache import CachedDNSHTTPConnectionPool, \
+    CachedDNSHTTPSConnectionPool
+
+# Python 2.7 and 3.X support are different for urlparse
+if sys.version_info[0] == 3:
+    from urllib.parse import urljoin
+else:
+    from urlparse import urljoin
+
+DEFAULT_POOLS = 10
+DEFAULT_POOL_SIZE = 10
+
+# the headers a requests session sends, so that servers answer both
+# transports alike
+DEFAULT_HEADERS = {"User-Agent": default_user_agent(),
+                   "Accept-Encoding": "gzip, deflate",
+                   "Accept": "*/*"}
+
+PoolRequest = namedtuple("PoolRequest", ["method", "url", "headers"])
+
+
+class PoolResponse(object):
+    """
+    A urllib3 response, with the attributes of a requests response that the
+    memento client uses for HEAD requests.
+    """
+
+    def __init__(self, response, method, uri, headers, elapsed):
+        self.status_code = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.url = uri
+        self.request = PoolRequest(method, uri, headers)
+        self.elapsed = timedelta(seconds=elapsed)
+        self.history = []
+        self.raw = response
+
+    @property
+    def content(self):
+        return self.raw.data
+
+    def close(self):
+        self.raw.release_conn()
+
+    def __repr__(self):
+        return "<PoolResponse [%d]>" % self.status_code
+
+
+class PoolTransport(object):
+    """
+    Sends HEAD requests straight through a urllib3 pool manager. It has the
+    head and close methods of a requests session, and follows redirects
+    itself, but has no hooks, cookie jar, netrc lookups, or response model,
+    which take most of the time of a HEAD to a nearby archive. The
+    connections resolve hosts with the DNS cache, like those of the sessions
+    the client creates.
+
+    Proxies are used like a requests session does: those given, else those
+    of the environment, eg: HTTP_PROXY, HTTPS_PROXY and ALL_PROXY, except
+    for the hosts of NO_PROXY. The environment is read once, when the
+    transport is created.
+
+    Unlike requests sessions, it is thread safe, so many clients can share
+    one:
+    >>> transport = PoolTransport(pool_size=50)
+    >>> mc = MementoClient(transport=transport)
+
+    Errors are raised as the matching requests exceptions.
+    """
+
+    thread_safe = True
+
+    def __init__(self, pools=DEFAULT_POOLS, pool_size=DEFAULT_POOL_SIZE,
+                 max_redirects=30, verify=True, proxies=None, trust_env=True):
+        """
+        :param pools: (int) The number of hosts whose pools are kept.
+        :param pool_size: (int) The connections kept open to each host.
+        :param max_redirects: (int) the maximum number of redirects followed.
+        :param verify: (bool) Toggle TLS certificate verification.
+        :param proxies: (dict)[optional] The proxies, as for a requests
+                        session, eg: {"https": "http://proxy:3128"}.
+        :param trust_env: (bool) Toggle the proxies of the environment.
+        """
+        self.max_redirects = max_redirects
+        self.proxies = proxies or {}
+        self.trust_env = trust_env
+        if verify:
+            self._tls = {"cert_reqs": "CERT_REQUIRED",
+                         "ca_certs": DEFAULT_CA_BUNDLE_PATH}
+        else:
+            self._tls = {"cert_reqs": "CERT_NONE"}
+        self._pools = pools
+        self._pool_size = pool_size
+        self.pool_manager = self._pool_manager(urllib3.PoolManager)
+        # checking every uri against the environment is only worth it when
+        # a proxy is set there
+        self._environ_proxies = trust_env and any(
+            name != "no" for name in getproxies())
+        self._proxy_managers = {}
+        self._lock = threading.Lock()
+
+    def _pool_manager(self, cls, *args, **kwargs):
+        kwargs.update(self._tls)
+        manager = cls(*args, num_pools=self._pools, maxsize=self._pool_size,
+                      **kwargs)
+        manager.pool_classes_by_scheme = {
+            "http": CachedDNSHTTPConnectionPool,
+            "https": CachedDNSHTTPSConnectionPool}
+        return manager
+
+    def manager(self, uri):
+        """
+        :param uri: (str) The uri of a request.
+        :return: The urllib3 pool manager of the proxy of the uri, or of
+                 direct connections if it has none.
+        """
+        if not self.proxies and not self._environ_proxies:
+            return self.pool_manager
+        proxies = {}
+        if self._environ_proxies:
+            proxies.update(get_environ_proxies(
+                uri, no_proxy=self.proxies.get("no_proxy")))
+        proxies.update(self.proxies)
+        proxy = select_proxy(uri, proxies)
+        if not proxy:
+            return self.pool_manager
+
+        with self._lock:
+            manager = self._proxy_managers.get(proxy)
+            if manager is None:
+                username, password = get_auth_from_url(proxy)
+                proxy_headers = None
+                if username:
+                    proxy_headers = urllib3.util.make_headers(
+                        proxy_basic_auth="%s:%s" % (username, password))
+                try:
+                    manager = self._pool_manager(urllib3.ProxyManager, proxy,
+                                                 proxy_headers=proxy_headers)
+                except exceptions.ProxySchemeUnknown as e:
+                    raise requests.exceptions.InvalidSchema(e)
+                self._proxy_managers[proxy] = manager
+        return manager
+
+    def head(self, uri, headers=None, allow_redirects=False, timeout=None):
+        return self.request("HEAD", uri, headers=headers,
+                            allow_redirects=allow_redirects, timeout=timeout)
+
+    def request(self, method, uri, headers=None, allow_redirects=False,
+                timeout=None):
+        """
+        Sends a request, and reads its body before returning.
+        :param method: (str) The HTTP method.
+        :param uri: (str) The uri, sent as given.
+        :param headers: (dict)[optional] The request headers, in addition to
+                        DEFAULT_HEADERS.
+        :param allow_redirects: (bool) Toggle to follow redirects.
+        :param timeout: (int|tuple) the timeout for the connection and the
+                        reads, or a (connect, read) tuple. None waits
+                        forever.
+        :return: (PoolResponse) The response, with the redirects followed in
+                 its history.
+        """
+        if headers:
+            request_headers = DEFAULT_HEADERS.copy()
+            request_headers.update(headers)
+        else:
+            request_headers = DEFAULT_HEADERS
+        if isinstance(timeout, tuple):
+            timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        else:
+            timeout = urllib3.Timeout(connect=timeout, read=timeout)
+
+        history = []
+        while True:
+            response = self._send(method, uri, request_headers, timeout)
+            location = response.headers.get("Location")
+            if not allow_redirects or not location \
+                    or not 299 < response.status_code < 400:
+                break
+            if len(history) >= self.max_redirects:
+                raise requests.exceptions.TooManyRedirects(
+                    "Exceeded %d redirects." % self.max_redirects,
+                    response=response)
+            if response.status_code == 303 and method != "HEAD":
+                method = "GET"
+            history.append(response)
+            uri = urljoin(uri, location)
+
+        response.history = history
+        return response
+
+    def _send(self, method, uri, headers, timeout):
+        start = time.time()
+        try:
+            response = self.manager(uri).urlopen(
+                method, uri, headers=headers, redirect=False, retries=False,
+                timeout=timeout)
+        except exceptions.ProxyError as e:
+            raise requests.exceptions.ProxyError(e)
+        except exceptions.NewConnectionError as e:
+            raise requests.exceptions.ConnectionError(e)
+        except exceptions.ConnectTimeoutError as e:
+            raise requests.exceptions.ConnectTimeout(e)
+        except exceptions.ReadTimeoutError as e:
+            raise requests.exceptions.ReadTimeout(e)
+        except exceptions.SSLError as e:
+            raise requests.exceptions.SSLError(e)
+        except exceptions.ProtocolError as e:
+            raise requests.exceptions.ConnectionError(e)
+        except exceptions.URLSchemeUnknown as e:
+            raise requests.exceptions.InvalidSchema(e)
+        except exceptions.LocationValueError as e:
+            raise requests.exceptions.InvalidURL(e)
+        except exceptions.HTTPError as e:
+            raise requests.exceptions.RequestException(e)
+        return PoolResponse(response, method, uri, headers,
+                            time.time() - start)
+
+    def warm(self, uri, connections=1, timeout=None):
+        """
+        Resolves the host of a uri and opens pooled connections to it.
+        :param uri: (str) A uri on the host.
+        :param connections: (int) The number of connections to open.
+        :param timeout: (int) the timeout value for the connections.
+        """
+        pool = self.manager(uri).connection_from_url(uri)
+        pool.warm(connections, timeout=timeout)
+
+    def close(self):
+        self.pool_manager.clear()
+        with self._lock:
+            for manager in self._proxy_managers.values():
+                manager.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -6,11 +6,11 @@ from lxml import etree
 import requests
 import sys
 
-# Python 2.7 and 3.X support are different for urlparse
+# Python 2.7 and 3.X support are different for StringIO
 if sys.version_info[0] == 3:
-    from io import StringIO
+    from io import BytesIO
 else:
-    import StringIO
+    from StringIO import StringIO as BytesIO
 
 
 DEFAULT_ARCHIVE_REGISTRY_URI = \
@@ -34,7 +34,7 @@ def get_archive_list(archive_registry_uri=DEFAULT_ARCHIVE_REGISTRY_URI):
     archive_list = {}
     response = requests.get(archive_registry_uri)
     # parse xml
-    data = etree.parse(StringIO.StringIO(response.content))
+    data = etree.parse(BytesIO(response.content))
 
     for link in data.xpath("./link"):
         arc_id = link.attrib["id"]
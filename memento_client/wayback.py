@@ -0,0 +1,137 @@
+"""
+URI-M templates of the archives that follow the Wayback URI convention, for
+looking up mementos without a TimeGate.
+
+"""
+
+from .timemap import ARCHIVE_DT_FORMAT
+
+# the URI-M templates of known Wayback archives, keyed on their id in the
+# archive registry
+KNOWN_ARCHIVES = {
+    "ia": "http://web.archive.org/web/{timestamp}/{uri}",
+    "archive-it": "http://wayback.archive-it.org/all/{timestamp}/{uri}",
+    "loc": "http://webarchive.loc.gov/all/{timestamp}/{uri}",
+    "pt": "http://arquivo.pt/wayback/{timestamp}/{uri}",
+    "ukwa": "https://www.webarchive.org.uk/wayback/archive/{timestamp}/{uri}",
+    "nla": "https://webarchive.nla.gov.au/awa/{timestamp}/{uri}",
+    "perma": "https://perma-archives.org/warc/{timestamp}/{uri}",
+}
+
+
+def _strip_scheme(uri):
+    return uri.partition("://")[2] or uri
+
+
+class WaybackRegistry(object):
+    """
+    The URI-M templates of archives that follow the Wayback convention,
+    <prefix>/<14 digit timestamp>/<URI-R>, such as
+    http://web.archive.org/web/20100424190000/http://www.cnn.com/
+
+    Such archives redirect a URI-M of any timestamp to their capture
+    nearest to it, so the closest memento can be found with a request
+    straight to a URI-M, instead of to a TimeGate.
+    >>> registry = WaybackRegistry()
+    >>> registry.memento_uri("ia", "http://www.cnn.com/",
+    ...                      datetime(2010, 4, 24, 19))
+    'http://web.archive.org/web/20100424190000/http://www.cnn.com/'
+
+    The registry is seeded with KNOWN_ARCHIVES, and other archives can be
+    registered.
+    """
+
+    def __init__(self, templates=None):
+        """
+        :param templates: (dict)[optional] The templates keyed on archive
+                          id, KNOWN_ARCHIVES by default.
+        """
+        self._templates = {}
+        for name, template in (KNOWN_ARCHIVES if templates is None
+                               else templates).items():
+            self.register(name, template)
+
+    def __contains__(self, name):
+        return name in self._templates
+
+    def __getitem__(self, name):
+        return self._templates[name]
+
+    def names(self):
+        return sorted(self._templates)
+
+    def register(self, name, template):
+        """
+        Adds, or replaces, the template of an archive.
+        :param name: (str) The archive id.
+        :param template: (str) The URI-M template, with {timestamp} and
+                         {uri} fields, eg:
+                         http://web.archive.org/web/{timestamp}/{uri}
+        """
+        if "{timestamp}" not in template or "{uri}" not in template:
+            raise ValueError("The template must have {timestamp} and {uri} "
+                             "fields.")
+        self._templates[name] = template
+
+    def template(self, archive):
+        """
+        :param archive: (str) An archive id, a template, or the TimeGate
+                        uri of a registered archive.
+        :return: (str) The template.
+        :raises: ValueError if no template is known.
+        """
+        if archive in self._templates:
+            return self._templates[archive]
+        if "{timestamp}" in archive and "{uri}" in archive:
+            return archive
+        name = self.match(archive)
+        if name is None:
+            raise ValueError("No Wayback template is known for %s." %
+                             archive)
+        return self._templates[name]
+
+    def match(self, uri):
+        """
+        Finds the archive of a TimeGate uri or URI-M.
+        :param uri: (str) The uri, eg: http://web.archive.org/web/
+        :return: (str) The archive id, or None.
+        """
+        uri = _strip_scheme(uri)
+        for name, template in sorted(self._templates.items()):
+            prefix = _strip_scheme(template.split("{timestamp}")[0])
+            if uri.startswith(prefix):
+                return name
+
+    def memento_uri(self, archive, uri, accept_datetime):
+        """
+        :param archive: (str) An archive id, a template or a TimeGate uri.
+        :param uri: (str) The URI-R.
+        :param accept_datetime: (datetime) The datetime.
+        :return: (str) The URI-M at the datetime.
+        """
+        return build_memento_uri(self.template(archive), uri,
+                                 accept_datetime)
+
+
+def build_memento_uri(template, uri, accept_datetime):
+    """
+    :param template: (str) A URI-M template.
+    :param uri: (str) The URI-R.
+    :param accept_datetime: (datetime) The datetime.
+    :return: (str) The URI-M at the datetime.
+    """
+    return template.format(
+        timestamp=accept_datetime.strftime(ARCHIVE_DT_FORMAT), uri=uri)
+
+
+def build_timegate_uri(template, uri):
+    """
+    :param template: (str) A URI-M template.
+    :param uri: (str) The URI-R.
+    :return: (str) The TimeGate uri of the archive, the URI-M without the
+             timestamp.
+    """
+    return template.replace("{timestamp}/", "").format(uri=uri)
+
+
+DEFAULT_REGISTRY = WaybackRegistry()
@@ -87,7 +87,10 @@ This library allows one to find information about archived web pages using the M
     keywords='memento http web archives',
     extras_require = {
         'testing': ['pytest'],
-        "utils": ["lxml"]
+        "utils": ["lxml"],
+        "columnar": ["numpy"],
+        "arrow": ["numpy", "pyarrow"],
+        "http2": ["httpx[http2]"]
     },
     classifiers=[
 
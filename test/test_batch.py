@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.batch import group_by_host, run_lookups
+import unittest
+from datetime import datetime
+
+DT = datetime(2010, 4, 24, 19)
+
+
+def lookups(hosts):
+    return [("http://%s.example.org/%d" % (host, i), DT)
+            for i, host in enumerate(hosts)]
+
+
+def hosts(groups):
+    return [[uri.split("//")[1].split(".")[0] for uri, _ in group]
+            for group in groups]
+
+
+class RecordingClient(MementoClient):
+
+    closed = []
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingClient, self).__init__(*args, **kwargs)
+        self.calls = []
+
+    def close(self):
+        RecordingClient.closed.append(self)
+        super(RecordingClient, self).close()
+
+    def get_memento_info(self, request_uri, accept_datetime=None, timeout=None, **kwargs):
+        self.calls.append(request_uri)
+        return {"original_uri": request_uri}
+
+
+class GroupByHostTest(unittest.TestCase):
+
+    def test_groups(self):
+        input = lookups(["a", "b", "a", "c", "a", "b"])
+        assert hosts(group_by_host(input, window=6)) == [["a", "a", "a"], ["b", "b"], ["c"]]
+        # the window bounds the reordering
+        assert hosts(group_by_host(input, window=4)) == [["a", "a"], ["b", "b"], ["c"], ["a"]]
+        assert hosts(group_by_host(input, window=3)) == [["a", "a"], ["b"], ["c"], ["a"], ["b"]]
+        assert hosts(group_by_host(input, window=1)) == [[h] for h in "abacab"]
+        assert hosts(group_by_host(input, window=10, max_group=2)) == [["a", "a"], ["b", "b"], ["c"], ["a"]]
+        # every lookup once, in input order within its host
+        groups = list(group_by_host(input, window=3))
+        assert sorted(sum(groups, [])) == sorted(input)
+        for group in groups:
+            assert group == sorted(group, key=input.index)
+        # the scheme and port are part of the host
+        assert len(list(group_by_host([("http://a.example.org/", DT),
+                                       ("https://a.example.org/", DT),
+                                       ("http://A.example.org:8080/", DT)]))) == 3
+
+    def test_run_lookups(self):
+        input = lookups(["a", "b", "a", "c", "a", "b"])
+        mc = RecordingClient()
+        results = run_lookups(mc, input, window=6)
+        assert [uri for uri, _ in input] == [results[lookup]["original_uri"] for lookup in input]
+        assert hosts([[(uri, DT) for uri in mc.calls]]) == [["a", "a", "a", "b", "b", "c"]]
+
+        mc.calls = []
+        run_lookups(mc, input)
+        assert mc.calls == [uri for uri, _ in input]
+
+        # the results are in input order, whatever the order of the lookups
+        uris = [uri for uri, _ in input]
+        mc = RecordingClient()
+        RecordingClient.closed = []
+        results = mc.get_memento_info_batch(uris, DT, workers=3)
+        assert [result["original_uri"] for result in results] == uris
+        # the worker clients are closed, the client is not
+        assert len(RecordingClient.closed) == 3 and mc not in RecordingClient.closed
+
+        # with on_result, each result is handed over and not kept
+        seen = []
+        assert run_lookups(mc, input, workers=2,
+                           on_result=lambda lookup, result: seen.append(lookup)) == {}
+        assert sorted(seen) == sorted(input)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.cache import MementoCache, NegativeCache
+from memento_client.simulator import ArchiveSimulator, start_simulator
+import unittest
+from datetime import datetime
+import mock
+
+
+class MementoCacheTest(unittest.TestCase):
+
+    def test_cache(self):
+        cache = MementoCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        # b was the least recently used
+        assert cache.get("b") is None
+        assert "a" in cache and "c" in cache
+
+        cache.set("d", 4, ttl=-1)
+        assert cache.get("d") is None
+        assert cache.hits == 3
+
+
+class NegativeCacheTest(unittest.TestCase):
+
+    def test_backoff(self):
+        cache = NegativeCache(ttl=10, max_ttl=30, backoff=2)
+        with mock.patch("memento_client.cache.time.time") as clock:
+            clock.return_value = 0
+            cache.set("a", 1)
+            clock.return_value = 11
+            assert cache.get("a") is None
+
+            # found empty again, kept twice as long
+            cache.set("a", 1)
+            clock.return_value = 30
+            assert cache.get("a") == 1
+            clock.return_value = 32
+            assert cache.get("a") is None
+
+            # up to max_ttl
+            cache.set("a", 1)
+            clock.return_value = 62
+            assert cache.get("a") == 1
+            clock.return_value = 63
+            assert cache.get("a") is None
+
+            # deleting starts over
+            cache.delete("a")
+            cache.set("a", 1)
+            clock.return_value = 74
+            assert cache.get("a") is None
+
+    def test_client(self):
+        app = ArchiveSimulator(mementos=0)
+        server = start_simulator(app)
+        try:
+            cache = MementoCache()
+            negative_cache = NegativeCache()
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/",
+                               check_native_timegate=False,
+                               cache=cache, negative_cache=negative_cache)
+            uri = server.base_uri + "origin/page"
+            info = mc.get_memento_info(uri, datetime(2010, 4, 24, 19))
+            assert "mementos" not in info
+            requests = app.requests["timegate"]
+
+            # served locally whatever the datetime
+            assert mc.get_memento_info(uri, datetime(2001, 9, 11)) == info
+            assert app.requests["timegate"] == requests
+            assert len(negative_cache) == 1
+            assert len(cache) == 0
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
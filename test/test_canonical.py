@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.cache import MementoCache
+from memento_client.canonical import Canonicalizer, TRACKING_PARAMS, surt
+import unittest
+from datetime import datetime
+
+MEMENTO_INFO = {"original_uri": "http://www.bbc.com/", "mementos": {}}
+
+# the first fields of CDX lines of the Wayback Machine, keyed by the surt package
+CDX = """org,archive)/goo?a=1&a=2&b 20100424190000 http://archive.org/goo/?a=2&b&a=1 text/html 200
+com,cnn)/2010/world/index.html?a=b&iref=allsearch 20100424190000 http://www.cnn.com/2010/WORLD/index.html?iref=allsearch&a=B text/html 200
+com,example)/path/page.html 20100424190000 http://www.example.com/Path/Page.html#top text/html 200
+org,archive)/index.php?query=%20 20100424190000 http://archive.org/index.php?PHPSESSID=0123456789abcdefghijklemopqrstuv&query=%20 text/html 200
+com,bbc)/?utm_source=x 20100424190000 https://bbc.com/?utm_source=x text/html 200
+com,example:8080)/x?&a=1&b=2 20100424190000 http://example.com:8080/x/?a=1&&b=2 text/html 200"""
+
+
+class CountingClient(MementoClient):
+
+    def get_memento_info(self, request_uri, accept_datetime=None, timeout=None, **kwargs):
+        self.calls = getattr(self, "calls", [])
+        self.calls.append(request_uri)
+        return MEMENTO_INFO
+
+
+class CanonicalTest(unittest.TestCase):
+
+    def test_surt(self):
+        assert surt("http://bbc.com") == "com,bbc)/"
+        assert surt("http://www.bbc.com/") == "com,bbc)/"
+        assert surt("https://WWW2.BBC.com/News/?b=2&a=1&fbclid=y") == "com,bbc)/news?a=1&b=2&fbclid=y"
+        assert surt("http://bbc.com:80/a/") == "com,bbc)/a"
+        assert surt("http://bbc.com:8080/a") == "com,bbc:8080)/a"
+        assert surt("http://www.bbc.co.uk/") == "uk,co,bbc)/"
+        # not a www prefix
+        assert surt("http://wwwbbc.com/") == "com,wwwbbc)/"
+
+    def test_cdx_keys(self):
+        for line in CDX.splitlines():
+            key, _, uri = line.split(" ")[:3]
+            assert surt(uri) == key
+
+    def test_options(self):
+        keep_all = Canonicalizer(strip_scheme=False, strip_www=False, strip_trailing_slash=False,
+                                 sort_query=False, lowercase=False, strip_session_ids=False)
+        assert keep_all("https://www.bbc.com/A/?utm_source=x&b=1") == "https://(com,bbc,www)/A/?utm_source=x&b=1"
+        assert keep_all("http://www.bbc.com/a/") != keep_all("https://www.bbc.com/a/")
+
+        tracking = Canonicalizer(strip_params=TRACKING_PARAMS)
+        assert tracking("https://bbc.com/?utm_source=x&b=1") == "com,bbc)/?b=1"
+
+        custom = Canonicalizer(strip_params=["SessionId"])
+        assert custom("http://bbc.com/?sessionid=1&utm_source=x") == "com,bbc)/?utm_source=x"
+
+    def test_uri_key(self):
+        assert MementoClient().uri_key("http://www.bbc.com/") == "http://www.bbc.com/"
+        mc = MementoClient(canonicalizer=Canonicalizer())
+        assert mc.uri_key("http://www.bbc.com/") == mc.uri_key("https://bbc.com")
+
+    def test_batch_dedup(self):
+        dt = datetime(2010, 4, 24, 19)
+        uris = ["http://bbc.com", "http://www.bbc.com/", "https://bbc.com/?utm_source=x"]
+
+        mc = CountingClient()
+        mc.get_memento_info_batch(uris, dt)
+        assert len(mc.calls) == 3
+
+        mc = CountingClient(canonicalizer=Canonicalizer(strip_params=TRACKING_PARAMS))
+        results = mc.get_memento_info_batch(uris, dt)
+        assert mc.calls == ["http://bbc.com"]
+        assert results == [MEMENTO_INFO] * 3
+
+    def test_cache_key(self):
+        dt = datetime(2010, 4, 24, 19)
+        cache = MementoCache()
+        mc = MementoClient(cache=cache, canonicalizer=Canonicalizer(strip_params=TRACKING_PARAMS))
+        cache.set(("memento_info", "com,bbc)/", MementoClient.convert_to_http_datetime(dt), mc.timegate_uri),
+                  MEMENTO_INFO)
+        # answered from the cache, without any requests
+        assert mc.get_memento_info("https://www.bbc.com/?utm_source=x", dt) is MEMENTO_INFO
+        assert cache.hits == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.cassette import Cassette, ReplaySession
+from memento_client.simulator import ArchiveSimulator, start_simulator
+from datetime import datetime
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+import requests
+
+
+class CassetteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "run.cassette")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_record_and_replay(self):
+        app = ArchiveSimulator(mementos=20, first_memento=datetime(2010, 1, 1))
+        server = start_simulator(app)
+        base = server.base_uri
+        kwargs = {"timegate_uri": base + "timegate/",
+                  "timemap_uri": base + "timemap/link/"}
+        uri = base + "origin/page"
+        dt = datetime(2010, 1, 9)
+        try:
+            cassette = Cassette(self.path, record=True, meta={"uris": [uri]})
+            mc = MementoClient(cassette=cassette, **kwargs)
+            info = mc.get_memento_info(uri, dt)
+            timemap = mc.get_timemap(uri)
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                MementoClient(cassette=cassette, **kwargs).session.head(
+                    "http://127.0.0.1:1/")
+            cassette.save()
+        finally:
+            server.shutdown()
+            server.server_close()
+        requests_made = sum(app.requests.values())
+        assert len(cassette) == requests_made + 1
+
+        # the server is gone, the cassette answers
+        cassette = Cassette(self.path)
+        assert cassette.meta == {"uris": [uri]}
+        assert len(cassette) == requests_made + 1
+        mc = MementoClient(cassette=cassette, **kwargs)
+        assert isinstance(mc.transport, ReplaySession)
+        assert mc.get_memento_info(uri, dt) == info
+        replayed = mc.get_timemap(uri)
+        assert len(replayed) == len(timemap) == 20
+        assert replayed.original_uri == timemap.original_uri
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            mc.session.head("http://127.0.0.1:1/")
+        # not recorded
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            mc.get_memento_info(uri, datetime(2010, 2, 1))
+
+    def test_speed(self):
+        cassette = Cassette()
+        cassette.add({"method": "HEAD", "uri": "http://a.example.org/",
+                      "headers": {"Accept-Datetime": "x"},
+                      "status_code": 302, "url": "http://a.example.org/",
+                      "response_headers": {"Location": "/b"},
+                      "elapsed": 0.5})
+        cassette.add({"method": "HEAD", "uri": "http://a.example.org/b",
+                      "headers": {"Accept-Datetime": "x"},
+                      "status_code": 200, "url": "http://a.example.org/b",
+                      "response_headers": {}, "elapsed": 1.5})
+        session = ReplaySession(cassette)
+        with mock.patch("time.sleep") as sleep:
+            response = session.head("http://a.example.org/",
+                                    headers={"accept-datetime": "x"},
+                                    allow_redirects=True)
+            assert sleep.call_count == 0
+        assert response.status_code == 200
+        assert response.url == "http://a.example.org/b"
+        assert [res.status_code for res in response.history] == [302]
+
+        cassette.speed = 2.0
+        with mock.patch("time.sleep") as sleep:
+            session.head("http://a.example.org/",
+                         headers={"Accept-Datetime": "x"},
+                         allow_redirects=True)
+            assert [call[0][0] for call in sleep.call_args_list] == [0.25, 0.75]
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                session.head("http://a.example.org/b",
+                             headers={"Accept-Datetime": "x"}, timeout=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
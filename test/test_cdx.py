@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.cdx import CDXIndex, CDXRecord, from_archive_timestamp
+from memento_client.timemap import to_timestamp
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+REPLAY_URI = "http://localhost:8080/collection/"
+TIMESTAMPS = ["20000620180259", "20050101000000", "20100424180000",
+              "20100424200000", "20150807200034"]
+
+
+def cdxj_line(surt, timestamp, url, status="200"):
+    return "%s %s %s" % (surt, timestamp, json.dumps(
+        {"url": url, "mime": "text/html", "status": status}))
+
+
+def cdx_line(surt, timestamp, url, status="200"):
+    return "%s %s %s text/html %s AAAA - - 1000 0 example.warc.gz" % (
+        surt, timestamp, url, status)
+
+
+def write_index(path, lines, header=None, newline=True):
+    # sorted bytewise, as by LC_ALL=C sort
+    lines = sorted(lines, key=lambda line: line.encode("utf-8"))
+    if header:
+        lines.insert(0, header)
+    with open(path, "wb") as f:
+        f.write("\n".join(lines).encode("utf-8"))
+        if newline:
+            f.write(b"\n")
+
+
+class CDXIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        lines = [cdxj_line("com,example)/", ts, "http://www.example.com/")
+                 for ts in TIMESTAMPS]
+        # neighbouring keys that must not match
+        lines.append(cdxj_line("com,example)/a", "20100101000000",
+                               "http://example.com/a"))
+        lines.append(cdxj_line("com,example)/ab", "20100101000000",
+                               "http://example.com/ab"))
+        lines.append(cdxj_line("com,example)/ab", "20110101000000",
+                               "http://example.com/ab", status="-"))
+        lines.append(cdxj_line("com,aaa)/", "20100101000000",
+                               "http://aaa.com/"))
+        self.path = os.path.join(self.dir, "index.cdxj")
+        write_index(self.path, lines, header="!meta {}", newline=False)
+        self.index = CDXIndex(self.path, REPLAY_URI)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.dir)
+
+    def test_parse(self):
+        record = CDXRecord.parse(cdx_line("com,example)/", "20100424",
+                                          "http://example.com/").encode())
+        assert record.original_uri == "http://example.com/"
+        assert record.status_code == 200
+        assert record.timestamp == to_timestamp(datetime(2010, 4, 24))
+        assert from_archive_timestamp("2010") == \
+            to_timestamp(datetime(2010, 1, 1))
+
+    def test_memento_info(self):
+        info = self.index.get_memento_info("https://example.com",
+                                           datetime(2010, 4, 24, 18, 59))
+        mementos = info["mementos"]
+        assert mementos["closest"]["uri"] == [
+            REPLAY_URI + "20100424180000/http://www.example.com/"]
+        assert mementos["closest"]["datetime"] == datetime(2010, 4, 24, 18)
+        assert mementos["closest"]["http_status_code"] == 200
+        assert mementos["prev"]["datetime"] == datetime(2005, 1, 1)
+        assert mementos["next"]["datetime"] == datetime(2010, 4, 24, 20)
+        assert mementos["first"]["datetime"] == datetime(2000, 6, 20, 18, 2, 59)
+        assert mementos["last"]["datetime"] == datetime(2015, 8, 7, 20, 0, 34)
+        assert info["timegate_uri"] == REPLAY_URI + "https://example.com"
+
+        # the earlier of two equally close mementos
+        mementos = self.index.get_memento_info(
+            "http://example.com/", datetime(2010, 4, 24, 19))["mementos"]
+        assert mementos["closest"]["datetime"] == datetime(2010, 4, 24, 18)
+
+        mementos = self.index.get_memento_info(
+            "http://example.com/", datetime(1999, 1, 1))["mementos"]
+        assert mementos["closest"]["datetime"] == datetime(2000, 6, 20, 18, 2, 59)
+        assert "prev" not in mementos
+        mementos = self.index.get_memento_info("http://example.com/")["mementos"]
+        assert mementos["closest"]["datetime"] == datetime(2015, 8, 7, 20, 0, 34)
+        assert "next" not in mementos
+
+        # the last line of the file, without a line break
+        mementos = self.index.get_memento_info(
+            "http://example.com/ab", datetime(2012, 1, 1))["mementos"]
+        assert mementos["closest"]["datetime"] == datetime(2011, 1, 1)
+        assert mementos["closest"]["http_status_code"] is None
+
+        info = self.index.get_memento_info("http://example.com/b")
+        assert "mementos" not in info
+        info = self.index.get_memento_info("http://zzz.com/")
+        assert "mementos" not in info
+
+    def test_timemap(self):
+        timemap = self.index.get_timemap("http://example.com/")
+        assert len(timemap) == len(TIMESTAMPS)
+        assert timemap.first[0] == REPLAY_URI + \
+            "20000620180259/http://www.example.com/"
+
+        timemap = self.index.get_timemap("http://example.com/",
+                                         datetime(2005, 1, 1),
+                                         datetime(2010, 4, 24, 18))
+        assert [dt for _, dt in timemap] == [
+            datetime(2005, 1, 1), datetime(2010, 4, 24, 18)]
+        assert len(self.index.get_timemap("http://example.com/a")) == 1
+
+    def test_several_files(self):
+        path = os.path.join(self.dir, "more.cdx")
+        write_index(path, [
+            cdx_line("com,example)/", "20100424190000", "http://example.com/"),
+            cdx_line("com,example)/", "20200101000000", "http://example.com/")],
+            header=" CDX N b a m s k r M S V g")
+        with CDXIndex.from_directory(self.dir, REPLAY_URI) as index:
+            assert len(index.files) == 2
+            mementos = index.get_memento_info(
+                "http://example.com/", datetime(2010, 4, 24, 19, 10))["mementos"]
+            assert mementos["closest"]["uri"] == [
+                REPLAY_URI + "20100424190000/http://example.com/"]
+            assert mementos["prev"]["datetime"] == datetime(2010, 4, 24, 18)
+            assert mementos["next"]["datetime"] == datetime(2010, 4, 24, 20)
+            assert mementos["last"]["datetime"] == datetime(2020, 1, 1)
+            assert len(index.get_timemap("http://example.com/")) == 7
+
+    def test_empty_file(self):
+        path = os.path.join(self.dir, "empty.cdxj")
+        open(path, "wb").close()
+        with CDXIndex(path, REPLAY_URI) as index:
+            assert "mementos" not in index.get_memento_info("http://example.com/")
+
+    def test_client(self):
+        # no session is needed, nothing is requested
+        mc = MementoClient(index=self.index, timegate_uri="http://invalid./",
+                           timemap_uri="http://invalid./")
+        info = mc.get_memento_info("http://example.com/",
+                                   datetime(2005, 2, 1))
+        assert info["mementos"]["closest"]["datetime"] == datetime(2005, 1, 1)
+
+        timemap = mc.get_timemap("http://example.com/")
+        assert len(timemap) == len(TIMESTAMPS)
+        assert mc.sync_timemap(timemap) == 0
+        older = timemap[:2]
+        assert mc.sync_timemap(older) == 3
+
+        mementos = list(mc.get_mementos_between("http://example.com/",
+                                                datetime(2010, 1, 1),
+                                                thin="day"))
+        assert [dt for _, dt in mementos] == [
+            datetime(2010, 4, 24, 18), datetime(2015, 8, 7, 20, 0, 34)]
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.memento_client import MementoClientException
+from memento_client.timemap import TimeMap
+import unittest
+from datetime import datetime
+
+try:
+    import numpy
+    from memento_client.columnar import timemap_to_numpy, timemap_to_arrow
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+MEMENTO_INFO = {
+    "original_uri": "http://www.cnn.com/",
+    "timegate_uri": "http://timetravel.mementoweb.org/timegate/http://www.cnn.com/",
+    "mementos": {
+        "closest": {"uri": ["http://web.archive.org/web/20100424190000/http://www.cnn.com/"],
+                    "datetime": datetime(2010, 4, 24, 19), "http_status_code": 200},
+        "first": {"uri": ["http://web.archive.org/web/20000620180259/http://cnn.com/"],
+                  "datetime": datetime(2000, 6, 20, 18, 2, 59)}}}
+
+
+class FakeBatchClient(MementoClient):
+
+    def get_memento_info(self, request_uri, accept_datetime=None, timeout=None, **kwargs):
+        self.calls = getattr(self, "calls", 0) + 1
+        if request_uri == "http://error.example.org/":
+            raise MementoClientException("error", {})
+        if request_uri == "http://empty.example.org/":
+            return {"original_uri": request_uri, "timegate_uri": self.timegate_uri + request_uri}
+        return MEMENTO_INFO
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class ColumnarTest(unittest.TestCase):
+
+    def test_batch(self):
+        uris = ["http://www.cnn.com/", "http://error.example.org/",
+                "http://empty.example.org/", "http://www.cnn.com/"]
+        mc = FakeBatchClient()
+        results = mc.get_memento_info_batch(uris, datetime(2010, 4, 24, 19))
+        assert results[0] is MEMENTO_INFO and results[3] is MEMENTO_INFO
+        assert isinstance(results[1], MementoClientException)
+        # the duplicate uri is only looked up once
+        assert mc.calls == 3
+
+        threaded = mc.get_memento_info_batch(uris, datetime(2010, 4, 24, 19), workers=2)
+        assert threaded[0] is MEMENTO_INFO
+        assert isinstance(threaded[1], MementoClientException)
+
+        with self.assertRaises(ValueError):
+            mc.get_memento_info_batch(uris, [datetime(2010, 4, 24, 19)])
+
+    def test_numpy_columns(self):
+        uris = ["http://www.cnn.com/", "http://error.example.org/", "http://empty.example.org/"]
+        columns = FakeBatchClient().get_memento_info_batch(uris, columns="numpy")
+
+        assert list(columns["request_uri"]) == uris
+        assert columns["closest_datetime"].dtype == numpy.dtype("datetime64[s]")
+        assert columns["closest_datetime"][0] == numpy.datetime64("2010-04-24T19:00:00")
+        assert numpy.isnat(columns["closest_datetime"][2])
+        assert list(columns["closest_http_status_code"]) == [200, 0, 0]
+        assert columns["error"][1].startswith("MementoClientException")
+        assert columns["error"][0] is None
+
+        # duplicate uris fill every row of their key, with workers too
+        columns = FakeBatchClient().get_memento_info_batch(uris + uris[:1], columns="numpy", workers=2)
+        assert list(columns["request_uri"]) == uris + uris[:1]
+        assert columns["closest_datetime"][3] == columns["closest_datetime"][0]
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_columns(self):
+        uris = ["http://www.cnn.com/", "http://empty.example.org/"]
+        table = FakeBatchClient().get_memento_info_batch(uris, columns="arrow")
+        assert table.num_rows == 2
+        assert table.column("first_uri").to_pylist() == [MEMENTO_INFO["mementos"]["first"]["uri"][0], None]
+        assert table.column("first_datetime").null_count == 1
+
+    def test_timemap_columns(self):
+        tm = TimeMap("http://www.cnn.com/")
+        tm.add("http://web.archive.org/web/20000620180259/http://cnn.com/", datetime(2000, 6, 20, 18, 2, 59))
+        tm.add("http://web.archive.org/web/20100424190000/http://cnn.com/", datetime(2010, 4, 24, 19))
+
+        columns = timemap_to_numpy(tm)
+        assert columns["datetime"][1] == numpy.datetime64("2010-04-24T19:00:00")
+        assert columns["uri"][0] == tm[0][0]
+        # the datetimes are a view on the TimeMap
+        assert not columns["datetime"].flags.owndata
+
+        if pyarrow is not None:
+            assert timemap_to_arrow(tm).num_rows == 2
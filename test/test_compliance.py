@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from memento_client.compliance import ComplianceScanner, COMPLIANT, \
+    NON_COMPLIANT, NO_DATA, PARTIAL, UNREACHABLE
+from memento_client.routing import ArchiveRouter
+from memento_client.simulator import ArchiveSimulator, start_simulator
+import json
+import unittest
+
+# nothing listens on port 1
+CLOSED = "http://127.0.0.1:1/timegate/"
+
+
+def plain_app(environ, start_response):
+    start_response("200 OK", [("Content-Length", "0")])
+    return [b""]
+
+
+class ComplianceScannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = [start_simulator(ArchiveSimulator()),
+                        start_simulator(ArchiveSimulator(error_rate=1.0)),
+                        start_simulator(plain_app)]
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def test_scan(self):
+        compliant, failing, plain = [server.base_uri + "timegate/"
+                                     for server in self.servers]
+        scanner = ComplianceScanner(probe_uris=["http://example.org/"],
+                                    samples=2, workers=4, timeout=5)
+        report = scanner.scan({"sim": {"name": "Simulator",
+                                       "timegate_uri": compliant,
+                                       "memento_status": True},
+                               "failing": {"name": "Failing",
+                                           "timegate_uri": failing,
+                                           "memento_status": True},
+                               "plain": {"name": "Plain",
+                                         "timegate_uri": plain,
+                                         "memento_status": False},
+                               "closed": {"name": "Closed",
+                                          "timegate_uri": CLOSED,
+                                          "memento_status": True}})
+        # machine readable
+        report = json.loads(json.dumps(report))
+        entries = report["timegates"]
+
+        entry = entries[compliant]
+        assert entry["compliance"] == COMPLIANT
+        assert entry["id"] == "sim" and entry["name"] == "Simulator"
+        assert [p["type"] for p in entry["probes"]] == \
+            ["timegate", "memento", "memento"]
+        assert entry["requests"] == 1 and entry["errors"] == 0
+        assert entry["latency"] > 0
+
+        assert entries[failing]["compliance"] == NON_COMPLIANT
+        assert entries[failing]["errors"] == 1
+        assert entries[failing]["probes"][0]["status_code"] == 503
+        assert entries[plain]["compliance"] == NON_COMPLIANT
+        assert entries[plain]["errors"] == 0
+        assert entries[CLOSED]["compliance"] == UNREACHABLE
+        assert entries[CLOSED]["error_rate"] == 1.0
+
+        # the router can be seeded from the report
+        router = ArchiveRouter([compliant, failing], exploration=0)
+        router.load_stats(entries)
+        stats = router.stats()
+        assert stats[compliant]["latency"] == entry["latency"]
+        assert stats[failing]["error_rate"] == 1.0
+        assert router.choose() == compliant
+
+    def test_no_data(self):
+        simulator = ArchiveSimulator()
+
+        def app(environ, start_response):
+            # a TimeGate without mementos of missing.example.org
+            if "missing.example.org" in environ.get("PATH_INFO", ""):
+                start_response("404 Not Found",
+                               [("Vary", "accept-datetime"),
+                                ("Content-Length", "0")])
+                return [b""]
+            return simulator(environ, start_response)
+
+        self.servers.append(start_simulator(app))
+        self.servers.append(start_simulator(ArchiveSimulator(mementos=0)))
+        partial, empty = [server.base_uri + "timegate/"
+                          for server in self.servers[-2:]]
+        scanner = ComplianceScanner(probe_uris=["http://example.org/",
+                                                "http://missing.example.org/"],
+                                    samples=1, timeout=5)
+        # the simulator answers unknown paths with a plain 404
+        plain_404 = self.servers[0].base_uri + "missing/"
+        report = scanner.scan([partial, empty, plain_404])
+        entries = report["timegates"]
+
+        # the 404 probe is not counted against the TimeGate
+        entry = entries[partial]
+        assert entry["compliance"] == COMPLIANT
+        assert [p["compliant"] for p in entry["probes"]] == [True, True, None]
+        assert entry["probes"][2]["status_code"] == 404
+        assert entry["errors"] == 0
+        assert entries[empty]["compliance"] == NO_DATA
+        # a 404 without the TimeGate headers still is
+        assert entries[plain_404]["compliance"] == NON_COMPLIANT
+
+    def test_classify(self):
+        def probe(probe_type, compliant, status_code=200):
+            return {"type": probe_type, "compliant": compliant,
+                    "status_code": status_code}
+
+        assert ComplianceScanner.classify([
+            probe("timegate", True), probe("memento", False)]) == PARTIAL
+        assert ComplianceScanner.classify([
+            probe("timegate", False, None)]) == UNREACHABLE
+        assert ComplianceScanner.classify([
+            probe("timegate", None, 404)]) == NO_DATA
+        assert ComplianceScanner.classify([
+            probe("timegate", None, 404), probe("timegate", False)]) == \
+            NON_COMPLIANT
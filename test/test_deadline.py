@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.deadline import Deadline
+from memento_client.memento_client import MementoDeadlineExceeded
+from memento_client.simulator import ArchiveSimulator, constant, start_simulator
+import unittest
+import time
+from datetime import datetime
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_deadline(self):
+        now = [100.0]
+        deadline = Deadline(2.0, clock=lambda: now[0])
+        assert deadline.timeout(9) == 2.0
+        assert deadline.timeout(1) == 1
+        now[0] = 101.5
+        assert deadline.timeout() == 0.5
+        assert not deadline.expired()
+        now[0] = 103.0
+        assert deadline.expired()
+        assert deadline.remaining() == 0.0
+
+    def lookup(self, app, deadline, **kwargs):
+        server = start_simulator(app)
+        try:
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/")
+            uri_r = server.base_uri + "origin/page"
+            start = time.time()
+            try:
+                return mc.get_memento_info(uri_r, datetime(2010, 4, 24), deadline=deadline, **kwargs), \
+                    time.time() - start, server.base_uri
+            except MementoDeadlineExceeded as e:
+                return e, time.time() - start, server.base_uri
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_within_deadline(self):
+        info, _, _ = self.lookup(ArchiveSimulator(timegate_redirects=2), 5.0)
+        assert info["mementos"]["closest"]["uri"]
+        assert "partial" not in info
+
+    def test_slow_timegate(self):
+        app = ArchiveSimulator(latency={"timegate": constant(2.0)})
+        e, elapsed, base = self.lookup(app, 0.5)
+        assert isinstance(e, MementoDeadlineExceeded)
+        assert elapsed < 1.5
+        # what was known before the deadline
+        info = e.data["memento_info"]
+        assert info["original_uri"] == base + "origin/page"
+        assert info["timegate_uri"] == base + "timegate/" + base + "origin/page"
+
+        info, elapsed, base = self.lookup(app, 0.5, partial=True)
+        assert elapsed < 1.5
+        assert info["partial"]
+        assert info["timegate_uri"] == base + "timegate/" + base + "origin/page"
+        assert "mementos" not in info
+
+    def test_redirect_chain(self):
+        # each hop is within any per request timeout, but not the chain
+        app = ArchiveSimulator(latency={"timegate": constant(0.2)}, timegate_redirects=10)
+        e, elapsed, _ = self.lookup(app, 0.7)
+        assert isinstance(e, MementoDeadlineExceeded)
+        assert elapsed < 1.5
+        assert app.requests["timegate"] < 6
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.dnscache import DNSCache, DNS_CACHE, CachedDNSAdapter, \
+    CachedDNSHTTPConnection
+import unittest
+import socket
+import threading
+import mock
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Listener(object):
+    """
+    Accepts connections on localhost, and counts them.
+    """
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(5)
+        self.port = self.sock.getsockname()[1]
+        self.accepted = []
+        thread = threading.Thread(target=self.accept)
+        thread.daemon = True
+        thread.start()
+
+    def accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except (socket.error, OSError):
+                break
+            self.accepted.append(conn)
+
+    def close(self):
+        self.sock.close()
+        for conn in self.accepted:
+            conn.close()
+
+
+class DNSCacheTest(unittest.TestCase):
+
+    def test_resolve(self):
+        infos = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.0.2.1", 80))]
+        cache = DNSCache(ttl=60)
+        with mock.patch("socket.getaddrinfo", return_value=infos) as getaddrinfo:
+            assert cache.resolve("archive.example.org") == "192.0.2.1"
+            assert cache.resolve("archive.example.org") == "192.0.2.1"
+            assert getaddrinfo.call_count == 1
+            assert "archive.example.org" in cache
+
+            cache.invalidate("archive.example.org")
+            assert "archive.example.org" not in cache
+            cache.resolve("archive.example.org")
+            assert getaddrinfo.call_count == 2
+
+        with mock.patch("time.time", return_value=0):
+            cache.ttl = 0
+            cache.clear()
+            with mock.patch("socket.getaddrinfo", return_value=infos) as getaddrinfo:
+                cache.resolve("archive.example.org")
+                cache.resolve("archive.example.org")
+                # expired at once
+                assert getaddrinfo.call_count == 2
+
+    def test_addresses(self):
+        listener = Listener()
+        getaddrinfo = socket.getaddrinfo
+
+        def resolve(host, port, *args):
+            if host == "archive.example.org":
+                # nothing listens on 127.0.0.2
+                return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))
+                        for address in ("127.0.0.2", "127.0.0.2", "127.0.0.1")]
+            return getaddrinfo(host, port, *args)
+
+        class Connection(CachedDNSHTTPConnection):
+            dns_cache = DNSCache()
+
+        try:
+            with mock.patch("socket.getaddrinfo", side_effect=resolve):
+                cache = Connection.dns_cache
+                assert cache.addresses("archive.example.org", listener.port) == \
+                    ["127.0.0.2", "127.0.0.1"]
+                assert cache.resolve("archive.example.org") == "127.0.0.2"
+
+                # each address is tried in turn, and the one that accepts
+                # is tried first from then on
+                conn = Connection("archive.example.org", listener.port, timeout=5)
+                conn.connect()
+                assert conn.sock.getpeername() == ("127.0.0.1", listener.port)
+                assert conn.host == "archive.example.org"
+                conn.close()
+                assert cache.addresses("archive.example.org") == ["127.0.0.1", "127.0.0.2"]
+
+                # forgotten when none accepts
+                sock = socket.socket()
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+                sock.close()
+                conn = Connection("archive.example.org", port, timeout=5)
+                with self.assertRaises(Exception):
+                    conn.connect()
+                assert "archive.example.org" not in cache
+        finally:
+            listener.close()
+
+    def test_warm_up(self):
+        listener = Listener()
+        try:
+            base = "http://127.0.0.1:%d/" % listener.port
+            mc = MementoClient(timegate_uri=base + "timegate/", timemap_uri=base + "timemap/link/")
+            assert isinstance(mc.session.get_adapter(base), CachedDNSAdapter)
+
+            DNS_CACHE.invalidate("127.0.0.1")
+            errors = mc.warm_up(connections=2)
+            assert errors == {base: None}
+            assert "127.0.0.1" in DNS_CACHE
+
+            # the connections are open and back in the pool of the lookups
+            pool = mc.transport.pool_manager.connection_from_url(base)
+            assert pool.num_connections == 2
+            for _ in range(50):
+                if len(listener.accepted) == 2:
+                    break
+                threading.Event().wait(0.01)
+            assert len(listener.accepted) == 2
+        finally:
+            listener.close()
+
+    def test_request(self):
+        def app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            return [environ["HTTP_HOST"].encode("utf-8")]
+
+        server = make_server("127.0.0.1", 0, app, handler_class=QuietHandler)
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        try:
+            DNS_CACHE.invalidate("127.0.0.1")
+            mc = MementoClient()
+            response = mc.session.get("http://127.0.0.1:%d/" % server.server_port, timeout=5)
+            # the Host header is not changed by connecting to the cached address
+            assert response.text == "127.0.0.1:%d" % server.server_port
+            assert "127.0.0.1" in DNS_CACHE
+        finally:
+            thread.join()
+            server.server_close()
+
+    def test_warm_up_error(self):
+        mc = MementoClient(timegate_uri="http://host.invalid/timegate/",
+                           timemap_uri="http://host.invalid/timemap/link/")
+        errors = mc.warm_up()
+        assert list(errors) == ["http://host.invalid/"]
+        assert errors["http://host.invalid/"] is not None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.hedging import Hedger, MIN_SAMPLES
+from memento_client.simulator import ArchiveSimulator, constant, start_simulator
+from memento_client.transport import PoolTransport
+import unittest
+import time
+from datetime import datetime
+
+
+def answer(value, seconds=0.0):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def fail(seconds=0.0):
+    def call():
+        time.sleep(seconds)
+        raise ValueError("failed")
+    return call
+
+
+class Response(object):
+
+    def __init__(self, status_code=302):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class HedgerTest(unittest.TestCase):
+
+    def test_no_hedge_when_fast(self):
+        hedger = Hedger("http://mirror.example.org/timegate/", delay=0.5)
+        assert hedger.run(answer("primary"), answer("secondary")) == ("primary", False)
+        assert hedger.hedged == 0
+
+    def test_hedge_when_slow(self):
+        hedger = Hedger("http://mirror.example.org/timegate/", delay=0.05)
+        start = time.time()
+        assert hedger.run(answer("primary", 1.0), answer("secondary")) == ("secondary", True)
+        assert time.time() - start < 0.5
+        assert hedger.stats()["secondary_wins"] == 1
+
+        # the primary still wins if it answers first
+        assert hedger.run(answer("primary", 0.1), answer("secondary", 1.0)) == ("primary", False)
+
+    def test_errors(self):
+        hedger = Hedger("http://mirror.example.org/timegate/", delay=0.05, burst=10, max_extra=1.0)
+        # the answer of one is taken when the other fails
+        assert hedger.run(fail(0.1), answer("secondary", 0.2)) == ("secondary", True)
+        assert hedger.run(answer("primary", 0.2), fail()) == ("primary", False)
+        with self.assertRaises(ValueError):
+            hedger.run(fail(0.1), fail())
+        with self.assertRaises(ValueError):
+            hedger.run(fail(), answer("secondary"))
+
+    def test_server_errors(self):
+        hedger = Hedger("http://mirror.example.org/timegate/", delay=0.05, burst=10, max_extra=1.0)
+        # a 5xx of the primary loses the race, like an error
+        error, found = Response(503), Response(302)
+        assert hedger.run(answer(error, 0.1), answer(found, 0.2)) == (found, True)
+        assert error.closed and not found.closed
+
+        found, error = Response(302), Response(500)
+        assert hedger.run(answer(found, 0.2), answer(error)) == (found, False)
+        time.sleep(0.1)
+        assert error.closed
+
+        # the 5xx of the primary is only returned if both fail
+        errors = Response(503), Response(503)
+        assert hedger.run(answer(errors[0], 0.1), answer(errors[1])) == (errors[0], False)
+        assert errors[1].closed and not errors[0].closed
+        error = Response(503)
+        assert hedger.run(answer(error, 0.1), fail()) == (error, False)
+
+        # as with an error, a 5xx within the delay is not hedged
+        error = Response(503)
+        assert hedger.run(answer(error), answer(Response())) == (error, False)
+        assert hedger.hedged == 4
+
+    def test_budget(self):
+        hedger = Hedger("http://mirror.example.org/timegate/", delay=0.0, max_extra=0.25, burst=1)
+        hedged = [hedger.run(answer("primary", 0.02), answer("secondary"))[1] for _ in range(12)]
+        # one at the start, then one in four
+        assert hedger.hedged == sum(hedged) == 3
+
+    def test_loser_closed(self):
+        hedger = Hedger("http://mirror.example.org/timegate/", delay=0.05)
+        slow, fast = Response(), Response()
+        assert hedger.run(answer(slow, 0.3), answer(fast)) == (fast, True)
+        time.sleep(0.5)
+        assert slow.closed and not fast.closed
+
+        hedger = Hedger("http://mirror.example.org/timegate/", delay=0.05)
+        slow, fast = Response(), Response()
+        assert hedger.run(answer(fast, 0.1), answer(slow, 0.3)) == (fast, False)
+        time.sleep(0.5)
+        assert slow.closed and not fast.closed
+
+    def test_observed_delay(self):
+        hedger = Hedger("http://mirror.example.org/timegate/", initial_delay=2.0)
+        assert hedger.delay() == 2.0
+        for i in range(100):
+            hedger.record(i / 100.0)
+        assert hedger.delay() == 0.95
+        assert MIN_SAMPLES <= 100
+
+    def test_client(self):
+        slow = start_simulator(ArchiveSimulator(latency={"timegate": constant(1.0)}))
+        mirror = start_simulator(ArchiveSimulator())
+        try:
+            hedger = Hedger(mirror.base_uri + "timegate/", delay=0.1)
+            mc = MementoClient(timegate_uri=slow.base_uri + "timegate/", check_native_timegate=False,
+                               hedger=hedger)
+            uri_r = slow.base_uri + "origin/page"
+            start = time.time()
+            info = mc.get_memento_info(uri_r, datetime(2010, 4, 24))
+            assert time.time() - start < 0.9
+            assert info["timegate_uri"] == mirror.base_uri + "timegate/" + uri_r
+            assert info["mementos"]["closest"]["uri"][0].startswith(mirror.base_uri)
+            assert mc.worker_kwargs()["hedger"] is hedger
+            assert mc.hedgeTransport is mc.transport
+
+            # a requests session is not shared by the primary and the hedge
+            mc = MementoClient(timegate_uri=slow.base_uri + "timegate/", check_native_timegate=False,
+                               hedger=Hedger(mirror.base_uri + "timegate/", delay=0.1),
+                               transport="requests")
+            assert isinstance(mc.hedgeTransport, PoolTransport)
+            info = mc.get_memento_info(uri_r, datetime(2010, 4, 24))
+            assert info["timegate_uri"] == mirror.base_uri + "timegate/" + uri_r
+            mc.close()
+        finally:
+            for server in (slow, mirror):
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
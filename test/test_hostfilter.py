@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.hostfilter import HostFilter
+from memento_client.simulator import ArchiveSimulator, start_simulator
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+CDXJ = b"""!meta {}
+com,example)/ 20100424190000 {"url": "http://www.example.com/"}
+com,example)/page 20100424190000 {"url": "http://example.com/page"}
+org,archive,web)/ 20100424190000 {"url": "http://web.archive.org/"}
+"""
+
+
+class HostFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_filter(self):
+        hosts = HostFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            hosts.add("http://host%d.example.org/page" % i)
+        assert len(hosts) == 1000
+        # no false negatives
+        for i in range(1000):
+            assert "https://www.host%d.example.org/" % i in hosts
+        false_positives = sum("http://other%d.example.org/" % i in hosts
+                              for i in range(10000))
+        assert false_positives < 300
+
+    def test_from_cdx_save_load(self):
+        path = os.path.join(self.dir, "index.cdxj")
+        with open(path, "wb") as f:
+            f.write(CDXJ)
+        hosts = HostFilter.from_cdx([path])
+        assert len(hosts) == 2 and not hosts.authoritative
+        assert "https://example.com/other" in hosts
+        assert "http://web.archive.org/web/" in hosts
+        assert "http://example.org/" not in hosts
+
+        filter_path = os.path.join(self.dir, "hosts.bloom")
+        hosts.save(filter_path)
+        loaded = HostFilter.load(filter_path, authoritative=True)
+        assert loaded.authoritative
+        assert loaded.num_bits == hosts.num_bits and len(loaded) == 2
+        assert "https://example.com/other" in loaded
+        assert "http://example.org/" not in loaded
+
+        # added in memory only
+        loaded.add("http://example.org/")
+        assert "http://example.org/" in loaded
+        assert "http://example.org/" not in HostFilter.load(filter_path)
+
+        with open(filter_path, "wb") as f:
+            f.write(b"not a filter" * 10)
+        with self.assertRaises(ValueError):
+            HostFilter.load(filter_path)
+
+    def test_client(self):
+        app = ArchiveSimulator()
+        server = start_simulator(app)
+        try:
+            dt = datetime(2010, 4, 24, 19)
+            uncaptured = "http://uncaptured.example.org/"
+
+            # the TimeGate may have mementos of hosts the filter has not
+            hosts = HostFilter(100)
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/",
+                               check_native_timegate=False, host_filter=hosts)
+            mc.get_memento_info(uncaptured, dt)
+            assert app.requests["timegate"] == 1
+
+            hosts = HostFilter(100, authoritative=True)
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/",
+                               check_native_timegate=False, host_filter=hosts)
+            info = mc.get_memento_info(uncaptured, dt)
+            assert info == {"original_uri": uncaptured,
+                            "timegate_uri": server.base_uri + "timegate/" + uncaptured}
+            assert app.requests["timegate"] == 1
+
+            uri = server.base_uri + "origin/page"
+            hosts.add(uri)
+            assert "mementos" in mc.get_memento_info(uri, dt)
+            assert app.requests["timegate"] == 2
+            # the hosts of the mementos found are added
+            assert len(hosts) == 2
+
+            # the TimeGate uri is the one a direct lookup requests
+            mc = MementoClient(direct=server.base_uri + "memento/{timestamp}/{uri}",
+                               host_filter=hosts)
+            requests_made = sum(app.requests.values())
+            info = mc.get_memento_info(uncaptured, dt)
+            assert info["timegate_uri"] == server.base_uri + "memento/" + uncaptured
+            assert sum(app.requests.values()) == requests_made
+        finally:
+            server.shutdown()
+            server.server_close()
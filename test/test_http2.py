@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.server import ThreadingWSGIServer
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+import unittest
+import threading
+import requests
+
+try:
+    from memento_client.http2 import HTTP2Session, HTTP2Response
+except ImportError:
+    HTTP2Session = None
+
+LINK_TIMEMAP = '<http://www.cnn.com/>; rel="original",' + \
+    '<http://web.archive.org/web/20150807200034/http://www.cnn.com/>' + \
+    '; rel="memento"; datetime="Fri, 07 Aug 2015 20:00:34 GMT",' + \
+    '<http://web.archive.org/web/20000620180259/http://cnn.com/>' + \
+    '; rel="first memento"; datetime="Tue, 20 Jun 2000 18:02:59 GMT"'
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+def app(environ, start_response):
+    path = environ["PATH_INFO"]
+    if path == "/redirect":
+        start_response("302 Found", [("Location", "/"), ("Content-Length", "0")])
+        return [b""]
+    if path.startswith("/timemap/link/"):
+        body = LINK_TIMEMAP.encode("utf-8")
+        start_response("200 OK", [("Content-Type", "application/link-format"),
+                                  ("Content-Length", str(len(body)))])
+        return [body]
+    body = b"ok"
+    start_response("200 OK", [("Link", '<http://www.cnn.com/>; rel="original"'),
+                              ("Content-Length", str(len(body)))])
+    return [body]
+
+
+@unittest.skipIf(HTTP2Session is None, "httpx is not installed")
+class HTTP2Test(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server("127.0.0.1", 0, app, server_class=ThreadingWSGIServer,
+                                 handler_class=QuietHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.base = "http://127.0.0.1:%d/" % cls.server.server_port
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_head_and_get(self):
+        with HTTP2Session() as session:
+            response = session.head(self.base)
+            assert isinstance(response, HTTP2Response)
+            assert response.status_code == 200
+            assert response.headers.get("link") == '<http://www.cnn.com/>; rel="original"'
+            # no HTTP/2 over plain http, so HTTP/1.1 is used
+            assert response.http_version.startswith("HTTP/1")
+            assert response.request.method == "HEAD"
+
+            response = session.head(self.base + "redirect")
+            assert response.status_code == 302
+            assert response.history == []
+
+            response = session.get(self.base + "redirect")
+            assert response.status_code == 200
+            assert response.url == self.base
+            assert [res.status_code for res in response.history] == [302]
+            assert response.text == "ok"
+
+            response = session.get(self.base, stream=True)
+            assert b"".join(response.iter_content(chunk_size=1)) == b"ok"
+
+    def test_errors(self):
+        with HTTP2Session() as session:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                session.head("http://127.0.0.1:1/")
+            with self.assertRaises(requests.exceptions.InvalidSchema):
+                session.head("ftp://127.0.0.1/")
+
+    def test_client(self):
+        mc = MementoClient(http2=True, timegate_uri=self.base + "timegate/",
+                           timemap_uri=self.base + "timemap/link/")
+        assert isinstance(mc.session, HTTP2Session)
+        assert mc.worker_kwargs()["http2"]
+
+        # the workers share the session, and only its owner closes it
+        worker = MementoClient(**mc.worker_kwargs())
+        assert worker.session is worker.transport is mc.session
+        worker.close()
+        assert not mc.session.client.is_closed
+
+        response = MementoClient.request_head(self.base, session=mc.session)
+        assert response.status_code == 200
+
+        tm = mc.get_timemap("http://www.cnn.com/")
+        assert len(tm) == 2
+        assert tm.original_uri == "http://www.cnn.com/"
+
+        assert mc.warm_up() == {self.base: None}
+        mc.close()
+        assert mc.session.client.is_closed
+
+
+if __name__ == '__main__':
+    unittest.main()
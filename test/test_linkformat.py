@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.linkformat import LinkParser, parse_link, iter_links
+import unittest
+
+LINK_TIMEMAP = u'<http://www.cnn.com/>; rel="original",\n' + \
+    u'<http://timetravel.mementoweb.org/timegate/http://www.cnn.com/>; rel="timegate",\n' + \
+    u'<http://web.archive.org/web/20150807200034/http://www.cnn.com/a,b>' + \
+    u'; rel="memento"; datetime="Fri, 07 Aug 2015 20:00:34 GMT",\n' + \
+    u'<http://web.archive.org/web/20000620180259/http://cnn.com/café>' + \
+    u'; rel="FIRST memento"; datetime="Tue, 20 Jun 2000 18:02:59 GMT",\n' + \
+    u'<http://tm.example.org/2/http://www.cnn.com/>; rel="timemap"' + \
+    u'; type="application/link-format"; from="Wed, 12 Sep 2001 00:00:00 GMT"\n'
+
+
+class LinkFormatTest(unittest.TestCase):
+
+    def test_parse_link(self):
+        uri, params = parse_link(
+            ' <http://a.example.org/> ; rel="first  memento"; datetime='
+            '"Tue, 20 Jun 2000 18:02:59 GMT"; type=text/html')
+        assert uri == "http://a.example.org/"
+        assert params == {"rel": ["first", "memento"],
+                          "datetime": ["Tue, 20 Jun 2000 18:02:59 GMT"],
+                          "type": ["text/html"]}
+
+        self.assertRaises(ValueError, parse_link, 'http://a.example.org/')
+        self.assertRaises(ValueError, parse_link,
+                          '<http://a.example.org/>; rel')
+
+    def test_same_as_parse_link_header(self):
+        expected = MementoClient.parse_link_header(LINK_TIMEMAP)
+        links = dict(iter_links([LINK_TIMEMAP.encode("utf-8")]))
+        assert links == expected
+
+    def test_any_chunk_size(self):
+        expected = list(iter_links([LINK_TIMEMAP]))
+        assert len(expected) == 5
+        content = LINK_TIMEMAP.encode("utf-8")
+        # every split point: inside uris, quoted values and utf-8 sequences
+        for size in range(1, 40):
+            chunks = [content[i:i + size]
+                      for i in range(0, len(content), size)]
+            assert list(iter_links(chunks)) == expected
+
+    def test_feed_bounded(self):
+        parser = LinkParser()
+        content = LINK_TIMEMAP.encode("utf-8")
+        links = []
+        for i in range(len(content)):
+            links.extend(parser.feed(content[i:i + 1]))
+            # only the link being parsed is buffered
+            assert len(parser._buffer) < 150
+        links.extend(parser.close())
+        assert len(links) == 5
+
+    def test_truncated(self):
+        parser = LinkParser()
+        parser.feed(b'<http://a.example.org/>; rel="original", <http://b.ex')
+        self.assertRaises(ValueError, parser.close)
+
+        assert LinkParser().close() == []
+
+
+if __name__ == '__main__':
+    unittest.main()
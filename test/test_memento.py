@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from memento_client import MementoClient
 from memento_client.memento_client import MementoClientException
+from memento_client.cache import MementoCache
+from memento_client.trace import start_trace, NULL_TRACE
 from memento_test.server import application as memento_test_app
 from werkzeug.test import Client
 from werkzeug.wrappers import BaseResponse
@@ -537,3 +539,53 @@ class MementoTest(unittest.TestCase):
         assert mc.get_memento_info(req_url, None, req_uri_response=org_res,
                                    org_response=org_res, tg_response=tg_res).get("mementos") is None
 
+    def test_get_memento_info_cache(self):
+
+        req_url, org_res, tg_res = self.create_mock_responses("/", "/tg/http://www.bbc.com",
+                                                              "native_tg_url", "", "Location")
+        dt = datetime(2010, 4, 24, 19)
+        mc = MementoClient(cache=MementoCache())
+        m_info = mc.get_memento_info(req_url, dt, req_uri_response=org_res,
+                                     org_response=org_res, tg_response=tg_res)
+        self.validate_memento_info(m_info.get("mementos"))
+
+        # answered from the cache, without any requests
+        assert mc.get_memento_info(req_url, dt) is m_info
+        assert mc.cache.hits == 1
+
+    def test_get_memento_info_trace(self):
+
+        class TraceHandler(logging.Handler):
+            def __init__(self):
+                logging.Handler.__init__(self)
+                self.events = []
+
+            def emit(self, record):
+                self.events.append(record.memento_trace)
+
+        trace_logger = logging.getLogger("memento_client.trace")
+        level = trace_logger.level
+        handler = TraceHandler()
+
+        trace_logger.setLevel(logging.WARNING)
+        assert start_trace("http://www.bbc.com", None) is NULL_TRACE
+
+        trace_logger.setLevel(logging.DEBUG)
+        trace_logger.addHandler(handler)
+        try:
+            req_url, org_res, tg_res = self.create_mock_responses("/", "/tg/http://www.bbc.com",
+                                                                  "native_tg_url", "", "Location")
+            mc = MementoClient()
+            m_info = mc.get_memento_info(req_url, None, req_uri_response=org_res,
+                                         org_response=org_res, tg_response=tg_res)
+        finally:
+            trace_logger.removeHandler(handler)
+            trace_logger.setLevel(level)
+
+        # one event per lookup, with every hop
+        assert len(handler.events) == 1
+        event = handler.events[0]
+        assert event["result"] is m_info
+        assert [hop["stage"] for hop in event["hops"]] == \
+            ["original", "native_timegate", "timegate", "timegate"]
+        assert event["hops"][-1]["status_code"] == 302
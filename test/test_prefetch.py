@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.cache import MementoCache
+from memento_client.prefetch import Prefetcher
+import unittest
+import threading
+import time
+from datetime import datetime
+
+
+class FakeClient(object):
+
+    calls = []
+    release = threading.Event()
+
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def get_memento_info(self, request_uri, accept_datetime):
+        FakeClient.release.wait(5)
+        FakeClient.calls.append((request_uri, accept_datetime))
+        self.cache.set((request_uri, accept_datetime), {"original_uri": request_uri})
+
+
+class PrefetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        FakeClient.calls = []
+        FakeClient.release.clear()
+
+    def test_prefetch(self):
+        cache = MementoCache()
+        prefetcher = Prefetcher(FakeClient, {"cache": cache}, budget=2, workers=1)
+        dt = datetime(2010, 4, 24, 19)
+
+        assert prefetcher.submit("http://www.cnn.com/", dt)
+        # already pending
+        assert not prefetcher.submit("http://www.cnn.com/", dt)
+
+        FakeClient.release.set()
+        prefetcher.join()
+        assert FakeClient.calls == [("http://www.cnn.com/", dt)]
+        assert cache.get(("http://www.cnn.com/", dt)) is not None
+        prefetcher.close()
+
+    def test_budget(self):
+        prefetcher = Prefetcher(FakeClient, {"cache": MementoCache()}, budget=2, workers=0)
+        dt = datetime(2010, 4, 24, 19)
+
+        assert prefetcher.submit("http://www.cnn.com/1", dt)
+        assert prefetcher.submit("http://www.cnn.com/2", dt)
+        assert not prefetcher.submit("http://www.cnn.com/3", dt)
+        assert prefetcher.dropped == 1
+
+    def test_close(self):
+        prefetcher = Prefetcher(FakeClient, {"cache": MementoCache()}, budget=2, workers=1)
+        threads = list(prefetcher._threads)
+        dt = datetime(2010, 4, 24, 19)
+        assert prefetcher.submit("http://www.cnn.com/1", dt)
+        assert prefetcher.submit("http://www.cnn.com/2", dt)
+        while prefetcher._queue.qsize() > 1:
+            time.sleep(0.01)
+
+        # does not wait for the lookup being resolved
+        start = time.time()
+        prefetcher.close()
+        assert time.time() - start < 1
+        assert not prefetcher.submit("http://www.cnn.com/3", dt)
+
+        FakeClient.release.set()
+        threads[0].join(5)
+        assert not threads[0].is_alive()
+        # the lookup not started is dropped
+        assert FakeClient.calls == [("http://www.cnn.com/1", dt)]
+
+    def test_client_prefetch(self):
+        mc = MementoClient(prefetch=4, prefetch_workers=0)
+        assert isinstance(mc.cache, MementoCache)
+        assert mc.prefetcher.budget == 4
+        assert mc.prefetcher.client_kwargs["cache"] is mc.cache
+        assert MementoClient().prefetcher is None
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.routing import ArchiveRouter
+import unittest
+import mock
+import requests
+
+ARCHIVE_LIST = b'''<?xml version="1.0" encoding="UTF-8"?>
+<links>
+  <link id="ia" longname="Internet Archive">
+    <timegate uri="http://web.archive.org/web/"/>
+    <archive memento-status="yes"/>
+  </link>
+  <link id="pt" longname="Arquivo.pt">
+    <timegate uri="http://arquivo.pt/wayback/"/>
+    <archive memento-status="yes"/>
+  </link>
+  <link id="old" longname="Not Compliant">
+    <timegate uri="http://old.example.org/tg/"/>
+    <archive memento-status="no"/>
+  </link>
+</links>'''
+
+FAST = "http://fast.example.org/tg/"
+SLOW = "http://slow.example.org/tg/"
+
+
+class ArchiveRouterTest(unittest.TestCase):
+
+    def test_choose(self):
+        router = ArchiveRouter([FAST, SLOW], exploration=0, seed=1)
+
+        # TimeGates without statistics are tried first
+        first = router.choose()
+        router.record(first, 0.1 if first == FAST else 0.5)
+        second = router.choose()
+        assert second != first
+        router.record(second, 0.1 if second == FAST else 0.5)
+
+        assert router.choose() == FAST
+
+        # errors make a fast TimeGate more expensive than a slow one
+        for _ in range(10):
+            router.record(FAST, 0.1, error=True)
+        assert router.choose() == SLOW
+
+        stats = router.stats()
+        assert stats[FAST]["requests"] == 11
+        assert stats[FAST]["errors"] == 10
+        assert stats[FAST]["error_rate"] > 0.8
+
+        # unknown TimeGates are ignored
+        router.record("http://unknown.example.org/", 1.0)
+        assert "http://unknown.example.org/" not in router.stats()
+
+        with self.assertRaises(ValueError):
+            ArchiveRouter([])
+
+    def test_exploration(self):
+        router = ArchiveRouter([FAST, SLOW], exploration=1.0, seed=1)
+        router.record(FAST, 0.1)
+        router.record(SLOW, 2.0)
+        assert set(router.choose() for _ in range(50)) == set([FAST, SLOW])
+
+    def test_load_stats(self):
+        router = ArchiveRouter([FAST, SLOW], exploration=0)
+        router.load_stats({FAST: {"latency": 0.1, "error_rate": 0.0},
+                           SLOW: {"latency": 1.0, "error_rate": 0.0}})
+        assert router.choose() == FAST
+
+    def test_from_archive_list(self):
+        response = mock.Mock(content=ARCHIVE_LIST)
+        with mock.patch("memento_client.utils.requests.get", return_value=response):
+            router = ArchiveRouter.from_archive_list()
+        assert sorted(router.stats()) == ["http://arquivo.pt/wayback/", "http://web.archive.org/web/"]
+
+    def test_client_routing(self):
+        router = ArchiveRouter([FAST], exploration=0)
+        mc = MementoClient(router=router, check_native_timegate=False)
+
+        with mock.patch.object(MementoClient, "request_head",
+                               side_effect=requests.exceptions.ConnectTimeout()):
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                mc.get_memento_info("http://www.cnn.com/", req_uri_response=mock.Mock(headers={}))
+
+        assert router.stats()[FAST]["errors"] == 1
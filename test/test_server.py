@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.cache import MementoCache, NegativeCache
+from memento_client.server import MementoProxy
+from memento_client.timemap import TimeMap
+from werkzeug.test import Client
+from werkzeug.wrappers import BaseResponse
+import unittest
+from datetime import datetime
+import mock
+
+HTTP_DT = "Sat, 24 Apr 2010 19:00:00 GMT"
+URI_R = "http://www.cnn.com/"
+
+
+class MementoProxyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = MementoCache()
+        self.proxy = MementoProxy(self.cache)
+        self.server = Client(self.proxy, BaseResponse)
+
+    def test_timegate(self):
+        memento_info = {
+            "original_uri": URI_R,
+            "timegate_uri": MementoClient().timegate_uri + URI_R,
+            "mementos": {
+                "closest": {"uri": ["http://web.archive.org/web/20100424190000/http://www.cnn.com/"],
+                            "datetime": datetime(2010, 4, 24, 19), "http_status_code": 200},
+                "first": {"uri": ["http://web.archive.org/web/20000620180259/http://cnn.com/"],
+                          "datetime": datetime(2000, 6, 20, 18, 2, 59)}}}
+        self.cache.set(("memento_info", URI_R, HTTP_DT, MementoClient().timegate_uri), memento_info)
+
+        r = self.server.head("/timegate/" + URI_R, headers=[("Accept-Datetime", HTTP_DT)])
+        assert r.status_code == 302
+        assert r.headers.get("Location") == memento_info["mementos"]["closest"]["uri"][0]
+        assert r.headers.get("Vary") == "accept-datetime"
+
+        links = MementoClient.parse_link_header(r.headers.get("Link"))
+        assert MementoClient.get_uri_dt_for_rel(links, ["original"])["original"]["uri"] == URI_R
+        first = MementoClient.get_uri_dt_for_rel(links, ["first"])["first"]
+        assert first["datetime"] == ["Tue, 20 Jun 2000 18:02:59 GMT"]
+
+        r = self.server.head("/timegate/" + URI_R, headers=[("Accept-Datetime", "not a date")])
+        assert r.status_code == 400
+        for uri_r in ["ftp://example.org/", "example.org", "http://"]:
+            assert self.server.head("/timegate/" + uri_r).status_code == 400
+            assert self.server.get("/timemap/link/" + uri_r).status_code == 400
+
+        # the errors of parsing upstream responses are not those of the request
+        with mock.patch.object(MementoClient, "get_memento_info",
+                               side_effect=ValueError("malformed Link header")):
+            r = self.server.head("/timegate/http://example.org/", headers=[("Accept-Datetime", HTTP_DT)])
+            assert r.status_code == 502
+
+    def test_timegate_latest(self):
+        memento_info = {
+            "original_uri": URI_R,
+            "mementos": {
+                "closest": {"uri": ["http://web.archive.org/web/20150807200034/http://www.cnn.com/"],
+                            "datetime": datetime(2015, 8, 7, 20, 0, 34)},
+                "last": {"uri": ["http://web.archive.org/web/20150807200034/http://www.cnn.com/"],
+                         "datetime": None}}}
+        with mock.patch.object(MementoClient, "get_memento_info",
+                               return_value=memento_info) as get_memento_info:
+            for _ in range(2):
+                r = self.server.head("/timegate/" + URI_R)
+                assert r.status_code == 302
+            # without Accept-Datetime, the requests share one cache key
+            assert get_memento_info.call_count == 1
+        assert ("latest", URI_R) in self.cache
+
+        # no mementos found is not cached with the mementos
+        cache = MementoCache()
+        negative_cache = NegativeCache(ttl=60)
+        server = Client(MementoProxy(cache, negative_cache), BaseResponse)
+        no_mementos = {"original_uri": URI_R, "timegate_uri": MementoClient().timegate_uri + URI_R}
+        with mock.patch.object(MementoClient, "get_memento_info",
+                               return_value=no_mementos):
+            assert server.head("/timegate/" + URI_R).status_code == 404
+        assert len(cache) == 0
+        assert server.application.client.negative_cache is negative_cache
+
+        # no datetime attribute for a memento without one
+        links = MementoClient.parse_link_header(r.headers.get("Link"))
+        last = MementoClient.get_uri_dt_for_rel(links, ["last"])["last"]
+        assert last["uri"] == memento_info["mementos"]["last"]["uri"][0]
+        assert "None" not in r.headers.get("Link")
+
+    def test_timemap(self):
+        timemap = TimeMap(URI_R)
+        timemap.add("http://web.archive.org/web/20000620180259/http://cnn.com/",
+                    datetime(2000, 6, 20, 18, 2, 59))
+        self.cache.set(("timemap", URI_R), timemap.to_link_format())
+
+        r = self.server.get("/timemap/link/" + URI_R)
+        assert r.status_code == 200
+        tm = TimeMap.from_links(MementoClient.parse_link_header(r.get_data(as_text=True)))
+        assert tm.original_uri == URI_R
+        assert tm.first == timemap.first
+
+        assert self.server.get("/unknown").status_code == 404
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.cache import NegativeCache
+from memento_client.hedging import Hedger
+from memento_client.hostfilter import HostFilter
+from memento_client.loadtest import percentile, run_load, run_client_load
+from memento_client.routing import ArchiveRouter
+from memento_client.simulator import ArchiveSimulator, constant, start_simulator
+from werkzeug.test import Client
+from werkzeug.wrappers import BaseResponse
+import unittest
+import mock
+from datetime import datetime, timedelta
+
+
+class SimulatorTest(unittest.TestCase):
+
+    def test_timegate(self):
+        app = ArchiveSimulator(mementos=10, first_memento=datetime(2010, 1, 1),
+                               memento_interval=timedelta(days=1), link_padding=5)
+        client = Client(app, BaseResponse)
+        r = client.head("/timegate/http://www.cnn.com/",
+                        headers=[("Accept-Datetime", "Tue, 05 Jan 2010 10:00:00 GMT")])
+        assert r.status_code == 302
+        assert r.headers["Location"].endswith("/memento/20100105000000/http://www.cnn.com/")
+        assert r.headers["Vary"] == "accept-datetime"
+        links = MementoClient.parse_link_header(r.headers["Link"])
+        rels = MementoClient.get_uri_dt_for_rel(links, ["original", "first", "last", "prev", "next"])
+        assert rels["original"]["uri"] == "http://www.cnn.com/"
+        assert rels["prev"]["datetime"] == ["Mon, 04 Jan 2010 00:00:00 GMT"]
+        assert rels["next"]["datetime"] == ["Wed, 06 Jan 2010 00:00:00 GMT"]
+        # the padding links are added to the header
+        assert r.headers["Link"].count('rel="memento"') == 5
+
+        r = client.head("/memento/20100105000000/http://www.cnn.com/")
+        assert r.status_code == 200
+        assert r.headers["Memento-Datetime"] == "Tue, 05 Jan 2010 00:00:00 GMT"
+        assert MementoClient.is_memento(None, response=r)
+
+        r = client.get("/timemap/link/http://www.cnn.com/")
+        assert r.status_code == 200
+        assert r.get_data(as_text=True).count('rel="memento"') == 10
+
+    def test_redirects(self):
+        app = ArchiveSimulator(timegate_redirects=2)
+        client = Client(app, BaseResponse)
+        r = client.head("/timegate/http://www.cnn.com/")
+        assert r.headers["Location"].endswith("/timegate/hop/1/http://www.cnn.com/")
+        r = client.head("/redirect/2/origin/page")
+        assert r.headers["Location"].endswith("/redirect/1/origin/page")
+        r = client.head("/redirect/1/origin/page")
+        assert r.headers["Location"].endswith("/origin/page")
+
+    def test_latency_and_errors(self):
+        slept = []
+        app = ArchiveSimulator(latency={"timegate": constant(0.25)}, error_rate={"memento": 1.0},
+                               sleep=slept.append)
+        client = Client(app, BaseResponse)
+        assert client.head("/timegate/http://www.cnn.com/").status_code == 302
+        assert client.head("/origin/page").status_code == 200
+        assert slept == [0.25]
+        assert client.head("/memento/20100105000000/http://www.cnn.com/").status_code == 503
+        assert app.requests["timegate"] == 1 and app.requests["memento"] == 1
+        assert client.head("/unknown").status_code == 404
+
+
+class LoadTest(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile(values, 100) == 100
+        assert percentile([], 50) is None
+
+    def test_run_load(self):
+        def call(item):
+            if item % 4 == 0:
+                raise ValueError(item)
+
+        result = run_load(call, list(range(20)), concurrency=3)
+        assert result.count == 20
+        assert result.errors == 5
+        assert result.p50 <= result.p99
+
+    def test_client_load(self):
+        server = start_simulator(ArchiveSimulator(mementos=50))
+        try:
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/",
+                               timemap_uri=server.base_uri + "timemap/link/")
+            uris = [server.base_uri + "origin/page/%d" % i for i in range(10)]
+
+            result = run_client_load(mc, uris, mode="sync", concurrency=2)
+            assert (result.count, result.errors) == (10, 0)
+
+            result = run_client_load(mc, uris, mode="batch", concurrency=2, batch_size=5)
+            assert (result.count, result.errors) == (2, 0)
+
+            result = run_client_load(mc, uris[:2], mode="timemap")
+            assert (result.count, result.errors) == (2, 0)
+
+            info = mc.get_memento_info(uris[0], datetime(2000, 1, 1))
+            assert info["mementos"]["closest"]["uri"][0].startswith(server.base_uri + "memento/")
+            assert info["mementos"]["closest"]["datetime"] is not None
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_link_headers_parsed_once(self):
+        server = start_simulator(ArchiveSimulator(mementos=50, link_padding=20))
+        try:
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/")
+            parse = MementoClient.parse_link_header
+            with mock.patch.object(MementoClient, "parse_link_header",
+                                   side_effect=parse) as parse_link_header:
+                info = mc.get_memento_info(server.base_uri + "origin/page",
+                                           datetime(2000, 1, 1))
+            assert info["mementos"]["prev"]["datetime"] is not None
+            # the TimeGate redirect and the memento, each parsed once
+            assert parse_link_header.call_count == 2
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_resolve_closest(self):
+        app = ArchiveSimulator(mementos=50, link_padding=20)
+        server = start_simulator(app)
+        try:
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/")
+            uri = server.base_uri + "origin/page"
+            dt = datetime(2000, 1, 1)
+            info = mc.get_memento_info(uri, dt)
+            timegate_requests = app.requests["timegate"]
+            memento_requests = app.requests["memento"]
+
+            with mock.patch.object(MementoClient, "parse_link_header") \
+                    as parse_link_header:
+                closest = mc.resolve_closest(uri, dt)
+            assert closest.uri == info["mementos"]["closest"]["uri"][0]
+            assert closest.datetime == info["mementos"]["closest"]["datetime"]
+            assert closest.original_uri == uri
+            assert closest.timegate_uri == info["timegate_uri"]
+            # a single TimeGate request, without the full Link header parse
+            assert app.requests["timegate"] == timegate_requests + 1
+            assert app.requests["memento"] == memento_requests
+            assert parse_link_header.call_count == 0
+
+            result = run_client_load(mc, [uri] * 10, mode="closest")
+            assert result.errors == 0
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_resolve_closest_no_mementos(self):
+        app = ArchiveSimulator(mementos=0)
+        server = start_simulator(app)
+        try:
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/")
+            assert mc.resolve_closest(server.base_uri + "origin/page") is None
+
+            # the same negative cache and host filter as get_memento_info
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/",
+                               negative_cache=NegativeCache())
+            requests = app.requests["timegate"]
+            assert mc.resolve_closest(server.base_uri + "origin/page") is None
+            assert mc.resolve_closest(server.base_uri + "origin/page") is None
+            assert app.requests["timegate"] == requests + 1
+            assert len(mc.negative_cache) == 1
+
+            mc = MementoClient(timegate_uri=server.base_uri + "timegate/",
+                               host_filter=HostFilter(100, authoritative=True))
+            assert mc.resolve_closest("http://uncaptured.example.org/") is None
+            assert app.requests["timegate"] == requests + 1
+
+            # redirected to the original resource
+            uri = "http://www.cnn.com/"
+            response = mock.Mock(status_code=302, headers={
+                "Location": uri, "Link": '<%s>; rel="original"' % uri})
+            assert mc.resolve_closest(uri, tg_response=response) is None
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_resolve_closest_routed(self):
+        slow = start_simulator(ArchiveSimulator(latency={"timegate": constant(1.0)}))
+        mirror = start_simulator(ArchiveSimulator())
+        try:
+            router = ArchiveRouter([slow.base_uri + "timegate/"])
+            mc = MementoClient(router=router,
+                               hedger=Hedger(mirror.base_uri + "timegate/", delay=0.1))
+            uri = slow.base_uri + "origin/page"
+            closest = mc.resolve_closest(uri, datetime(2010, 4, 24))
+            assert closest.uri.startswith(mirror.base_uri)
+            assert closest.timegate_uri == mirror.base_uri + "timegate/" + uri
+            assert router.stats()[slow.base_uri + "timegate/"]["requests"] == 1
+        finally:
+            for server in (slow, mirror):
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
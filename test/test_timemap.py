@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.memento_client import MementoClientException
+from memento_client.timemap import TimeMap, to_timestamp, to_datetime
+import unittest
+from datetime import datetime, timedelta
+
+WAYBACK_TMPL = "http://web.archive.org/web/{0}/http://www.cnn.com/"
+
+LINK_TIMEMAP = '<http://www.cnn.com/>; rel="original",' + \
+    '<http://timetravel.mementoweb.org/timegate/http://www.cnn.com/>; rel="timegate",' + \
+    '<http://web.archive.org/web/20150807200034/http://www.cnn.com/>' + \
+    '; rel="memento"; datetime="Fri, 07 Aug 2015 20:00:34 GMT",' + \
+    '<http://web.archive.org/web/20000620180259/http://cnn.com/>' + \
+    '; rel="first memento"; datetime="Tue, 20 Jun 2000 18:02:59 GMT",' + \
+    '<http://archive.example.org/memento/1234>' + \
+    '; rel="memento"; datetime="Tue, 11 Sep 2001 18:15:28 GMT"'
+
+
+LINK_TIMEMAP_INDEX = '<http://www.cnn.com/>; rel="original",' + \
+    '<http://tm.example.org/1/http://www.cnn.com/>; rel="timemap"' + \
+    '; from="Tue, 20 Jun 2000 18:02:59 GMT"; until="Tue, 11 Sep 2001 18:15:28 GMT",' + \
+    '<http://tm.example.org/2/http://www.cnn.com/>; rel="timemap"' + \
+    '; from="Wed, 12 Sep 2001 00:00:00 GMT"'
+
+# the newer page listed first
+LINK_TIMEMAP_INDEX_REVERSED = '<http://www.cnn.com/>; rel="original",' + \
+    '<http://tm.example.org/2/http://www.cnn.com/>; rel="timemap"' + \
+    '; from="Wed, 12 Sep 2001 00:00:00 GMT",' + \
+    '<http://tm.example.org/1/http://www.cnn.com/>; rel="timemap"' + \
+    '; from="Tue, 20 Jun 2000 18:02:59 GMT"; until="Tue, 11 Sep 2001 18:15:28 GMT"'
+
+LINK_TIMEMAP_PAGE_1 = '<http://web.archive.org/web/20000620180259/http://cnn.com/>' + \
+    '; rel="memento"; datetime="Tue, 20 Jun 2000 18:02:59 GMT"'
+
+LINK_TIMEMAP_PAGE_2 = '<http://web.archive.org/web/20150807200034/http://www.cnn.com/>' + \
+    '; rel="memento"; datetime="Fri, 07 Aug 2015 20:00:34 GMT"'
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, text, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def iter_content(self, chunk_size=1):
+        content = self.text.encode(self.encoding)
+        for i in range(0, len(content), chunk_size):
+            yield content[i:i + chunk_size]
+
+
+class FakeSession(object):
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, uri, headers=None, timeout=None, stream=False):
+        self.requests.append((uri, headers))
+        return self.responses[uri]
+
+    def close(self):
+        pass
+
+
+def create_timemap(count):
+    tm = TimeMap("http://www.cnn.com/")
+    start = datetime(2000, 1, 1)
+    for i in range(count):
+        dt = start + timedelta(hours=i)
+        tm.add(WAYBACK_TMPL.format(dt.strftime("%Y%m%d%H%M%S")), dt)
+    return tm
+
+
+class TimeMapTest(unittest.TestCase):
+
+    def test_conversions(self):
+        ts = to_timestamp("Sun, 01 Apr 2010 12:00:00 GMT")
+        assert ts == 1270123200
+        assert to_timestamp(datetime(2010, 4, 1, 12)) == ts
+        assert to_datetime(ts) == datetime(2010, 4, 1, 12)
+        with self.assertRaises(ValueError):
+            to_timestamp("Sun, 01 Abc 2010 12:00:00 GMT")
+
+    def test_add_and_access(self):
+        tm = create_timemap(1000)
+        assert len(tm) == 1000
+        # every URI-M shares a single template
+        assert len(tm._templates) == 1
+
+        uri_m, dt = tm[10]
+        assert dt == datetime(2000, 1, 1, 10)
+        assert uri_m == WAYBACK_TMPL.format("20000101100000")
+        assert tm[-1] == tm.last
+        assert tm[0] == tm.first
+        with self.assertRaises(IndexError):
+            tm[1000]
+
+        # out of order adds are kept sorted
+        tm.add("http://archive.example.org/memento/1", datetime(1999, 1, 1))
+        assert tm.first == ("http://archive.example.org/memento/1", datetime(1999, 1, 1))
+        assert list(tm)[1][1] == datetime(2000, 1, 1)
+
+    def test_slicing_and_search(self):
+        tm = create_timemap(100)
+        sub = tm[10:20]
+        assert isinstance(sub, TimeMap)
+        assert len(sub) == 10
+        assert sub[0] == tm[10]
+
+        assert tm.bisect(datetime(2000, 1, 1, 5)) == 5
+        assert tm.bisect(datetime(2000, 1, 1, 5, 30)) == 6
+        assert tm.bisect(datetime(2020, 1, 1)) == 100
+
+        assert tm.closest(datetime(2000, 1, 1, 5, 20))[1] == datetime(2000, 1, 1, 5)
+        assert tm.closest(datetime(2000, 1, 1, 5, 40))[1] == datetime(2000, 1, 1, 6)
+        assert tm.closest(datetime(1990, 1, 1)) == tm.first
+        assert tm.closest(datetime(2020, 1, 1)) == tm.last
+        assert TimeMap().closest(datetime(2020, 1, 1)) is None
+
+        between = tm.between(datetime(2000, 1, 1, 2), datetime(2000, 1, 1, 4))
+        assert [dt.hour for _, dt in between] == [2, 3, 4]
+        assert len(tm.between(datetime(2001, 1, 1), datetime(2000, 1, 1))) == 0
+
+    def test_from_links(self):
+        tm = TimeMap.from_links(MementoClient.parse_link_header(LINK_TIMEMAP))
+        assert tm.original_uri == "http://www.cnn.com/"
+        assert tm.timegate_uri == "http://timetravel.mementoweb.org/timegate/http://www.cnn.com/"
+        assert len(tm) == 3
+        assert [uri_m for uri_m, _ in tm] == [
+            "http://web.archive.org/web/20000620180259/http://cnn.com/",
+            "http://archive.example.org/memento/1234",
+            "http://web.archive.org/web/20150807200034/http://www.cnn.com/"]
+
+    def test_get_timemap(self):
+        mc = MementoClient()
+        tm = mc.get_timemap("http://www.cnn.com/", tm_response=FakeResponse(200, LINK_TIMEMAP))
+        assert len(tm) == 3
+        assert tm.timemap_uri == mc.timemap_uri + "http://www.cnn.com/"
+
+        tm = mc.get_timemap("http://www.cnn.com/", tm_response=FakeResponse(404, ""))
+        assert len(tm) == 0
+
+        with self.assertRaises(MementoClientException):
+            mc.get_timemap("http://www.cnn.com/", tm_response=FakeResponse(503, ""))
+
+    def test_merge(self):
+        tm = create_timemap(10)
+        newer = create_timemap(15)
+        assert tm.merge(newer) == 5
+        assert len(tm) == 15
+        assert tm.merge(newer) == 0
+
+        # a different memento at the same datetime as the last one is kept
+        other = TimeMap()
+        other.add("http://archive.example.org/memento/1", tm.last[1])
+        assert tm.merge(other) == 1
+        assert len(tm) == 16
+
+        # older mementos are only added to a full merge
+        older = TimeMap()
+        older.add("http://archive.example.org/memento/0", datetime(1999, 1, 1))
+        older.add(tm.uri(0), tm.first[1])
+        assert tm.merge(older) == 0
+        assert tm.merge(older, newer_only=False) == 1
+        assert tm.merge(older, newer_only=False) == 0
+        assert tm.first == ("http://archive.example.org/memento/0", datetime(1999, 1, 1))
+        assert len(tm) == 17
+
+    def test_sync_timemap(self):
+        mc = MementoClient()
+        tm = mc.get_timemap("http://www.cnn.com/",
+                            tm_response=FakeResponse(200, LINK_TIMEMAP, {"ETag": '"v1"'}))
+        assert tm.etag == '"v1"'
+
+        assert mc.sync_timemap(tm, tm_response=FakeResponse(304, "")) == 0
+        assert len(tm) == 3
+
+        newer = LINK_TIMEMAP + ',<http://web.archive.org/web/20160101000000/http://www.cnn.com/>' + \
+            '; rel="memento"; datetime="Fri, 01 Jan 2016 00:00:00 GMT"'
+        assert mc.sync_timemap(tm, tm_response=FakeResponse(200, newer, {"ETag": '"v2"'})) == 1
+        assert len(tm) == 4
+        assert tm.last[1] == datetime(2016, 1, 1)
+        assert tm.etag == '"v2"'
+
+    def test_sync_paged_timemap(self):
+        index_uri = "http://tm.example.org/http://www.cnn.com/"
+        session = FakeSession({
+            index_uri: FakeResponse(200, LINK_TIMEMAP_INDEX, {"Last-Modified": "Fri, 07 Aug 2015 20:00:34 GMT"}),
+            "http://tm.example.org/1/http://www.cnn.com/": FakeResponse(200, LINK_TIMEMAP_PAGE_1),
+            "http://tm.example.org/2/http://www.cnn.com/": FakeResponse(200, LINK_TIMEMAP_PAGE_2)})
+        mc = MementoClient(session=session, timemap_uri="http://tm.example.org/")
+
+        tm = mc.get_timemap("http://www.cnn.com/")
+        assert len(tm) == 2
+        assert len(session.requests) == 3
+
+        # only the conditional request and the newest page are requested
+        session.requests = []
+        assert mc.sync_timemap(tm) == 0
+        assert session.requests[0] == (index_uri, {"If-Modified-Since": "Fri, 07 Aug 2015 20:00:34 GMT"})
+        assert [uri for uri, _ in session.requests] == [index_uri, "http://tm.example.org/2/http://www.cnn.com/"]
+
+    def test_responses_closed(self):
+        # on every path: not found, error, not modified, read and skipped
+        responses = [FakeResponse(404, ""), FakeResponse(503, ""), FakeResponse(304, "")]
+        mc = MementoClient()
+        mc.get_timemap("http://www.cnn.com/", tm_response=responses[0])
+        with self.assertRaises(MementoClientException):
+            mc.get_timemap("http://www.cnn.com/", tm_response=responses[1])
+        mc.sync_timemap(TimeMap("http://www.cnn.com/"), tm_response=responses[2])
+
+        index_uri = "http://tm.example.org/http://www.cnn.com/"
+        session = FakeSession({
+            index_uri: FakeResponse(200, LINK_TIMEMAP_INDEX),
+            "http://tm.example.org/1/http://www.cnn.com/": FakeResponse(200, LINK_TIMEMAP_PAGE_1),
+            "http://tm.example.org/2/http://www.cnn.com/": FakeResponse(503, "")})
+        mc = MementoClient(session=session, timemap_uri="http://tm.example.org/")
+        assert len(mc.get_timemap("http://www.cnn.com/")) == 1
+        responses += list(session.responses.values())
+        assert all(response.closed for response in responses)
+
+    def test_get_paged_timemap_out_of_order(self):
+        index_uri = "http://tm.example.org/http://www.cnn.com/"
+        session = FakeSession({
+            index_uri: FakeResponse(200, LINK_TIMEMAP_INDEX_REVERSED),
+            "http://tm.example.org/1/http://www.cnn.com/": FakeResponse(200, LINK_TIMEMAP_PAGE_1),
+            "http://tm.example.org/2/http://www.cnn.com/": FakeResponse(200, LINK_TIMEMAP_PAGE_2)})
+        mc = MementoClient(session=session, timemap_uri="http://tm.example.org/")
+
+        tm = mc.get_timemap("http://www.cnn.com/")
+        assert [dt for _, dt in tm] == [datetime(2000, 6, 20, 18, 2, 59), datetime(2015, 8, 7, 20, 0, 34)]
+
+    def test_thin(self):
+        tm = create_timemap(24 * 70)  # hourly, from 2000-01-01 to 2000-03-10
+        days = tm.thin("day")
+        assert len(days) == 70
+        assert days[1][1] == datetime(2000, 1, 2)
+        months = tm.thin("month")
+        assert [dt for _, dt in months] == [datetime(2000, 1, 1), datetime(2000, 2, 1), datetime(2000, 3, 1)]
+        assert len(tm.thin("year")) == 1
+        self.assertRaises(ValueError, tm.thin, "week")
+
+    def test_get_mementos_between(self):
+        mc = MementoClient()
+        mementos = list(mc.get_mementos_between(
+            "http://www.cnn.com/", datetime(2000, 1, 1), datetime(2010, 1, 1),
+            tm_response=FakeResponse(200, LINK_TIMEMAP)))
+        assert mementos == [
+            ("http://web.archive.org/web/20000620180259/http://cnn.com/", datetime(2000, 6, 20, 18, 2, 59)),
+            ("http://archive.example.org/memento/1234", datetime(2001, 9, 11, 18, 15, 28))]
+
+        mementos = list(mc.get_mementos_between(
+            "http://www.cnn.com/", thin="year",
+            tm_response=FakeResponse(200, LINK_TIMEMAP)))
+        assert len(mementos) == 3
+
+        self.assertRaises(ValueError, mc.get_mementos_between, "http://www.cnn.com/", thin="week")
+        self.assertRaises(ValueError, mc.get_mementos_between, "http://www.cnn.com/",
+                          datetime(2010, 1, 1), datetime(2000, 1, 1))
+
+    def test_get_mementos_between_paged(self):
+        index_uri = "http://tm.example.org/http://www.cnn.com/"
+        session = FakeSession({
+            index_uri: FakeResponse(200, LINK_TIMEMAP_INDEX),
+            "http://tm.example.org/1/http://www.cnn.com/": FakeResponse(200, LINK_TIMEMAP_PAGE_1),
+            "http://tm.example.org/2/http://www.cnn.com/": FakeResponse(200, LINK_TIMEMAP_PAGE_2)})
+        mc = MementoClient(session=session, timemap_uri="http://tm.example.org/")
+
+        # the page after the range is not requested
+        mementos = list(mc.get_mementos_between("http://www.cnn.com/", datetime(2000, 1, 1), datetime(2000, 12, 31)))
+        assert [dt for _, dt in mementos] == [datetime(2000, 6, 20, 18, 2, 59)]
+        assert [uri for uri, _ in session.requests] == [index_uri, "http://tm.example.org/1/http://www.cnn.com/"]
+
+        # nor is the page before it
+        session.requests = []
+        mementos = list(mc.get_mementos_between("http://www.cnn.com/", datetime(2010, 1, 1)))
+        assert [dt for _, dt in mementos] == [datetime(2015, 8, 7, 20, 0, 34)]
+        assert [uri for uri, _ in session.requests] == [index_uri, "http://tm.example.org/2/http://www.cnn.com/"]
+
+        # pages in any order, each filtered by the range
+        session.responses[index_uri] = FakeResponse(200, LINK_TIMEMAP_INDEX_REVERSED)
+        mementos = list(mc.get_mementos_between("http://www.cnn.com/", datetime(2000, 1, 1)))
+        assert sorted(dt for _, dt in mementos) == [datetime(2000, 6, 20, 18, 2, 59), datetime(2015, 8, 7, 20, 0, 34)]
+        mementos = list(mc.get_mementos_between("http://www.cnn.com/", datetime(2000, 1, 1), thin="year"))
+        assert len(mementos) == 2
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.server import ThreadingWSGIServer
+from memento_client.simulator import ArchiveSimulator, start_simulator
+from memento_client.transport import PoolTransport, PoolResponse
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+from datetime import datetime
+import os
+import threading
+import unittest
+import mock
+import requests
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PoolTransportTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = ArchiveSimulator(mementos=20, first_memento=datetime(2010, 1, 1))
+        cls.server = start_simulator(cls.app)
+        cls.base = cls.server.base_uri
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_head(self):
+        dt = "Sat, 09 Jan 2010 00:00:00 GMT"
+        uri = self.base + "timegate/http://www.cnn.com/"
+        with PoolTransport() as transport:
+            response = transport.head(uri, headers={"Accept-Datetime": dt})
+            assert isinstance(response, PoolResponse)
+            assert response.status_code == 302
+            assert response.history == []
+            assert response.request.method == "HEAD"
+            assert response.request.headers["Accept-Datetime"] == dt
+            assert "accept-datetime" in response.headers.get("vary").lower()
+
+            response = transport.head(uri, headers={"Accept-Datetime": dt},
+                                      allow_redirects=True)
+            assert response.status_code == 200
+            assert response.url == self.base + "memento/20100108000000/http://www.cnn.com/"
+            assert [res.status_code for res in response.history] == [302]
+            assert response.history[0].url == uri
+            assert "memento-datetime" in response.headers
+
+            # the same answers as a requests session
+            expected = requests.head(uri, headers={"Accept-Datetime": dt},
+                                     allow_redirects=True)
+            assert response.url == expected.url
+            assert response.headers.get("Link") == expected.headers.get("Link")
+
+            transport.max_redirects = 0
+            with self.assertRaises(requests.exceptions.TooManyRedirects):
+                transport.head(uri, allow_redirects=True)
+
+    def test_errors(self):
+        with PoolTransport() as transport:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                transport.head("http://127.0.0.1:1/")
+            with self.assertRaises(requests.exceptions.InvalidSchema):
+                transport.head("ftp://127.0.0.1/")
+
+    def test_client(self):
+        kwargs = {"timegate_uri": self.base + "timegate/",
+                  "check_native_timegate": False}
+        uri = self.base + "origin/page"
+        dt = datetime(2010, 1, 9)
+
+        mc = MementoClient(**kwargs)
+        assert isinstance(mc.transport, PoolTransport)
+        assert mc.worker_kwargs()["transport"] == "pool"
+        info = mc.get_memento_info(uri, dt)
+        assert info["mementos"]["closest"]["datetime"] == datetime(2010, 1, 8)
+
+        # the requests session is still available, with the same results
+        mc = MementoClient(transport="requests", **kwargs)
+        assert mc.transport is mc.session
+        assert mc.worker_kwargs()["transport"] == "requests"
+        assert mc.get_memento_info(uri, dt) == info
+
+        session = requests.Session()
+        mc = MementoClient(session=session, **kwargs)
+        assert mc.transport is session
+        assert mc.get_memento_info(uri, dt) == info
+
+        # shared with the workers when set from outside
+        transport = PoolTransport()
+        mc = MementoClient(transport=transport, **kwargs)
+        assert mc.worker_kwargs()["transport"] is transport
+        assert mc.resolve_closest(uri, dt).uri == info["mementos"]["closest"]["uri"][0]
+        transport.close()
+
+    def test_proxies(self):
+        proxied = []
+
+        def proxy(environ, start_response):
+            proxied.append(environ["PATH_INFO"])
+            start_response("200 OK", [("Content-Length", "0")])
+            return [b""]
+
+        server = make_server("127.0.0.1", 0, proxy, server_class=ThreadingWSGIServer,
+                             handler_class=QuietHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        proxy_uri = "http://127.0.0.1:%d/" % server.server_port
+        uri = "http://archive.invalid/timegate/http://www.cnn.com/"
+        try:
+            with PoolTransport(proxies={"http": proxy_uri}) as transport:
+                assert transport.head(uri).status_code == 200
+                assert proxied == [uri]
+
+            environ = {"HTTP_PROXY": proxy_uri, "NO_PROXY": "127.0.0.1"}
+            with mock.patch.dict(os.environ, environ):
+                with PoolTransport() as transport:
+                    assert transport.head(uri).status_code == 200
+                    assert proxied == [uri, uri]
+                    # not for the hosts of NO_PROXY
+                    assert transport.head(self.base + "timegate/http://www.cnn.com/").status_code == 302
+                    assert proxied == [uri, uri]
+
+                with PoolTransport(trust_env=False) as transport:
+                    with self.assertRaises(requests.exceptions.ConnectionError):
+                        transport.head(uri)
+                    assert proxied == [uri, uri]
+
+            with self.assertRaises(requests.exceptions.InvalidSchema):
+                PoolTransport(proxies={"http": "socks5://127.0.0.1:1"}).head(uri)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
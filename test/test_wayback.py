@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from memento_client import MementoClient
+from memento_client.cache import NegativeCache
+from memento_client.simulator import ArchiveSimulator, start_simulator
+from memento_client.wayback import WaybackRegistry, build_timegate_uri
+import gc
+import sys
+import unittest
+from datetime import datetime
+
+URI_R = "http://www.cnn.com/"
+
+
+class WaybackRegistryTest(unittest.TestCase):
+
+    def test_registry(self):
+        registry = WaybackRegistry()
+        assert registry.memento_uri("ia", URI_R, datetime(2010, 4, 24, 19)) == \
+            "http://web.archive.org/web/20100424190000/http://www.cnn.com/"
+        # by TimeGate uri, whatever the scheme
+        assert registry.match("https://web.archive.org/web/") == "ia"
+        assert registry.template("http://arquivo.pt/wayback/") == registry["pt"]
+        assert registry.match("http://timetravel.mementoweb.org/timegate/") is None
+        with self.assertRaises(ValueError):
+            registry.template("http://timetravel.mementoweb.org/timegate/")
+
+        registry.register("local", "http://localhost:8080/coll/{timestamp}/{uri}")
+        assert "local" in registry
+        assert build_timegate_uri(registry["local"], URI_R) == \
+            "http://localhost:8080/coll/http://www.cnn.com/"
+        with self.assertRaises(ValueError):
+            registry.register("bad", "http://localhost:8080/coll/{uri}")
+
+    def test_client(self):
+        # a rejected client is collected without errors
+        errors = []
+        hook = getattr(sys, "unraisablehook", None)
+        if hook is not None:
+            sys.unraisablehook = errors.append
+        try:
+            with self.assertRaises(ValueError):
+                MementoClient(direct=True)
+            gc.collect()
+        finally:
+            if hook is not None:
+                sys.unraisablehook = hook
+        assert errors == []
+
+        mc = MementoClient(timegate_uri="http://web.archive.org/web/",
+                           direct=True)
+        assert mc.direct_template == "http://web.archive.org/web/{timestamp}/{uri}"
+
+
+class DirectLookupTest(unittest.TestCase):
+
+    def lookup(self, app, dt, **kwargs):
+        server = start_simulator(app)
+        try:
+            mc = MementoClient(
+                direct=server.base_uri + "memento/{timestamp}/{uri}",
+                **kwargs)
+            return server, mc.get_memento_info(URI_R, dt)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_direct(self):
+        app = ArchiveSimulator(mementos=100, first_memento=datetime(2010, 1, 1))
+        server, info = self.lookup(app, datetime(2010, 1, 9))
+        mementos = info["mementos"]
+        assert mementos["closest"]["datetime"] == datetime(2010, 1, 8)
+        assert mementos["closest"]["uri"] == [
+            server.base_uri + "memento/20100108000000/" + URI_R]
+        assert mementos["closest"]["http_status_code"] == 200
+        assert mementos["prev"]["datetime"] == datetime(2010, 1, 1)
+        assert mementos["next"]["datetime"] == datetime(2010, 1, 15)
+        assert mementos["first"]["datetime"] == datetime(2010, 1, 1)
+        assert info["original_uri"] == URI_R
+        assert info["timegate_uri"] == server.base_uri + "memento/" + URI_R
+
+        # the redirect of the archive, and the memento, but no TimeGate
+        assert app.requests["memento"] == 2
+        assert app.requests["timegate"] == app.requests["origin"] == 0
+
+    def test_no_mementos(self):
+        app = ArchiveSimulator(mementos=0)
+        negative_cache = NegativeCache()
+        _, info = self.lookup(app, datetime(2010, 1, 9),
+                              negative_cache=negative_cache)
+        assert "mementos" not in info and "status_code" not in info
+        assert len(negative_cache) == 1